@@ -1,19 +1,20 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from pydantic import BaseModel, validator
-from typing import Dict, Optional
-from .database import Database, get_user_by_email, save_user_to_db
-from .email_service import send_verification_email
-from .database import Database, get_user_by_email, save_user_to_db
-from .utils.validator import DataValidator
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import IntegrityError
+from database import AsyncDatabase, get_user_by_email_async, save_user_async
+from email_service import EmailQueue
+import asyncio
+import bcrypt
+import os
 import random
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from bleach import clean
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 import logging
-import time
 import re
 
 app = FastAPI(title="Form Autofiller API")
@@ -30,6 +31,47 @@ limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# App data lives in data/ next to this module, wherever the server is started from
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATABASE_URL = os.environ.get("FORM_AUTOFILLER_DATABASE_URL",
+                              f"sqlite+aiosqlite:///{os.path.join(DATA_DIR, 'users.db')}")
+# bcrypt releases the GIL, so hashing scales over threads; the semaphore bounds queued work
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+HASH_CONCURRENCY = HASH_WORKERS * 4
+
+if DATABASE_URL.startswith("sqlite") and "FORM_AUTOFILLER_DATABASE_URL" not in os.environ:
+    os.makedirs(DATA_DIR, exist_ok=True)
+database = AsyncDatabase(DATABASE_URL)
+email_queue = EmailQueue()
+password_executor = ThreadPoolExecutor(HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+def get_database() -> AsyncDatabase:
+    return database
+
+@app.on_event("startup")
+async def startup():
+    global _hash_slots
+    _hash_slots = asyncio.Semaphore(HASH_CONCURRENCY)
+    await database.create_tables()
+    await email_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await email_queue.stop()
+    await database.close()
+
+async def hash_password(password: str) -> str:
+    """bcrypt hash computed off the event loop"""
+    global _hash_slots
+    if _hash_slots is None:
+        # Served without lifespan events, so startup never ran
+        _hash_slots = asyncio.Semaphore(HASH_CONCURRENCY)
+    async with _hash_slots:
+        hashed = await asyncio.get_running_loop().run_in_executor(
+            password_executor, bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+    return hashed.decode('utf-8')
+
 class UserRegistration(BaseModel):
     username: str
     email: str
@@ -71,7 +113,8 @@ def audit_log(event: str, username: str = None, email: str = None, ip: str = Non
 
 @app.post("/register/")
 @limiter.limit("5/minute")
-async def register_user(user: UserRegistration, request: Request, response: Response):
+async def register_user(user: UserRegistration, request: Request, response: Response,
+                        db: AsyncDatabase = Depends(get_database)):
     try:
         # Sanitize user inputs
         user.username = clean(user.username)
@@ -84,23 +127,19 @@ async def register_user(user: UserRegistration, request: Request, response: Resp
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-        with Database("your_connection_string_here").session() as session:
-            existing_user = get_user_by_email(session, user.email)
-            if existing_user:
+        async with db.session() as session:
+            if await get_user_by_email_async(session, user.email):
                 raise HTTPException(status_code=400, detail="User already exists")
-        
-        # Hash the password
-        import bcrypt
-        hashed_password = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
-        
-        # Save user to the database
-        save_user_to_db(session, username=user.username, email=user.email, password=hashed_password.decode('utf-8'))
 
-        # Hash the password (pseudo-code)
-        # hashed_password = hash_password(user.password)
+        # Hash the password
+        hashed_password = await hash_password(user.password)
 
-        # Save user to the database (pseudo-code)
-        # await save_user_to_db(username=user.username, email=user.email, password=hashed_password)
+        # Save user to the database; the unique email catches registrations racing this one
+        try:
+            async with db.session() as session:
+                save_user_async(session, username=user.username, email=user.email, password=hashed_password)
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="User already exists")
 
         # Generate and send OTP (pseudo-code)
         # otp = generate_otp()
@@ -113,8 +152,8 @@ async def register_user(user: UserRegistration, request: Request, response: Resp
         # Generate OTP (for demonstration purposes, using a simple random number)
         otp = str(random.randint(100000, 999999))
         
-        # Send verification email
-        send_verification_email(user.email, otp)
+        # Send verification email in the background
+        email_queue.enqueue(user.email, otp)
 
         audit_log(event="User registration", username=user.username, email=user.email, ip=request.client.host)
         return {"message": "User registered successfully. Please check your email for OTP and verification."}
@@ -8,6 +8,7 @@ class SecurityConfig:
     key_file: str
     encryption_algorithm: str
     key_rotation_days: int
+    kdf_iterations: int = 600_000
 
 @dataclass
 class StateConfig:
@@ -21,6 +22,15 @@ class FormFillerConfig:
     key_delay: float
     retry_attempts: int
     default_hotkey: str
+    injection_mode: str = "paste"
+    paste_delay: float = 0.02
+    min_field_delay: float = 0.02
+    timing_mode: str = "adaptive"
+    retry_base_delay: float = 0.05
+    retry_max_delay: float = 1.0
+    retry_jitter: float = 0.5
+    fill_deadline: float = 30.0
+    circuit_breaker_threshold: int = 3
 
 @dataclass
 class AppConfig:
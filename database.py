@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine, Column, String
+import asyncio
+from sqlalchemy import create_engine, Column, String, select
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -35,3 +37,50 @@ def get_user_by_email(session, email: str):
 def save_user_to_db(session, username: str, email: str, password: str):
     new_user = User(username=username, email=email, password=password)
     session.add(new_user)
+
+class AsyncDatabase:
+    """Database for code running on an event loop, e.g. "sqlite+aiosqlite:///users.db" """
+    def __init__(self, connection_string: str):
+        self.engine = create_async_engine(connection_string)
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._tables_created = False
+        self._tables_lock = None
+
+    async def create_tables(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self._tables_created = True
+
+    @asynccontextmanager
+    async def session(self):
+        if not self._tables_created:
+            await self._ensure_tables()
+        session = self.Session()
+        try:
+            yield session
+            await session.commit()
+        except:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def _ensure_tables(self):
+        """Create the tables once, however many first requests arrive together"""
+        if self._tables_lock is None:
+            # Made on first use so it belongs to the loop serving requests
+            self._tables_lock = asyncio.Lock()
+        async with self._tables_lock:
+            if not self._tables_created:
+                await self.create_tables()
+
+    async def close(self):
+        await self.engine.dispose()
+
+async def get_user_by_email_async(session: AsyncSession, email: str):
+    result = await session.execute(select(User).where(User.email == email).limit(1))
+    return result.scalars().first()
+
+def save_user_async(session: AsyncSession, username: str, email: str, password: str):
+    """Stage a new user; it is written when the session commits"""
+    session.add(User(username=username, email=email, password=password))
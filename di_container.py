@@ -10,7 +10,9 @@ class Container(containers.DeclaratorContainer):
     
     security_manager = providers.Singleton(
         'security.encryption.SecurityManager',
-        key_file=config.security.key_file
+        key_file=config.security.key_file,
+        kdf_iterations=config.security.kdf_iterations,
+        key_rotation_days=config.security.key_rotation_days
     )
     
     state_manager = providers.Singleton(
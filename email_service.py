@@ -1,9 +1,12 @@
+import asyncio
+import logging
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 def send_verification_email(to_email: str, otp: str):
-    """Send a verification email with the provided OTP."""
+    """Send a verification email with the provided OTP; SMTP errors propagate to the caller."""
     from_email = "your_email@example.com"  # Replace with your email
     password = "your_email_password"  # Replace with your email password
 
@@ -16,10 +19,77 @@ def send_verification_email(to_email: str, otp: str):
     msg['Subject'] = subject
     msg.attach(MIMEText(body, 'plain'))
 
-    try:
-        with smtplib.SMTP('smtp.example.com', 587) as server:  # Replace with your SMTP server
-            server.starttls()
-            server.login(from_email, password)
-            server.send_message(msg)
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    with smtplib.SMTP('smtp.example.com', 587) as server:  # Replace with your SMTP server
+        server.starttls()
+        server.login(from_email, password)
+        server.send_message(msg)
+
+class EmailQueue:
+    """Sends verification emails from background tasks so requests never wait on SMTP.
+
+    The blocking smtplib send runs in a worker thread per email. The queue is
+    bounded, and when it is full enqueue() refuses the email instead of making
+    the request wait. Before start() or after stop(), for example when the
+    app is served without lifespan events, emails go straight to a small
+    thread pool instead.
+    """
+    def __init__(self, sender=send_verification_email, workers: int = 4, maxsize: int = 1000):
+        self.sender = sender
+        self.workers = workers
+        self.maxsize = maxsize
+        self.sent = 0
+        self.failed = 0
+        self._queue = None
+        self._tasks = []
+        self._fallback = None
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def enqueue(self, to_email: str, otp: str) -> bool:
+        if self._queue is None:
+            if self._fallback is None:
+                self._fallback = ThreadPoolExecutor(self.workers, thread_name_prefix="email")
+            self._fallback.submit(self._send, to_email, otp)
+            return True
+        try:
+            self._queue.put_nowait((to_email, otp))
+            return True
+        except asyncio.QueueFull:
+            logging.error(f"Email queue full, verification email to {to_email} not queued")
+            return False
+
+    async def join(self):
+        """Wait until every queued email has been handled"""
+        await self._queue.join()
+
+    async def stop(self, drain: bool = True):
+        if self._queue is not None:
+            if drain:
+                await self._queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            self._queue = None
+        if self._fallback is not None:
+            await asyncio.to_thread(self._fallback.shutdown, drain)
+            self._fallback = None
+
+    def _send(self, to_email: str, otp: str):
+        try:
+            self.sender(to_email, otp)
+            self.sent += 1
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Failed to send email: {str(e)}")
+
+    async def _worker(self):
+        queue = self._queue
+        while True:
+            to_email, otp = await queue.get()
+            try:
+                await asyncio.to_thread(self._send, to_email, otp)
+            finally:
+                queue.task_done()
@@ -20,4 +20,16 @@ class StateError(FormAutofillerError):
 
 class ProfileError(FormAutofillerError):
     """Raised when profile operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+class InjectionError(FormAutofillerError):
+    """Raised when entering a value into the target field fails part-way"""
+    def __init__(self, field: str, written: int, reason: str):
+        self.field = field
+        self.written = written
+        self.reason = reason
+        super().__init__(f"Injection failed for {field} after {written} characters: {reason}")
+
+class FillAbortedError(FormAutofillerError):
+    """Raised when a fill exceeds its deadline or trips the circuit breaker"""
+    pass
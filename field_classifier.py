@@ -0,0 +1,113 @@
+import os
+import logging
+from typing import Dict, List, Optional, Tuple, Iterable
+from field_mapping import DEFAULT_FIELD_VARIATIONS, canonical_label
+from lazy_import import lazy_import
+
+# scikit-learn and pandas take seconds to import; load them on first use
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+sklearn_text = lazy_import("sklearn.feature_extraction.text")
+sklearn_linear = lazy_import("sklearn.linear_model")
+sklearn_pipeline = lazy_import("sklearn.pipeline")
+
+# Form element attributes combined into the text the classifier sees
+FIELD_ATTRIBUTES = ('label', 'name', 'id', 'placeholder', 'autocomplete')
+
+class FieldClassifier:
+    """Character n-gram classifier mapping raw field labels to profile keys.
+
+    The model is trained from the field variation table and loaded from
+    model_path lazily on the first prediction. If no serialized model exists
+    yet, one is trained and saved.
+    """
+    def __init__(self, model_path: str = "models/field_classifier.joblib",
+                 variations: Optional[Dict[str, List[str]]] = None,
+                 min_confidence: float = 0.3):
+        self.model_path = model_path
+        self.variations = variations or DEFAULT_FIELD_VARIATIONS
+        self.min_confidence = min_confidence
+        self._model: Optional['sklearn_pipeline.Pipeline'] = None
+
+    @staticmethod
+    def _build_pipeline() -> 'sklearn_pipeline.Pipeline':
+        return sklearn_pipeline.make_pipeline(
+            sklearn_text.HashingVectorizer(analyzer='char_wb', ngram_range=(2, 4), n_features=2 ** 14,
+                                           alternate_sign=False, norm='l2'),
+            sklearn_linear.LogisticRegression(max_iter=1000, C=10.0)
+        )
+
+    @staticmethod
+    def _training_texts(variation: str) -> List[str]:
+        """Expand a variation into the spellings it shows up as on real forms"""
+        words = variation.replace('-', '_').split('_')
+        spaced = ' '.join(words)
+        return [variation, canonical_label(variation), spaced, spaced.title(), f"{spaced.title()}:",
+                f"your {spaced}", f"{spaced} *"]
+
+    def fit(self) -> 'FieldClassifier':
+        """Train the model from the variation table"""
+        texts, targets = [], []
+        for field, names in self.variations.items():
+            for variation in set(names) | {field}:
+                for text in self._training_texts(variation):
+                    texts.append(text)
+                    targets.append(field)
+        self._model = self._build_pipeline().fit(texts, targets)
+        return self
+
+    def save(self):
+        directory = os.path.dirname(self.model_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(self._model, self.model_path)
+
+    def _ensure_model(self) -> 'sklearn_pipeline.Pipeline':
+        if self._model is None:
+            try:
+                self._model = joblib.load(self.model_path)
+            except FileNotFoundError:
+                logging.info(f"No field classifier at {self.model_path}, training a new one")
+                self.fit()
+                try:
+                    self.save()
+                except OSError as e:
+                    logging.warning(f"Could not save field classifier: {str(e)}")
+        return self._model
+
+    def predict(self, labels: Iterable[str]) -> List[Tuple[Optional[str], float]]:
+        """Classify a batch of labels, returning (field, confidence) per label.
+
+        Fields whose best class falls below min_confidence map to None.
+        """
+        labels = list(labels)
+        if not labels:
+            return []
+        model = self._ensure_model()
+        probabilities = model.predict_proba(labels)
+        best = probabilities.argmax(axis=1)
+        confidences = probabilities[range(len(labels)), best]
+        classes = model.classes_
+        return [
+            (str(classes[index]) if confidence >= self.min_confidence else None, float(confidence))
+            for index, confidence in zip(best, confidences)
+        ]
+
+    def predict_form(self, fields: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Classify every element of a scanned form in one call.
+
+        fields holds one row per form element with any of FIELD_ATTRIBUTES
+        as columns. Returns a copy with 'field' and 'confidence' columns added.
+        """
+        columns = [column for column in FIELD_ATTRIBUTES if column in fields.columns]
+        if not columns:
+            raise ValueError(f"Form fields need at least one of {FIELD_ATTRIBUTES}")
+        text = fields[columns[0]].fillna('').astype(str)
+        for column in columns[1:]:
+            text = text.str.cat(fields[column].fillna('').astype(str), sep=' ')
+
+        predictions = self.predict(text.str.strip())
+        result = fields.copy()
+        result['field'] = [field for field, _ in predictions]
+        result['confidence'] = [confidence for _, confidence in predictions]
+        return result
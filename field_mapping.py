@@ -1,6 +1,66 @@
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from collections import OrderedDict, Counter
+from itertools import chain
+from typing import List, Dict, Optional, Tuple, Iterator, Iterable, Any, Set
+import json
+import os
 import re
+from lazy_import import lazy_import
+
+# Only needed once a label misses the exact index
+Levenshtein = lazy_import("Levenshtein")
+
+DEFAULT_FIELD_VARIATIONS: Dict[str, List[str]] = {
+    'first_name': ['first', 'firstname', 'fname', 'givenname', 'given', 'first-name', 'first_name'],
+    'last_name': ['last', 'lastname', 'lname', 'surname', 'familyname', 'last-name', 'last_name', 'family'],
+    'email': ['email', 'e-mail', 'emailaddress', 'mail', 'email_address', 'e_mail'],
+    'phone': ['phone', 'telephone', 'mobile', 'cell', 'phonenumber', 'phone_number', 'tel'],
+    'address': ['address', 'street', 'streetaddress', 'addr', 'address1', 'street_address'],
+    'city': ['city', 'town', 'municipality'],
+    'state': ['state', 'province', 'region', 'county'],
+    'zip': ['zip', 'zipcode', 'postal', 'postalcode', 'zip_code', 'postal_code'],
+    'ssn': ['ssn', 'social', 'socialsecurity', 'social_security'],
+    'dob': ['dob', 'birthdate', 'dateofbirth', 'birth', 'birth_date', 'date_of_birth'],
+    'company': ['company', 'organization', 'employer', 'business', 'company_name'],
+    'job_title': ['job', 'title', 'position', 'jobtitle', 'job_title', 'role'],
+    'website': ['website', 'site', 'webpage', 'url', 'web', 'homepage'],
+    'linkedin': ['linkedin', 'linkedinurl', 'linkedin_url'],
+    'github': ['github', 'githuburl', 'github_url', 'git'],
+    'country': ['country', 'nation', 'country_name'],
+    'nationality': ['nationality', 'citizenship'],
+    'gender': ['gender', 'sex'],
+    'marital_status': ['marital', 'marital_status', 'marriage'],
+    'driver_license': ['driver', 'license', 'driver_license', 'drivers_license'],
+    'passport': ['passport', 'passport_number'],
+    'emergency_contact': ['emergency', 'emergency_contact', 'ice'],
+    'blood_type': ['blood', 'blood_type', 'bloodtype'],
+    'education': ['education', 'degree', 'qualification'],
+    'skills': ['skills', 'expertise', 'competencies'],
+    'languages': ['languages', 'spoken_languages'],
+    'bio': ['bio', 'about', 'description', 'summary'],
+    'twitter': ['twitter', 'twitter_url', 'twitter_handle'],
+    'facebook': ['facebook', 'facebook_url', 'fb'],
+    'instagram': ['instagram', 'instagram_url', 'ig'],
+    'preferred_name': ['preferred', 'nickname', 'preferred_name'],
+    'middle_name': ['middle', 'middlename', 'middle_name'],
+    'suffix': ['suffix', 'name_suffix'],
+    'title': ['title', 'name_title', 'prefix']
+}
+
+# Sections searched, in order, when a mapping does not name its own section
+FILL_SECTIONS = ('personal', 'payment')
+
+_NO_FIELDS: Dict[str, Any] = {}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def canonical_label(label: str) -> str:
+    """Lowercase a label and drop separators ("First Name:" -> "firstname")"""
+    return _NON_ALNUM.sub('', label.lower())
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"^{key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
 
 @dataclass
 class FieldMapping:
@@ -9,25 +69,294 @@ class FieldMapping:
     validation_pattern: Optional[str] = None
     transform_function: Optional[callable] = None
     sensitive: bool = False
+    section: Optional[str] = None
+
+@dataclass
+class MappingMatch:
+    label: str
+    mapping: Optional[FieldMapping]
+    confidence: float
 
 class FieldMappingRegistry:
-    def __init__(self):
+    def __init__(self, fuzzy_threshold: float = 0.8, max_edits: int = 2,
+                 max_candidates: int = 64, cache_size: int = 1024):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_edits = max_edits
+        self.max_candidates = max_candidates
+        self.cache_size = cache_size
         self._mappings: Dict[str, FieldMapping] = {}
-        self._variation_index: Dict[str, str] = {}
-        
+        self._variation_index: Dict[str, Tuple[Optional[str], str]] = {}
+        self._defaults: Dict[str, FieldMapping] = {}
+        self._custom_names: set = set()
+        self._custom_mtime: Optional[float] = None
+        # Fill plan cache: (section, field) pairs for the last profile layout seen
+        self._plan: List[Tuple[str, str]] = []
+        self._plan_fields: Tuple[frozenset, ...] = ()
+        self._plan_version: Optional[int] = None
+        self._version = 0
+        # Fuzzy index: canonical variation -> mapping name, and
+        # (trigram, variation length) -> canonical variations
+        self._canonical: Dict[str, str] = {}
+        self._gram_index: Dict[Tuple[str, int], Set[str]] = {}
+        self._fuzzy_cache: 'OrderedDict[str, Tuple[Optional[str], float]]' = OrderedDict()
+
+    @classmethod
+    def from_variations(cls, variations: Dict[str, List[str]]) -> 'FieldMappingRegistry':
+        """Build a registry whose defaults are the given name -> variations table"""
+        registry = cls()
+        for name, names in variations.items():
+            mapping = FieldMapping(name=name, variations=list(names))
+            registry._defaults[name] = mapping
+            registry.register(mapping)
+        return registry
+
     def register(self, mapping: FieldMapping):
+        if mapping.name in self._mappings:
+            self._unindex(self._mappings[mapping.name])
         self._mappings[mapping.name] = mapping
+        entry = (mapping.section, mapping.name)
         for variation in mapping.variations:
-            self._variation_index[variation.lower()] = mapping.name
-            
+            self._variation_index[variation.lower()] = entry
+            self._index_canonical(canonical_label(variation), mapping.name)
+        self._version += 1
+        self._fuzzy_cache.clear()
+
+    def unregister(self, name: str):
+        """Remove a mapping, restoring the built-in default it replaced if any"""
+        mapping = self._mappings.get(name)
+        if mapping is None:
+            return
+        default = self._defaults.get(name)
+        if default is not None and mapping is not default:
+            # Re-registering in place keeps the default's fill position
+            self.register(default)
+            return
+        self._unindex(mapping)
+        del self._mappings[name]
+        self._version += 1
+        self._fuzzy_cache.clear()
+
+    def _unindex(self, mapping: FieldMapping):
+        freed_keys: Set[str] = set()
+        freed_canonicals: Set[str] = set()
+        for variation in mapping.variations:
+            key = variation.lower()
+            if self._variation_index.get(key, (None, None))[1] == mapping.name:
+                del self._variation_index[key]
+                freed_keys.add(key)
+            canonical = canonical_label(variation)
+            if self._canonical.get(canonical) == mapping.name:
+                del self._canonical[canonical]
+                freed_canonicals.add(canonical)
+                length = len(canonical)
+                for gram in _trigrams(canonical):
+                    postings = self._gram_index[(gram, length)]
+                    postings.discard(canonical)
+                    if not postings:
+                        del self._gram_index[(gram, length)]
+        if freed_keys or freed_canonicals:
+            self._reassign(mapping, freed_keys, freed_canonicals)
+
+    def _reassign(self, removed: FieldMapping, keys: Set[str], canonicals: Set[str]):
+        """Hand variations freed by removed back to the other mappings that list them, last one winning"""
+        for mapping in self._mappings.values():
+            if mapping is removed:
+                continue
+            for variation in mapping.variations:
+                key = variation.lower()
+                if key in keys:
+                    self._variation_index[key] = (mapping.section, mapping.name)
+                canonical = canonical_label(variation)
+                if canonical in canonicals:
+                    self._index_canonical(canonical, mapping.name)
+
+    def _index_canonical(self, canonical: str, name: str):
+        if not canonical:
+            return
+        if canonical not in self._canonical:
+            length = len(canonical)
+            for gram in _trigrams(canonical):
+                self._gram_index.setdefault((gram, length), set()).add(canonical)
+        self._canonical[canonical] = name
+
     def find_mapping(self, field_name: str) -> Optional[FieldMapping]:
         normalized = field_name.lower()
         if normalized in self._variation_index:
-            return self._mappings[self._variation_index[normalized]]
-        
+            return self._mappings[self._variation_index[normalized][1]]
+
         # Try fuzzy matching if exact match fails
         return self._fuzzy_match(normalized)
-    
+
+    def find_mappings(self, labels: Iterable[str]) -> Dict[str, MappingMatch]:
+        """Resolve many labels at once, returning a match and confidence per distinct label.
+
+        Each distinct label is normalized once. Exact variations resolve with
+        confidence 1.0; the remaining misses share a single fuzzy pass.
+        """
+        results: Dict[str, MappingMatch] = {}
+        misses: Dict[str, List[str]] = {}
+        for label in labels:
+            if label in results:
+                continue
+            entry = self._variation_index.get(label.lower())
+            if entry is not None:
+                results[label] = MappingMatch(label, self._mappings[entry[1]], 1.0)
+                continue
+            results[label] = None
+            misses.setdefault(canonical_label(label), []).append(label)
+
+        for canonical, (name, score) in self._fuzzy_lookup_many(misses).items():
+            mapping = self._mappings[name] if name else None
+            for label in misses[canonical]:
+                results[label] = MappingMatch(label, mapping, score if mapping else 0.0)
+        return results
+
+    def _fuzzy_lookup_many(self, canonicals: Iterable[str]) -> Dict[str, Tuple[Optional[str], float]]:
+        """Fuzzy-resolve a batch of canonical labels, sharing posting lookups across the batch.
+
+        Results are kept in an LRU cache that is cleared whenever the
+        registry changes.
+        """
+        postings_memo: Dict[str, Tuple[int, List[Set[str]]]] = {}
+        results = {}
+        for canonical in canonicals:
+            cached = self._fuzzy_cache.get(canonical)
+            if cached is not None:
+                self._fuzzy_cache.move_to_end(canonical)
+            else:
+                cached = self._search(canonical, postings_memo)
+                self._fuzzy_cache[canonical] = cached
+                if len(self._fuzzy_cache) > self.cache_size:
+                    self._fuzzy_cache.popitem(last=False)
+            results[canonical] = cached
+        return results
+
     def _fuzzy_match(self, field_name: str) -> Optional[FieldMapping]:
-        # Implement fuzzy matching logic using Levenshtein distance
-        pass
\ No newline at end of file
+        name, _ = self._fuzzy_lookup(canonical_label(field_name))
+        return self._mappings[name] if name else None
+
+    def _fuzzy_lookup(self, canonical: str) -> Tuple[Optional[str], float]:
+        """Resolve a canonical label to (mapping name, similarity) through the trigram index"""
+        return self._fuzzy_lookup_many((canonical,))[canonical]
+
+    def _search(self, canonical: str,
+                postings_memo: Optional[Dict[Tuple[str, int], Tuple[int, List[Set[str]]]]] = None
+                ) -> Tuple[Optional[str], float]:
+        if not canonical:
+            return None, 0.0
+        if canonical in self._canonical:
+            return self._canonical[canonical], 1.0
+
+        grams = _trigrams(canonical)
+        length = len(canonical)
+        # Candidates are at most max_edits insertions/deletions away, so their
+        # length differs by at most that much and, since each edit destroys at
+        # most 3 query trigrams, they share at least `required` trigrams.
+        max_edits = self.max_edits
+        required = max(1, len(grams) - 3 * max_edits)
+
+        # Prefix filter: a qualifying candidate must appear in at least one of
+        # the (len(grams) - required + 1) rarest query trigrams
+        if postings_memo is None:
+            postings_memo = {}
+        by_gram = sorted(
+            (self._gram_postings(gram, length, postings_memo) for gram in grams),
+            key=lambda found: found[0]
+        )
+        postings = chain.from_iterable(sets for _, sets in by_gram[:len(grams) - required + 1])
+        counts = Counter(chain.from_iterable(postings))
+        # Score only the variations sharing the most rare trigrams
+        candidates = [candidate for candidate, _ in counts.most_common(self.max_candidates)]
+
+        best, best_score = None, 0.0
+        ratio = Levenshtein.ratio
+        for candidate in candidates:
+            score = ratio(canonical, candidate)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.fuzzy_threshold:
+            return None, best_score
+        return self._canonical[best], best_score
+
+    def _gram_postings(self, gram: str, length: int, memo: Dict) -> Tuple[int, List[Set[str]]]:
+        """Return (total size, posting sets) for a trigram within the length window"""
+        key = (gram, length)
+        found = memo.get(key)
+        if found is None:
+            index = self._gram_index
+            sets = [
+                index[(gram, size)]
+                for size in range(max(1, length - self.max_edits), length + self.max_edits + 1)
+                if (gram, size) in index
+            ]
+            found = memo[key] = (sum(map(len, sets)), sets)
+        return found
+
+    def load_custom_mappings(self, mappings_file: str = "field_mappings.json") -> bool:
+        """Apply custom mappings from a JSON file if it changed since the last call.
+
+        Only names whose variations differ from the previous load are
+        re-registered. Returns True if the registry was modified.
+        """
+        try:
+            mtime = os.stat(mappings_file).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._custom_mtime:
+            return False
+
+        custom: Dict[str, List[str]] = {}
+        if mtime is not None:
+            with open(mappings_file, 'r') as f:
+                custom = json.load(f)
+        self._custom_mtime = mtime
+
+        changed = False
+        for name in self._custom_names - custom.keys():
+            self.unregister(name)
+            changed = True
+        for name, variations in custom.items():
+            current = self._mappings.get(name)
+            if name in self._custom_names and current is not None and current.variations == variations:
+                continue
+            self.register(FieldMapping(name=name, variations=list(variations)))
+            changed = True
+        self._custom_names = set(custom)
+        return changed
+
+    def fill_plan(self, profile: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Return the ordered (section, field) pairs to fill for this profile layout.
+
+        The plan is cached and only rebuilt when the registry or the set of
+        profile fields changes. A repeated fill compares each section's keys
+        with the cached field sets in place, without copying them.
+        """
+        if self._plan_version != self._version or not self._same_fields(profile):
+            self._plan = self._build_plan(profile)
+            self._plan_fields = tuple(frozenset(profile.get(section, ())) for section in FILL_SECTIONS)
+            self._plan_version = self._version
+        return self._plan
+
+    def _same_fields(self, profile: Dict[str, Any]) -> bool:
+        for section, fields in zip(FILL_SECTIONS, self._plan_fields):
+            values = profile.get(section, _NO_FIELDS)
+            if not isinstance(values, dict) or values.keys() != fields:
+                return False
+        return True
+
+    def _build_plan(self, profile: Dict[str, Any]) -> List[Tuple[str, str]]:
+        plan = []
+        for name, mapping in self._mappings.items():
+            sections = (mapping.section,) if mapping.section else FILL_SECTIONS
+            for section in sections:
+                if name in profile.get(section, ()):
+                    plan.append((section, name))
+                    break
+        return plan
+
+    def iter_fill_values(self, profile: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """Yield (field, value) for every non-empty field in fill order"""
+        for section, field in self.fill_plan(profile):
+            value = profile[section][field]
+            if value:
+                yield field, value
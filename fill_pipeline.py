@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from exceptions import InjectionError
+from field_mapping import FieldMappingRegistry
+from retry import RetryPolicy
+
+@dataclass(frozen=True)
+class FillAction:
+    section: str
+    field: str
+    value: str
+
+@dataclass
+class FillResult:
+    filled: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    cancelled: bool = False
+    duration: float = 0.0
+
+def build_fill_plan(profile: Dict[str, Any], registry: FieldMappingRegistry) -> List[FillAction]:
+    """Planning stage: turn a profile and the field mappings into ordered fill actions.
+
+    Pure function of its inputs; nothing here touches the desktop.
+    """
+    return [
+        FillAction(section, name, str(profile[section][name]))
+        for section, name in registry.fill_plan(profile)
+        if profile[section][name]
+    ]
+
+class FillExecutor:
+    """Execution stage: run a fill plan through an injector backend.
+
+    Retries follow retry_policy, and the pacer (if any) learns timings for
+    `target` from failed and successful fields.
+    """
+    def __init__(self, injector, pacer=None, retry_policy: Optional[RetryPolicy] = None,
+                 target: str = "default"):
+        self.injector = injector
+        self.pacer = pacer
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.target = target
+
+    def execute(self, plan: List[FillAction], cancel_event: Optional[threading.Event] = None,
+                progress: Optional[Callable[[str], Any]] = None) -> FillResult:
+        """Fill every action in order; FillAbortedError propagates if the fill is aborted"""
+        cancel_event = cancel_event or threading.Event()
+        # Backoff sleeps wake up as soon as the fill is cancelled
+        retries = self.retry_policy.start(sleep=cancel_event.wait)
+        result = FillResult()
+        start = time.perf_counter()
+        if self.pacer is not None:
+            self.injector.apply_timing(self.pacer.timing_for(self.target))
+
+        self.injector.begin()
+        try:
+            for action in plan:
+                if cancel_event.is_set():
+                    result.cancelled = True
+                    break
+                if retries.run(self._attempt(action), self._on_retry):
+                    result.filled.append(action.field)
+                    if self.pacer is not None:
+                        self.pacer.record_success(self.target)
+                else:
+                    logging.error(f"Giving up on field {action.field}")
+                    result.failed.append(action.field)
+                if progress is not None:
+                    progress(action.field)
+        finally:
+            self.injector.end()
+            if self.pacer is not None:
+                self.pacer.save()
+            result.duration = time.perf_counter() - start
+        return result
+
+    def _attempt(self, action: FillAction) -> Callable[[], None]:
+        offset = 0
+
+        def attempt():
+            nonlocal offset
+            try:
+                self.injector.inject(action.field, action.value, offset)
+            except InjectionError as e:
+                # Resume after the characters that already went in
+                offset = e.written
+                raise
+        return attempt
+
+    def _on_retry(self, attempt: int, error: Exception):
+        if self.pacer is not None:
+            self.pacer.record_failure(self.target)
+            self.injector.apply_timing(self.pacer.timing_for(self.target))
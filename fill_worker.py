@@ -0,0 +1,167 @@
+import time
+import queue
+import logging
+import threading
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, List, Tuple
+
+@dataclass
+class FillJob:
+    job_id: int
+    profile_name: str
+    profile: Dict[str, Any]
+    status: str = "queued"  # queued, running, done, cancelled, failed
+    fields_filled: int = 0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def queue_latency(self) -> Optional[float]:
+        """Seconds between submission and the worker picking the job up"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds the worker spent running the job"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Fields filled per second"""
+        if not self.duration:
+            return None
+        return self.fields_filled / self.duration
+
+class FillWorker:
+    """Run fill jobs on a dedicated thread and hand events back to the UI thread.
+
+    fill_function(job, progress) does the filling; it must check
+    job.cancelled between fields and call progress(field_type) after each
+    one. Events are queued and delivered by drain_events(), which the UI
+    thread calls from its own loop (e.g. via root.after).
+
+    on_busy decides what a submission does while a job is running:
+    "cancel" aborts the running job, "queue" runs the new job after it.
+    """
+    def __init__(self, fill_function: Callable[[FillJob, Callable[[str], None]], None],
+                 on_busy: str = "cancel", history_size: int = 100):
+        if on_busy not in ("cancel", "queue"):
+            raise ValueError(f"Unknown on_busy policy: {on_busy}")
+        self.fill_function = fill_function
+        self.on_busy = on_busy
+        # Most recent finished jobs, for per-job latency and throughput stats
+        self.completed: Deque[FillJob] = deque(maxlen=history_size)
+        self._jobs: "queue.Queue[Optional[FillJob]]" = queue.Queue()
+        self._events: "queue.Queue[Tuple[str, FillJob, Any]]" = queue.Queue()
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._current: Optional[FillJob] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._thread = threading.Thread(target=self._run, name="fill-worker", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, event: str, handler: Callable):
+        """Register handler(job, data) for 'started', 'progress' or 'finished' events"""
+        self._listeners.setdefault(event, []).append(handler)
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return self._current is not None or self._pending > 0
+
+    def submit(self, profile_name: str, profile: Dict[str, Any]) -> Optional[FillJob]:
+        """Queue a fill, or cancel the running one if on_busy is 'cancel'.
+
+        Returns the queued job, or None if the submission cancelled a fill.
+        """
+        with self._lock:
+            if self.on_busy == "cancel" and (self._current is not None or self._pending):
+                if self._current is not None:
+                    self._current.cancel()
+                self._cancel_pending()
+                return None
+            job = FillJob(next(self._ids), profile_name, profile)
+            self._pending += 1
+        self._jobs.put(job)
+        return job
+
+    def cancel(self):
+        """Cancel the running job and everything queued behind it"""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._cancel_pending()
+
+    def _cancel_pending(self):
+        for job in list(self._jobs.queue):
+            if job is not None:
+                job.cancel()
+
+    def shutdown(self, timeout: Optional[float] = None):
+        self.cancel()
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    def drain_events(self) -> int:
+        """Deliver queued events to listeners; call this on the UI thread"""
+        delivered = 0
+        while True:
+            try:
+                event, job, data = self._events.get_nowait()
+            except queue.Empty:
+                return delivered
+            for handler in self._listeners.get(event, []):
+                try:
+                    handler(job, data)
+                except Exception as e:
+                    logging.error(f"Error handling fill event {event}: {str(e)}")
+            delivered += 1
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            with self._lock:
+                self._pending -= 1
+                self._current = job
+            job.started_at = time.perf_counter()
+            if job.cancelled:
+                job.status = "cancelled"
+            else:
+                job.status = "running"
+                self._events.put(("started", job, None))
+                try:
+                    self.fill_function(job, lambda field_type: self._progress(job, field_type))
+                    job.status = "cancelled" if job.cancelled else "done"
+                except Exception as e:
+                    logging.error(f"Fill job {job.job_id} failed: {str(e)}")
+                    job.status = "failed"
+                    job.error = str(e)
+            job.finished_at = time.perf_counter()
+            # Queued before the worker goes idle, so anyone who sees it idle can drain it
+            self._events.put(("finished", job, None))
+            with self._lock:
+                self._current = None
+                self.completed.append(job)
+
+    def _progress(self, job: FillJob, field_type: str):
+        job.fields_filled += 1
+        self._events.put(("progress", job, field_type))
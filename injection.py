@@ -0,0 +1,226 @@
+import sys
+import time
+import logging
+from typing import Iterable, List, Optional, Tuple
+from exceptions import InjectionError
+from lazy_import import lazy_import
+
+# Deferred so headless code paths (planning, the recording backend) work
+# without a display
+pyautogui = lazy_import("pyautogui")
+pyperclip = lazy_import("pyperclip")
+
+# Shortcuts differ on macOS
+MODIFIER_KEY = 'command' if sys.platform == 'darwin' else 'ctrl'
+PASTE_HOTKEY = (MODIFIER_KEY, 'v')
+SELECT_ALL_HOTKEY = (MODIFIER_KEY, 'a')
+
+# Fields that typically sit behind input masks or per-keystroke listeners
+# and therefore reject or mangle pasted text
+DEFAULT_TYPED_FIELDS = ('expiry_date', 'cvv')
+
+class TypingInjector:
+    """Inject values keystroke by keystroke through pyautogui.
+
+    Injectors pace themselves through field_delay and key_delay, so calls
+    pass _pause=False to skip pyautogui's global PAUSE after every call.
+    All input goes through the _type_char/_press/_hotkey/_sleep primitives
+    so other backends can reuse the injection logic.
+    """
+    def __init__(self, key_delay: float = 0.05, field_delay: float = 0.2):
+        self.key_delay = key_delay
+        self.field_delay = field_delay
+
+    def apply_timing(self, timing):
+        """Use the delays chosen by the pacer for the following fields"""
+        self.field_delay = timing.field_delay
+        self.key_delay = timing.key_delay
+
+    def begin(self):
+        """Prepare the injector before the first field is filled"""
+        pass
+
+    def end(self):
+        """Clean up after the last field has been filled"""
+        pass
+
+    def inject(self, field_type: str, value: str, offset: int = 0):
+        """Enter value[offset:] into the focused field and move to the next one.
+
+        Raises InjectionError carrying the number of characters already
+        written, so a retry can resume instead of retyping the whole value.
+        """
+        written = offset
+        try:
+            for char in value[offset:]:
+                self._type_char(char)
+                written += 1
+                if self.key_delay:
+                    self._sleep(self.key_delay)
+            self.next_field()
+        except Exception as e:
+            raise InjectionError(field_type, written, str(e)) from e
+
+    def next_field(self):
+        self._sleep(self.field_delay)
+        self._press('tab')
+
+    def _type_char(self, char: str):
+        pyautogui.write(char, _pause=False)
+
+    def _press(self, key: str):
+        pyautogui.press(key, _pause=False)
+
+    def _hotkey(self, *keys: str):
+        pyautogui.hotkey(*keys, _pause=False)
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class ClipboardInjector(TypingInjector):
+    """Inject each value with a single clipboard paste.
+
+    The user's clipboard is saved in begin() and restored in end(). Fields
+    listed in typed_fields, and values containing control characters, fall
+    back to typed input because they need real keystrokes.
+    """
+    def __init__(self, key_delay: float = 0.05, field_delay: float = 0.2,
+                 paste_delay: float = 0.02, typed_fields: Optional[Iterable[str]] = None):
+        super().__init__(key_delay, field_delay)
+        self.paste_delay = paste_delay
+        self.typed_fields = frozenset(DEFAULT_TYPED_FIELDS if typed_fields is None else typed_fields)
+        self._saved_clipboard: Optional[str] = None
+
+    def apply_timing(self, timing):
+        super().apply_timing(timing)
+        self.paste_delay = timing.paste_delay
+
+    def begin(self):
+        try:
+            self._saved_clipboard = self._get_clipboard()
+        except Exception as e:
+            logging.warning(f"Could not read clipboard: {str(e)}")
+            self._saved_clipboard = None
+
+    def end(self):
+        if self._saved_clipboard is None:
+            return
+        try:
+            self._set_clipboard(self._saved_clipboard)
+        except Exception as e:
+            logging.warning(f"Could not restore clipboard: {str(e)}")
+        finally:
+            self._saved_clipboard = None
+
+    def needs_typing(self, field_type: str, value: str) -> bool:
+        """Return True if the value must be typed instead of pasted"""
+        return field_type in self.typed_fields or not value.isprintable()
+
+    def inject(self, field_type: str, value: str, offset: int = 0):
+        if self.needs_typing(field_type, value):
+            super().inject(field_type, value, offset)
+            return
+        try:
+            if offset < len(value):
+                self._set_clipboard(value)
+                if offset:
+                    # An earlier paste may have landed; replace instead of appending
+                    self._hotkey(*SELECT_ALL_HOTKEY)
+                self._hotkey(*PASTE_HOTKEY)
+        except Exception as e:
+            # A paste is all or nothing as far as we can tell; flag any retry
+            # with a non-zero offset so it selects and replaces the field
+            raise InjectionError(field_type, min(1, len(value)), str(e)) from e
+        try:
+            self._sleep(self.paste_delay)
+            self._press('tab')
+        except Exception as e:
+            raise InjectionError(field_type, len(value), str(e)) from e
+
+    def _get_clipboard(self) -> str:
+        return pyperclip.paste()
+
+    def _set_clipboard(self, text: str):
+        pyperclip.copy(text)
+
+class RecordingInjector(ClipboardInjector):
+    """In-memory backend that records input instead of sending it to the desktop.
+
+    It runs the same typing or paste logic as the real injectors (paste=False
+    types everything) and keeps the resulting form contents in `fields`, so
+    fills can be exercised and benchmarked headless. fail(n) makes the next
+    n primitive calls raise, to exercise retries.
+    """
+    def __init__(self, paste: bool = True, typed_fields: Optional[Iterable[str]] = None):
+        super().__init__(key_delay=0.0, field_delay=0.0, paste_delay=0.0, typed_fields=typed_fields)
+        self.paste = paste
+        self.events: List[Tuple[str, ...]] = []
+        self.fields: List[str] = ['']
+        self.clipboard = ''
+        self._failures = 0
+
+    def fail(self, times: int = 1):
+        self._failures = times
+
+    def needs_typing(self, field_type: str, value: str) -> bool:
+        return not self.paste or super().needs_typing(field_type, value)
+
+    def _check_failure(self):
+        if self._failures:
+            self._failures -= 1
+            raise RuntimeError("Simulated input failure")
+
+    def _type_char(self, char: str):
+        self._check_failure()
+        self.fields[-1] += char
+        self.events.append(('type', char))
+
+    def _press(self, key: str):
+        self._check_failure()
+        if key == 'tab':
+            self.fields.append('')
+        self.events.append(('press', key))
+
+    def _hotkey(self, *keys: str):
+        self._check_failure()
+        if keys == SELECT_ALL_HOTKEY:
+            self.fields[-1] = ''
+        elif keys == PASTE_HOTKEY:
+            self.fields[-1] += self.clipboard
+        self.events.append(('hotkey',) + keys)
+
+    def _sleep(self, seconds: float):
+        pass
+
+    def _get_clipboard(self) -> str:
+        return self.clipboard
+
+    def _set_clipboard(self, text: str):
+        self.clipboard = text
+
+    @property
+    def filled(self) -> List[str]:
+        """Values entered into each field the injector tabbed out of"""
+        return self.fields[:-1]
+
+def active_window_title() -> str:
+    """Title of the focused window, used to key learned timings per target"""
+    try:
+        return pyautogui.getActiveWindowTitle() or "default"
+    except Exception:
+        # Only supported on Windows
+        return "default"
+
+def create_injector(config: dict) -> TypingInjector:
+    """Build the injector selected by config['injection_mode']"""
+    mode = config.get("injection_mode", "paste")
+    if mode == "type":
+        return TypingInjector(config["key_delay"], config["field_delay"])
+    if mode == "paste":
+        return ClipboardInjector(
+            config["key_delay"],
+            config["field_delay"],
+            paste_delay=config.get("paste_delay", 0.02),
+            typed_fields=config.get("typed_fields")
+        )
+    raise ValueError(f"Unknown injection mode: {mode}")
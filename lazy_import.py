@@ -0,0 +1,29 @@
+import importlib
+import types
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is only imported on first attribute access"""
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for `name` whose import is deferred until it is used"""
+    return LazyModule(name)
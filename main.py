@@ -1,13 +1,30 @@
+import time
+STARTUP_BEGIN = time.perf_counter()  # Cold start is measured from here
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
-import pyautogui
-import keyboard
-import time
 import os
+import argparse
+import atexit
 import logging
 from datetime import datetime
-import re
+from injection import create_injector, active_window_title
+from pacing import create_pacer
+from retry import RetryPolicy
+from fill_pipeline import build_fill_plan, FillExecutor
+from utils.state_manager import StateManager
+from utils.validator import DataValidator
+from field_mapping import FieldMappingRegistry, DEFAULT_FIELD_VARIATIONS
+from fill_worker import FillWorker
+from virtual_list import VirtualFieldList
+from profile_repository import ProfileRepository
+from profile_store import create_profile_store
+from lazy_import import lazy_import
+import startup_profile
+
+# Hooking the keyboard is deferred until the hotkey is registered
+keyboard = lazy_import("keyboard")
 
 class FormAutofiller:
     def __init__(self, root):
@@ -23,20 +40,47 @@ class FormAutofiller:
             "field_delay": 0.2,  # Delay between fields
             "key_delay": 0.05,   # Delay between keystrokes
             "retry_attempts": 3,  # Number of retry attempts for failed fields
-            "hotkey": "ctrl+space"
+            "retry_base_delay": 0.05,  # First retry backoff, doubled per attempt
+            "retry_max_delay": 1.0,  # Backoff cap
+            "retry_jitter": 0.5,  # Fraction of each backoff randomized away
+            "fill_deadline": 30.0,  # Wall-time budget for one fill (seconds)
+            "circuit_breaker_threshold": 3,  # Consecutive failed fields before aborting
+            "hotkey": "ctrl+space",
+            "injection_mode": "paste",  # "paste" (clipboard) or "type" (keystrokes)
+            "paste_delay": 0.02,  # Settle time after each paste
+            "min_field_delay": 0.02,  # Adaptive timing never waits less between fields
+            "typed_fields": ["expiry_date", "cvv"],  # Always typed in paste mode
+            "on_busy": "cancel",  # Hotkey during a fill: "cancel" it or "queue" another
+            "timing_mode": "adaptive",  # "adaptive" learns per-window delays, "fixed" always waits
+            "profile_store": "sqlite"  # "sqlite" (profiles/profiles.db) or "json" (one file per profile)
         }
         
+        # Persistent app state (learned fill timings live here)
+        self.state_manager = StateManager(write_behind=True)
+        
         # Load or create default profiles
         self.profiles_dir = "profiles"
-        os.makedirs(self.profiles_dir, exist_ok=True)
+        self.profile_repository = ProfileRepository(create_profile_store(self.config, self.profiles_dir))
+        # Phone and address parses are memoized in the data dir so repeat saves skip them;
+        # kept out of profiles_dir, where every .json file is taken for a profile
+        cache_dir = os.path.join(os.path.dirname(self.state_manager.state_file), "cache")
+        self.validator = DataValidator(cache_dir=cache_dir)
+        atexit.register(self.validator.save_caches)
         self.current_profile = "default"
         self.load_profile()
         
         self.create_gui()
-        self.setup_hotkey()
         
-        # Initialize custom field mappings
-        self.custom_mappings = self.load_custom_mappings()
+        # Build the field mapping index once; custom mappings refresh incrementally
+        self.field_registry = FieldMappingRegistry.from_variations(DEFAULT_FIELD_VARIATIONS)
+        self.load_custom_mappings()
+        
+        # Fills run on a worker thread; its events are pumped on the Tk thread
+        self.fill_worker = FillWorker(self.autofill_form, on_busy=self.config["on_busy"])
+        self.fill_worker.subscribe("started", lambda job, _: self.show_status("Auto-filling form..."))
+        self.fill_worker.subscribe("finished", self.on_fill_finished)
+        self.root.after(50, self.pump_fill_events)
+        self.setup_hotkey()
     
     def setup_logging(self):
         log_dir = "logs"
@@ -51,18 +95,17 @@ class FormAutofiller:
         self.logger = logging.getLogger(__name__)
     
     def load_custom_mappings(self):
-        mappings_file = "field_mappings.json"
-        if os.path.exists(mappings_file):
-            with open(mappings_file, 'r') as f:
-                return json.load(f)
-        return {}
+        """Apply field_mappings.json to the registry if it changed on disk"""
+        try:
+            if self.field_registry.load_custom_mappings("field_mappings.json"):
+                self.logger.info("Custom field mappings reloaded")
+        except Exception as e:
+            self.logger.error(f"Failed to load custom field mappings: {str(e)}")
     
     def load_profile(self):
-        profile_path = os.path.join(self.profiles_dir, f"{self.current_profile}.json")
-        if os.path.exists(profile_path):
-            with open(profile_path, 'r') as f:
-                self.profile = json.load(f)
-        else:
+        # Recently used profiles come from the repository's cache
+        self.profile = self.profile_repository.load(self.current_profile)
+        if self.profile is None:
             self.profile = {
                 "personal": {
                     "first_name": "Vincent",
@@ -75,7 +118,7 @@ class FormAutofiller:
                     "state": "Texas",
                     "zip": "78213",
                     "ssn": "643-22-4250",
-                    "dob": "01.09.1991 (09.01.1991)",
+                    "dob": "09/01/1991",
                     "company": "",
                     "job_title": "",
                     "website": "",
@@ -120,49 +163,38 @@ class FormAutofiller:
                 }
             }
     
-    def save_profile(self):
-        profile_path = os.path.join(self.profiles_dir, f"{self.current_profile}.json")
-        with open(profile_path, 'w') as f:
-            json.dump(self.profile, f, indent=4)
+    def save_profile(self, changes=None):
+        # Profiles already stored only get their changed fields written
+        if changes is not None and self.profile_repository.exists(self.current_profile):
+            self.profile_repository.update_fields(self.current_profile, changes)
+        else:
+            self.profile_repository.save(self.current_profile, self.profile)
         self.logger.info(f"Profile '{self.current_profile}' saved successfully")
         self.show_status("Profile saved successfully!")
     
     def validate_field(self, field_type, value):
         """Validate field values based on their type"""
-        validations = {
-            'email': lambda x: re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', x) is not None,
-            'phone': lambda x: re.match(r'^\+?1?\d{9,15}$', x) is not None,
-            'zip': lambda x: re.match(r'^\d{5}(-\d{4})?$', x) is not None,
-            'ssn': lambda x: re.match(r'^\d{3}-\d{2}-\d{4}$', x) is not None,
-            'dob': lambda x: re.match(r'^\d{2}/\d{2}/\d{4}$', x) is not None
-        }
-        
-        if field_type in validations:
-            return validations[field_type](value)
-        return True
+        return self.validator.validate_field(field_type, value)[0]
     
     def create_gui(self):
         # Create notebook for tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
         
-        # Create tabs
-        self.personal_tab = self.create_scrollable_frame("Personal Information")
-        self.payment_tab = self.create_scrollable_frame("Payment Information")
-        self.preferences_tab = self.create_scrollable_frame("Preferences")
+        # Tabs are empty until first selected; builders fill them in on demand
+        self.tab_builders = {}
+        self.section_views = {}
+        self.pending_edits = {}
+        for section, title in [("personal", "Personal"), ("payment", "Payment"), ("preferences", "Preferences")]:
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=title)
+            self.tab_builders[str(tab)] = lambda tab=tab, section=section: self.create_section_fields(tab, section)
         self.settings_tab = self.create_scrollable_frame("Settings")
-        
-        # Add tabs to notebook
-        self.notebook.add(self.personal_tab, text="Personal")
-        self.notebook.add(self.payment_tab, text="Payment")
-        self.notebook.add(self.preferences_tab, text="Preferences")
         self.notebook.add(self.settings_tab, text="Settings")
+        self.tab_builders[str(self.settings_tab)] = self.create_settings_fields
         
-        # Create entry fields for each tab
-        self.create_personal_fields()
-        self.create_payment_fields()
-        self.create_preference_fields()
-        self.create_settings_fields()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.on_tab_changed()
         
         # Profile management
         profile_frame = ttk.Frame(self.root)
@@ -181,6 +213,12 @@ class FormAutofiller:
         self.status_var = tk.StringVar()
         ttk.Label(self.root, textvariable=self.status_var).pack(pady=5)
     
+    def on_tab_changed(self, event=None):
+        """Build the selected tab's widgets the first time it is shown"""
+        builder = self.tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
+    
     def create_scrollable_frame(self, title):
         frame = ttk.Frame(self.notebook)
         canvas = tk.Canvas(frame)
@@ -200,31 +238,19 @@ class FormAutofiller:
         
         return scrollable_frame
     
-    def create_personal_fields(self):
-        self.entries = {}
-        row = 0
-        for field in self.profile["personal"].keys():
-            self.create_labeled_entry(self.personal_tab, field, "personal", row)
-            row += 1
+    def create_section_fields(self, parent, section):
+        """Virtualized editor for one profile section; only visible rows get widgets"""
+        view = VirtualFieldList(parent, on_edit=lambda field, value: self.record_edit(section, field, value))
+        view.pack(fill='both', expand=True)
+        view.set_source(self.profile[section], lambda field: self.field_value(section, field))
+        self.section_views[section] = view
     
-    def create_payment_fields(self):
-        row = 0
-        for field in self.profile["payment"].keys():
-            self.create_labeled_entry(self.payment_tab, field, "payment", row)
-            row += 1
+    def record_edit(self, section, field, value):
+        self.pending_edits[(section, field)] = value
     
-    def create_preference_fields(self):
-        row = 0
-        for field, value in self.profile["preferences"].items():
-            if isinstance(value, bool):
-                var = tk.BooleanVar(value=value)
-                ttk.Label(self.preferences_tab, text=field.replace("_", " ").title()).grid(row=row, column=0, sticky=tk.W, pady=2, padx=5)
-                chk = ttk.Checkbutton(self.preferences_tab, variable=var)
-                chk.grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
-                self.entries[f"preferences.{field}"] = var
-            else:
-                self.create_labeled_entry(self.preferences_tab, field, "preferences", row)
-            row += 1
+    def field_value(self, section, field):
+        """Value shown in the form: the unsaved edit if there is one, else the profile's"""
+        return self.pending_edits.get((section, field), self.profile[section][field])
     
     def create_settings_fields(self):
         row = 0
@@ -245,22 +271,19 @@ class FormAutofiller:
         self.hotkey_var = tk.StringVar(value=self.config["hotkey"])
         ttk.Entry(self.settings_tab, textvariable=self.hotkey_var).grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
         
+        row += 1
+        # Injection mode setting
+        ttk.Label(self.settings_tab, text="Injection Mode").grid(row=row, column=0, sticky=tk.W, pady=2, padx=5)
+        self.injection_mode_var = tk.StringVar(value=self.config["injection_mode"])
+        ttk.Combobox(self.settings_tab, textvariable=self.injection_mode_var, values=["paste", "type"], state="readonly").grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
+        
         row += 1
         # Save settings button
         ttk.Button(self.settings_tab, text="Save Settings", command=self.save_settings).grid(row=row, column=0, columnspan=2, pady=20)
     
-    def create_labeled_entry(self, parent, field, section, row):
-        label_text = field.replace("_", " ").title()
-        ttk.Label(parent, text=label_text).grid(row=row, column=0, sticky=tk.W, pady=2, padx=5)
-        
-        entry = ttk.Entry(parent, width=40)
-        entry.grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
-        entry.insert(0, self.profile[section][field])
-        self.entries[f"{section}.{field}"] = entry
-    
     def setup_hotkey(self):
         try:
-            keyboard.add_hotkey(self.config["hotkey"], self.autofill_form)
+            keyboard.add_hotkey(self.config["hotkey"], self.request_fill)
             self.logger.info(f"Hotkey {self.config['hotkey']} registered successfully")
         except Exception as e:
             self.logger.error(f"Failed to register hotkey: {str(e)}")
@@ -270,6 +293,7 @@ class FormAutofiller:
         try:
             self.config["field_delay"] = float(self.field_delay_var.get())
             self.config["key_delay"] = float(self.key_delay_var.get())
+            self.config["injection_mode"] = self.injection_mode_var.get()
             new_hotkey = self.hotkey_var.get()
             
             if new_hotkey != self.config["hotkey"]:
@@ -304,132 +328,100 @@ class FormAutofiller:
         self.show_status(f"New profile '{self.current_profile}' created")
     
     def refresh_gui(self):
-        for section in ["personal", "payment"]:
-            for field in self.profile[section]:
-                entry = self.entries.get(f"{section}.{field}")
-                if entry:
-                    entry.delete(0, tk.END)
-                    entry.insert(0, self.profile[section][field])
-        
-        for field, value in self.profile["preferences"].items():
-            entry = self.entries.get(f"preferences.{field}")
-            if entry:
-                if isinstance(value, bool):
-                    entry.set(value)
-                else:
-                    entry.delete(0, tk.END)
-                    entry.insert(0, value)
+        # Unsaved edits belong to the previous profile
+        self.pending_edits = {}
+        # Only tabs built so far have widgets, and they rebind just their visible rows
+        for section, view in self.section_views.items():
+            view.set_source(self.profile[section], lambda field, section=section: self.field_value(section, field))
     
     def save_current_profile(self):
         try:
-            # Validate and save personal information
-            for field in self.profile["personal"]:
-                value = self.entries[f"personal.{field}"].get()
-                if not self.validate_field(field, value):
-                    raise ValueError(f"Invalid {field} format")
-                self.profile["personal"][field] = value
+            # Validate every section, including unsaved edits
+            errors = self.validator.validate_profile({
+                section: {field: self.field_value(section, field) for field in values}
+                for section, values in self.profile.items()
+            })
+            if errors:
+                raise ValueError("; ".join(str(error) for error in errors))
             
-            # Save payment information
-            for field in self.profile["payment"]:
-                self.profile["payment"][field] = self.entries[f"payment.{field}"].get()
+            # Apply the edits; fields never touched already hold their values
+            changes, self.pending_edits = self.pending_edits, {}
+            for (section, field), value in changes.items():
+                self.profile[section][field] = value
             
-            # Save preferences
-            for field in self.profile["preferences"]:
-                entry = self.entries[f"preferences.{field}"]
-                if isinstance(entry, tk.BooleanVar):
-                    self.profile["preferences"][field] = entry.get()
-                else:
-                    self.profile["preferences"][field] = entry.get()
-            
-            self.save_profile()
-            self.logger.info(f"Profile '{self.current_profile}' saved successfully")
+            self.save_profile(changes)
         except Exception as e:
             self.logger.error(f"Failed to save profile: {str(e)}")
             messagebox.showerror("Error", f"Failed to save profile: {str(e)}")
     
-    def autofill_form(self):
-        """Smart form filling function with enhanced field detection and error handling"""
+    def request_fill(self):
+        """Hotkey handler: hand the fill to the worker instead of running it here"""
+        job = self.fill_worker.submit(self.current_profile, self.profile)
+        if job is None:
+            self.logger.info("Form autofill cancelled by hotkey")
+    
+    def pump_fill_events(self):
+        self.fill_worker.drain_events()
+        self.root.after(50, self.pump_fill_events)
+    
+    def on_fill_finished(self, job, _):
+        messages = {"done": "Form filled!", "cancelled": "Form fill cancelled", "failed": "Form fill failed"}
+        self.show_status(messages[job.status])
+        self.logger.info(
+            f"Fill job {job.job_id} {job.status}: {job.fields_filled} fields in "
+            f"{job.duration:.3f}s (queued {job.queue_latency:.3f}s)"
+        )
+    
+    def autofill_form(self, job, progress):
+        """Smart form filling function with enhanced field detection and error handling.
+        
+        Runs on the fill worker thread, so it must not touch Tk widgets.
+        """
         self.logger.info("Starting form autofill")
-        self.show_status("Auto-filling form...")
         time.sleep(0.2)  # Small delay to release hotkey
         
-        # Enhanced field variations
-        field_variations = {
-            'first_name': ['first', 'firstname', 'fname', 'givenname', 'given', 'first-name', 'first_name'],
-            'last_name': ['last', 'lastname', 'lname', 'surname', 'familyname', 'last-name', 'last_name', 'family'],
-            'email': ['email', 'e-mail', 'emailaddress', 'mail', 'email_address', 'e_mail'],
-            'phone': ['phone', 'telephone', 'mobile', 'cell', 'phonenumber', 'phone_number', 'tel'],
-            'address': ['address', 'street', 'streetaddress', 'addr', 'address1', 'street_address'],
-            'city': ['city', 'town', 'municipality'],
-            'state': ['state', 'province', 'region', 'county'],
-            'zip': ['zip', 'zipcode', 'postal', 'postalcode', 'zip_code', 'postal_code'],
-            'ssn': ['ssn', 'social', 'socialsecurity', 'social_security'],
-            'dob': ['dob', 'birthdate', 'dateofbirth', 'birth', 'birth_date', 'date_of_birth'],
-            'company': ['company', 'organization', 'employer', 'business', 'company_name'],
-            'job_title': ['job', 'title', 'position', 'jobtitle', 'job_title', 'role'],
-            'website': ['website', 'site', 'webpage', 'url', 'web', 'homepage'],
-            'linkedin': ['linkedin', 'linkedinurl', 'linkedin_url'],
-            'github': ['github', 'githuburl', 'github_url', 'git'],
-            'country': ['country', 'nation', 'country_name'],
-            'nationality': ['nationality', 'citizenship'],
-            'gender': ['gender', 'sex'],
-            'marital_status': ['marital', 'marital_status', 'marriage'],
-            'driver_license': ['driver', 'license', 'driver_license', 'drivers_license'],
-            'passport': ['passport', 'passport_number'],
-            'emergency_contact': ['emergency', 'emergency_contact', 'ice'],
-            'blood_type': ['blood', 'blood_type', 'bloodtype'],
-            'education': ['education', 'degree', 'qualification'],
-            'skills': ['skills', 'expertise', 'competencies'],
-            'languages': ['languages', 'spoken_languages'],
-            'bio': ['bio', 'about', 'description', 'summary'],
-            'twitter': ['twitter', 'twitter_url', 'twitter_handle'],
-            'facebook': ['facebook', 'facebook_url', 'fb'],
-            'instagram': ['instagram', 'instagram_url', 'ig'],
-            'preferred_name': ['preferred', 'nickname', 'preferred_name'],
-            'middle_name': ['middle', 'middlename', 'middle_name'],
-            'suffix': ['suffix', 'name_suffix'],
-            'title': ['title', 'name_title', 'prefix']
-        }
-
-        # Add custom mappings
-        field_variations.update(self.custom_mappings)
-        
-        def try_fill_field(field_type, value, attempt=0):
-            if not value or attempt >= self.config["retry_attempts"]:
-                return
-            
-            try:
-                pyautogui.write(value, interval=self.config["key_delay"])
-                time.sleep(self.config["field_delay"])
-                pyautogui.press('tab')
-                self.logger.debug(f"Filled field {field_type} with value {value}")
-            except Exception as e:
-                self.logger.error(f"Error filling field {field_type}: {str(e)}")
-                if attempt < self.config["retry_attempts"]:
-                    time.sleep(self.config["field_delay"] * 2)
-                    try_fill_field(field_type, value, attempt + 1)
+        # Pick up edits to field_mappings.json (a single stat when unchanged)
+        self.load_custom_mappings()
         
-        # Try to fill each field
-        for field_type, variations in field_variations.items():
-            section = "personal" if field_type in self.profile["personal"] else "payment"
-            if section == "payment" and field_type not in self.profile["payment"]:
-                continue
-                
-            value = self.profile[section].get(field_type, "")
-            if value:
-                try_fill_field(field_type, value)
-        
-        self.show_status("Form filled!")
+        # Delays start aggressive and back off only for targets that drop input
+        target = active_window_title()
+        executor = FillExecutor(
+            create_injector(self.config),
+            pacer=create_pacer(self.config, self.state_manager),
+            retry_policy=RetryPolicy.from_config(self.config),
+            target=target
+        )
+        plan = build_fill_plan(job.profile, self.field_registry)
+        result = executor.execute(plan, job.cancel_event, progress)
+        if result.failed:
+            self.logger.warning(f"Fields not filled: {', '.join(result.failed)}")
         self.logger.info("Form autofill completed")
     
+    def record_cold_start(self):
+        """Track how long it took from launch until the window became idle"""
+        seconds = time.perf_counter() - STARTUP_BEGIN
+        self.logger.info(f"Cold start took {seconds:.3f}s")
+        startup_profile.record_cold_start(self.state_manager, seconds)
+    
     def show_status(self, message):
         self.status_var.set(message)
         self.root.after(3000, lambda: self.status_var.set(""))
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Form Autofiller Pro")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print an import time report for a cold start and exit")
+    args = parser.parse_args(argv)
+    if args.startup_profile:
+        print(startup_profile.format_report(
+            startup_profile.profile_imports("main", cwd=os.path.dirname(os.path.abspath(__file__)))
+        ))
+        return
+    
     try:
         root = tk.Tk()
         app = FormAutofiller(root)
+        root.after_idle(app.record_cold_start)
         root.mainloop()
     except Exception as e:
         logging.error(f"Application error: {str(e)}")
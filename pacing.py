@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+@dataclass
+class Timing:
+    field_delay: float
+    key_delay: float
+    paste_delay: float
+
+class FixedPacer:
+    """Always use the configured worst-case delays"""
+    def __init__(self, field_delay: float, key_delay: float, paste_delay: float):
+        self.timing = Timing(field_delay, key_delay, paste_delay)
+
+    def timing_for(self, target: str) -> Timing:
+        return self.timing
+
+    def record_success(self, target: str):
+        pass
+
+    def record_failure(self, target: str):
+        pass
+
+    def save(self):
+        pass
+
+class AdaptivePacer:
+    """Learn per-target-window delays, starting aggressive and backing off on failures.
+
+    Each target has a slowdown level between 0 (the floor delays) and 1
+    (the configured worst-case delays). A failed or retried field doubles
+    the level; every successful field decays it. Levels are kept in the
+    state store under state_key so learned timings survive restarts.
+
+    Lagging windows rarely make input fail outright, so delays never go
+    below min_field_delay and paste settle time never below paste_delay:
+    without them the next clipboard write, or restoring the user's
+    clipboard, could race a pending paste.
+    """
+    def __init__(self, max_field_delay: float, max_key_delay: float,
+                 state_manager=None, state_key: str = "pacing",
+                 backoff: float = 2.0, recovery: float = 0.95,
+                 initial_backoff: float = 0.125,
+                 min_field_delay: float = 0.02, paste_delay: float = 0.02):
+        self.max_field_delay = max(max_field_delay, min_field_delay)
+        self.max_key_delay = max_key_delay
+        self.min_field_delay = min_field_delay
+        self.paste_delay = paste_delay
+        self.state_manager = state_manager
+        self.state_key = state_key
+        self.backoff = backoff
+        self.recovery = recovery
+        self.initial_backoff = initial_backoff
+        self.levels: Dict[str, float] = {}
+        if state_manager is not None:
+            self.levels.update(state_manager.get_state_value(state_key, {}) or {})
+        self._dirty = False
+
+    def level(self, target: str) -> float:
+        return self.levels.get(target, 0.0)
+
+    def timing_for(self, target: str) -> Timing:
+        level = self.level(target)
+        field_delay = self.min_field_delay + level * (self.max_field_delay - self.min_field_delay)
+        # Paste settle time backs off within the same worst-case budget
+        return Timing(field_delay, level * self.max_key_delay, max(self.paste_delay, field_delay))
+
+    def record_success(self, target: str):
+        level = self.level(target)
+        if level == 0.0:
+            return
+        level *= self.recovery
+        self.levels[target] = level if level >= 0.01 else 0.0
+        self._dirty = True
+
+    def record_failure(self, target: str):
+        level = self.level(target)
+        self.levels[target] = min(1.0, max(level * self.backoff, self.initial_backoff))
+        self._dirty = True
+
+    def save(self):
+        """Persist learned levels to the state store if they changed"""
+        if self._dirty and self.state_manager is not None:
+            self.state_manager.update_state(self.state_key, dict(self.levels))
+        self._dirty = False
+
+def create_pacer(config: Dict[str, Any], state_manager=None):
+    """Build the pacer selected by config['timing_mode']"""
+    mode = config.get("timing_mode", "adaptive")
+    if mode == "fixed":
+        return FixedPacer(config["field_delay"], config["key_delay"], config.get("paste_delay", 0.02))
+    if mode == "adaptive":
+        return AdaptivePacer(config["field_delay"], config["key_delay"], state_manager=state_manager,
+                             min_field_delay=config.get("min_field_delay", 0.02),
+                             paste_delay=config.get("paste_delay", 0.02))
+    raise ValueError(f"Unknown timing mode: {mode}")
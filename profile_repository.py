@@ -0,0 +1,182 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from profile_store import ProfileStore, JsonProfileStore, FieldChanges
+from exceptions import ProfileError
+
+@dataclass
+class CachedProfile:
+    stamp: Any  # The store's change token when the profile was read
+    checked_at: float
+    stored: Dict[str, Any]
+    decrypted: Optional[Dict[str, Any]] = None
+
+def copy_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a profile down to its sections, which is as deep as profiles go"""
+    return {section: dict(values) if isinstance(values, dict) else values
+            for section, values in profile.items()}
+
+class ProfileRepository:
+    """A ProfileStore behind an LRU cache of parsed profiles.
+
+    Each entry keeps the stored form and, when a security manager is given,
+    the decrypted form, which is only computed on first use. An entry is
+    trusted without touching the store for revalidate_interval seconds
+    after it was last checked; after that the store's stamp tells whether
+    the profile changed underneath us. Saves that change nothing are skipped.
+    """
+    def __init__(self, store: Optional[ProfileStore] = None, security_manager=None,
+                 cache_size: int = 32, revalidate_interval: float = 1.0):
+        self.store = store or JsonProfileStore()
+        self.security_manager = security_manager
+        self.cache_size = cache_size
+        self.revalidate_interval = revalidate_interval
+        self._cache: 'OrderedDict[str, CachedProfile]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the decrypted profile, or None if it does not exist"""
+        with self._lock:
+            entry = self._entry(name)
+            if entry is None:
+                return None
+            if entry.decrypted is None:
+                entry.decrypted = self._decrypt(entry.stored)
+            return copy_profile(entry.decrypted)
+
+    def save(self, name: str, profile: Dict[str, Any]) -> bool:
+        """Write the profile if it differs from what is stored; return True if written"""
+        decrypted = copy_profile(profile)
+        with self._lock:
+            entry = self._entry(name)
+            if entry is not None and entry.decrypted is not None and entry.decrypted == decrypted:
+                return False
+            stored = self._encrypt(decrypted)
+            if entry is not None and entry.stored == stored:
+                entry.decrypted = decrypted
+                return False
+            stamp = self.store.save(name, stored)
+            self._remember(name, CachedProfile(stamp, time.monotonic(), stored, decrypted))
+            return True
+
+    def update_fields(self, name: str, changes: FieldChanges):
+        """Change individual fields of an existing profile without rewriting the rest"""
+        if not changes:
+            return
+        if getattr(self.security_manager, "envelope", False):
+            # Sensitive fields share one envelope token, so rewrite the profile
+            profile = self.load(name)
+            if profile is None:
+                raise ProfileError(f"Profile '{name}' does not exist")
+            for (section, field), value in changes.items():
+                profile.setdefault(section, {})[field] = value
+            self.save(name, profile)
+            return
+        partial: Dict[str, Dict[str, Any]] = {}
+        for (section, field), value in changes.items():
+            partial.setdefault(section, {})[field] = value
+        stored_partial = self._encrypt(partial)
+        with self._lock:
+            stamp = self.store.update_fields(name, {
+                (section, field): value
+                for section, values in stored_partial.items() for field, value in values.items()
+            })
+            entry = self._cache.get(name)
+            if entry is None:
+                return
+            # Patch the cached forms in place of a reload
+            for section, values in stored_partial.items():
+                entry.stored.setdefault(section, {}).update(values)
+            if entry.decrypted is not None:
+                for section, values in partial.items():
+                    entry.decrypted.setdefault(section, {}).update(values)
+            entry.stamp = stamp
+            entry.checked_at = time.monotonic()
+
+    def get_field(self, name: str, section: str, field: str, default: Any = None) -> Any:
+        """One decrypted field value, from the cache when the profile is cached"""
+        with self._lock:
+            if name in self._cache:
+                entry = self._entry(name)
+                if entry is not None:
+                    if entry.decrypted is None:
+                        entry.decrypted = self._decrypt(entry.stored)
+                    return entry.decrypted.get(section, {}).get(field, default)
+        value = self.store.get_field(name, section, field, default)
+        if value is default:
+            return default
+        return self._decrypt({section: {field: value}})[section][field]
+
+    def reencrypt(self, name: str) -> bool:
+        """Rewrite a profile under the security manager's current key; return True if rewritten"""
+        if self.security_manager is None:
+            return False
+        with self._lock:
+            entry = self._entry(name)
+            if entry is None:
+                return False
+            stored = self.security_manager.rotate_profile(entry.stored)
+            if stored == entry.stored:
+                return False
+            entry.stamp = self.store.save(name, stored)
+            entry.stored = stored
+            entry.checked_at = time.monotonic()
+            return True
+
+    def delete(self, name: str):
+        with self._lock:
+            self._cache.pop(name, None)
+            self.store.delete(name)
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            return self._entry(name) is not None
+
+    def list_profiles(self, prefix: str = "") -> List[str]:
+        return self.store.list_profiles(prefix)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one cached profile, or all of them"""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(name, None)
+
+    def _entry(self, name: str) -> Optional[CachedProfile]:
+        entry = self._cache.get(name)
+        now = time.monotonic()
+        if entry is not None:
+            self._cache.move_to_end(name)
+            if now - entry.checked_at < self.revalidate_interval:
+                return entry
+            if self.store.stamp(name) == entry.stamp:
+                entry.checked_at = now
+                return entry
+            # Changed or removed since we cached it
+            del self._cache[name]
+
+        stored, stamp = self.store.load(name)
+        if stored is None:
+            return None
+        entry = CachedProfile(stamp, now, stored)
+        self._remember(name, entry)
+        return entry
+
+    def _remember(self, name: str, entry: CachedProfile):
+        self._cache[name] = entry
+        self._cache.move_to_end(name)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _encrypt(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        if self.security_manager is None:
+            return profile
+        return self.security_manager.encrypt_profile(copy_profile(profile))
+
+    def _decrypt(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        if self.security_manager is None:
+            return profile
+        return self.security_manager.decrypt_profile(copy_profile(profile))
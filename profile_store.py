@@ -0,0 +1,331 @@
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from exceptions import ProfileError
+
+# (section, field) -> value
+FieldChanges = Dict[Tuple[str, str], Any]
+
+class ProfileStore(ABC):
+    """Where profiles live. Profiles are {section: {field: value}} dicts.
+
+    stamp(name) returns a cheap token that changes whenever the stored
+    profile changes (None if it does not exist), so callers can cache
+    loaded profiles and revalidate them without reading them again.
+    """
+    @abstractmethod
+    def load(self, name: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Return (profile, stamp), or (None, None) if there is no such profile"""
+        pass
+
+    @abstractmethod
+    def save(self, name: str, profile: Dict[str, Any]) -> Any:
+        """Replace the profile; returns its new stamp"""
+        pass
+
+    @abstractmethod
+    def update_fields(self, name: str, changes: FieldChanges) -> Any:
+        """Set individual fields of an existing profile; returns its new stamp"""
+        pass
+
+    def get_field(self, name: str, section: str, field: str, default: Any = None) -> Any:
+        profile, _ = self.load(name)
+        if profile is None:
+            return default
+        return profile.get(section, {}).get(field, default)
+
+    @abstractmethod
+    def delete(self, name: str):
+        pass
+
+    @abstractmethod
+    def stamp(self, name: str) -> Any:
+        pass
+
+    @abstractmethod
+    def list_profiles(self, prefix: str = "") -> List[str]:
+        pass
+
+    def close(self):
+        pass
+
+class JsonProfileStore(ProfileStore):
+    """One compact JSON file per profile in profiles_dir, written atomically"""
+    def __init__(self, profiles_dir: str = "profiles"):
+        self.profiles_dir = profiles_dir
+        os.makedirs(profiles_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.profiles_dir, f"{name}.json")
+
+    def load(self, name: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+        try:
+            with open(self.path(name), 'r') as f:
+                stat = os.fstat(f.fileno())
+                text = f.read()
+        except FileNotFoundError:
+            return None, None
+        try:
+            return json.loads(text), (stat.st_mtime_ns, stat.st_size)
+        except ValueError as e:
+            raise ProfileError(f"Profile '{name}' is corrupt: {str(e)}") from e
+
+    def save(self, name: str, profile: Dict[str, Any]) -> Any:
+        path = self.path(name)
+        fd, tmp_path = tempfile.mkstemp(dir=self.profiles_dir, prefix=".profile-", suffix=".tmp")
+        try:
+            # Readers never see a partially written profile
+            with os.fdopen(fd, 'w') as f:
+                json.dump(profile, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return self.stamp(name)
+
+    def update_fields(self, name: str, changes: FieldChanges) -> Any:
+        profile, _ = self.load(name)
+        if profile is None:
+            raise ProfileError(f"Profile '{name}' does not exist")
+        for (section, field), value in changes.items():
+            profile.setdefault(section, {})[field] = value
+        return self.save(name, profile)
+
+    def delete(self, name: str):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def stamp(self, name: str) -> Any:
+        try:
+            stat = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def list_profiles(self, prefix: str = "") -> List[str]:
+        return sorted(
+            f[:-len(".json")] for f in os.listdir(self.profiles_dir)
+            if f.endswith(".json") and f.startswith(prefix)
+        )
+
+class SQLiteProfileStore(ProfileStore):
+    """All profiles in one SQLite database, one row per field.
+
+    Profile names and (section, field) keys are indexed, so listing,
+    single-field lookups and partial updates never scan other profiles.
+    Values are stored JSON-encoded to keep booleans and numbers intact.
+    The database runs in WAL mode so reads do not block on a writer.
+    Stamps come from one counter for the whole store, so a profile that is
+    deleted and created again never gets a stamp it had before.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS profile_fields (
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            section TEXT NOT NULL,
+            field TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (profile_id, section, field)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_profile_fields_key ON profile_fields (section, field);
+        CREATE TABLE IF NOT EXISTS store_clock (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO store_clock (id, value) SELECT 0, COALESCE(MAX(version), 0) FROM profiles;
+    """
+
+    def __init__(self, db_path: str = "profiles/profiles.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def _profile_row(self, name: str) -> Optional[Tuple[int, int]]:
+        return self._conn.execute("SELECT id, version FROM profiles WHERE name = ?", (name,)).fetchone()
+
+    def load(self, name: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+        with self._transaction():
+            row = self._profile_row(name)
+            if row is None:
+                return None, None
+            profile_id, version = row
+            rows = self._conn.execute(
+                "SELECT section, field, value FROM profile_fields WHERE profile_id = ? ORDER BY position",
+                (profile_id,)
+            ).fetchall()
+        profile: Dict[str, Any] = {}
+        for section, field, value in rows:
+            profile.setdefault(section, {})[field] = json.loads(value)
+        return profile, version
+
+    def save(self, name: str, profile: Dict[str, Any]) -> Any:
+        with self._transaction():
+            profile_id, version = self._touch(name)
+            self._conn.execute("DELETE FROM profile_fields WHERE profile_id = ?", (profile_id,))
+            self._conn.executemany(
+                "INSERT INTO profile_fields (profile_id, section, field, position, value) VALUES (?, ?, ?, ?, ?)",
+                self._field_rows(profile_id, profile)
+            )
+            return version
+
+    def update_fields(self, name: str, changes: FieldChanges) -> Any:
+        with self._transaction():
+            row = self._profile_row(name)
+            if row is None:
+                raise ProfileError(f"Profile '{name}' does not exist")
+            profile_id, version = self._touch(name)
+            for (section, field), value in changes.items():
+                encoded = json.dumps(value)
+                updated = self._conn.execute(
+                    "UPDATE profile_fields SET value = ? WHERE profile_id = ? AND section = ? AND field = ?",
+                    (encoded, profile_id, section, field)
+                ).rowcount
+                if not updated:
+                    # New fields go after the existing ones
+                    self._conn.execute(
+                        "INSERT INTO profile_fields (profile_id, section, field, position, value) "
+                        "SELECT ?, ?, ?, COALESCE(MAX(position), -1) + 1, ? FROM profile_fields WHERE profile_id = ?",
+                        (profile_id, section, field, encoded, profile_id)
+                    )
+            return version
+
+    def get_field(self, name: str, section: str, field: str, default: Any = None) -> Any:
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT f.value FROM profile_fields f JOIN profiles p ON p.id = f.profile_id "
+                "WHERE p.name = ? AND f.section = ? AND f.field = ?",
+                (name, section, field)
+            ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def delete(self, name: str):
+        with self._transaction():
+            self._conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+
+    def stamp(self, name: str) -> Any:
+        with self._lock:
+            row = self._profile_row(name)
+        return None if row is None else row[1]
+
+    def list_profiles(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            if prefix:
+                # A range scan on the name index; LIKE would not use it
+                rows = self._conn.execute(
+                    "SELECT name FROM profiles WHERE name >= ? AND name < ? ORDER BY name",
+                    (prefix, prefix + "\U0010ffff")
+                )
+            else:
+                rows = self._conn.execute("SELECT name FROM profiles ORDER BY name")
+            return [name for name, in rows]
+
+    def import_json(self, profiles_dir: str) -> int:
+        """Copy every profiles_dir/<name>.json into the database; returns the number imported"""
+        source = JsonProfileStore(profiles_dir)
+        names = source.list_profiles()
+        with self._transaction():
+            for name in names:
+                profile, _ = source.load(name)
+                profile_id, _ = self._touch(name)
+                self._conn.execute("DELETE FROM profile_fields WHERE profile_id = ?", (profile_id,))
+                self._conn.executemany(
+                    "INSERT INTO profile_fields (profile_id, section, field, position, value) VALUES (?, ?, ?, ?, ?)",
+                    self._field_rows(profile_id, profile)
+                )
+        return len(names)
+
+    def export_json(self, profiles_dir: str) -> int:
+        """Write every profile to profiles_dir/<name>.json; returns the number exported"""
+        target = JsonProfileStore(profiles_dir)
+        names = self.list_profiles()
+        for name in names:
+            profile, _ = self.load(name)
+            target.save(name, profile)
+        return len(names)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _touch(self, name: str) -> Tuple[int, int]:
+        """Create the profile row if needed and give it the next version of the store clock"""
+        now = datetime.now().isoformat()
+        self._conn.execute("UPDATE store_clock SET value = value + 1")
+        version, = self._conn.execute("SELECT value FROM store_clock").fetchone()
+        self._conn.execute(
+            "INSERT INTO profiles (name, version, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at",
+            (name, version, now)
+        )
+        return self._profile_row(name)
+
+    @staticmethod
+    def _field_rows(profile_id: int, profile: Dict[str, Any]) -> Iterable[tuple]:
+        position = 0
+        for section, values in profile.items():
+            for field, value in values.items():
+                yield profile_id, section, field, position, json.dumps(value)
+                position += 1
+
+class _Transaction:
+    """Hold the store lock for one BEGIN ... COMMIT block, rolling back on error"""
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
+
+def create_profile_store(config: Dict[str, Any], profiles_dir: str = "profiles") -> ProfileStore:
+    """Build the backend selected by config['profile_store']"""
+    backend = config.get("profile_store", "sqlite")
+    if backend == "json":
+        return JsonProfileStore(profiles_dir)
+    if backend == "sqlite":
+        db_path = config.get("profile_db", os.path.join(profiles_dir, "profiles.db"))
+        is_new = not os.path.exists(db_path)
+        store = SQLiteProfileStore(db_path)
+        if is_new and os.path.isdir(profiles_dir):
+            # First run on SQLite: bring the existing JSON profiles along
+            store.import_json(profiles_dir)
+        return store
+    raise ValueError(f"Unknown profile store: {backend}")
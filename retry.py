@@ -0,0 +1,94 @@
+import time
+import random
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from exceptions import FillAbortedError
+
+@dataclass
+class RetryPolicy:
+    """Retry settings for filling a form.
+
+    Failed attempts back off exponentially from base_delay up to max_delay,
+    with up to `jitter` of each delay randomized away. deadline bounds the
+    wall time of a whole fill, and breaker_threshold consecutive failed
+    fields abort the fields that remain.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.05
+    max_delay: float = 1.0
+    jitter: float = 0.5
+    deadline: float = 30.0
+    breaker_threshold: int = 3
+
+    @classmethod
+    def from_config(cls, config) -> 'RetryPolicy':
+        """Build a policy from a FormFillerConfig or the FormAutofiller config dict"""
+        values = config if isinstance(config, dict) else vars(config)
+        defaults = cls()
+        return cls(
+            max_attempts=values.get("retry_attempts", defaults.max_attempts),
+            base_delay=values.get("retry_base_delay", defaults.base_delay),
+            max_delay=values.get("retry_max_delay", defaults.max_delay),
+            jitter=values.get("retry_jitter", defaults.jitter),
+            deadline=values.get("fill_deadline", defaults.deadline),
+            breaker_threshold=values.get("circuit_breaker_threshold", defaults.breaker_threshold)
+        )
+
+    def backoff(self, attempt: int, rng: Callable[[], float] = random.random) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1.0 - self.jitter * rng())
+
+    def start(self, sleep: Callable[[float], Any] = time.sleep,
+              clock: Callable[[], float] = time.monotonic) -> 'RetrySession':
+        """Begin a fill governed by this policy"""
+        return RetrySession(self, sleep, clock)
+
+class RetrySession:
+    """Retry state for one fill: the deadline budget and the circuit breaker"""
+    def __init__(self, policy: RetryPolicy, sleep: Callable[[float], Any], clock: Callable[[], float]):
+        self.policy = policy
+        self.sleep = sleep
+        self.clock = clock
+        self.deadline_at = clock() + policy.deadline
+        self.consecutive_failures = 0
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.deadline_at - self.clock())
+
+    def check(self):
+        """Raise FillAbortedError if the fill should not continue"""
+        if self.consecutive_failures >= self.policy.breaker_threshold:
+            raise FillAbortedError(
+                f"Aborting fill after {self.consecutive_failures} consecutive failed fields"
+            )
+        if self.remaining <= 0:
+            raise FillAbortedError(f"Fill exceeded its {self.policy.deadline}s deadline")
+
+    def run(self, operation: Callable[[], Any],
+            on_retry: Optional[Callable[[int, Exception], Any]] = None) -> bool:
+        """Call operation until it succeeds or attempts run out; return True on success.
+
+        Retries are iterative with exponential backoff and never sleep past
+        the fill deadline. on_retry(attempt, error) runs before each retry.
+        """
+        for attempt in range(self.policy.max_attempts):
+            self.check()
+            try:
+                operation()
+            except FillAbortedError:
+                raise
+            except Exception as e:
+                logging.error(f"Attempt {attempt + 1} failed: {str(e)}")
+                if attempt + 1 >= self.policy.max_attempts:
+                    break
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                self.sleep(min(self.policy.backoff(attempt), self.remaining))
+                continue
+            self.consecutive_failures = 0
+            return True
+        self.consecutive_failures += 1
+        return False
@@ -0,0 +1,100 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+OPERATIONS = ("encrypt", "decrypt", "rotate")
+
+NamedProfile = Tuple[str, Dict[str, Any]]
+
+@dataclass
+class BulkProgress:
+    done: int = 0
+    failed: int = 0
+    started_at: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Profiles per second so far"""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+# The worker process's copy of the security manager, set by _init_worker
+_worker_manager = None
+
+def _init_worker(security_manager):
+    global _worker_manager
+    _worker_manager = security_manager
+
+def _run_batch(operation: str, batch: List[NamedProfile], security_manager=None) -> List[Tuple[str, Any]]:
+    """Apply one operation to a batch; failures come back as the exception in place of the profile"""
+    manager = security_manager or _worker_manager
+    apply = {"encrypt": manager.encrypt_profile,
+             "decrypt": manager.decrypt_profile,
+             "rotate": manager.rotate_profile}[operation]
+    results = []
+    for name, profile in batch:
+        try:
+            results.append((name, apply(profile)))
+        except Exception as e:
+            results.append((name, e))
+    return results
+
+def bulk_process(security_manager, profiles: Iterable[NamedProfile], operation: str = "encrypt",
+                 workers: Optional[int] = None, batch_size: int = 64, max_in_flight: Optional[int] = None,
+                 use_processes: bool = False,
+                 on_progress: Optional[Callable[[BulkProgress], None]] = None) -> Iterator[Tuple[str, Any]]:
+    """Encrypt, decrypt or rotate (name, profile) pairs in parallel, yielding results in input order.
+
+    profiles is consumed lazily: at most max_in_flight batches (twice the
+    worker count by default) are read ahead, so memory stays bounded however
+    many profiles there are. Threads are used by default since the
+    cryptography backend releases the GIL; use_processes fans batches out to
+    a process pool that gets a copy of the key material instead. A profile
+    that fails yields its exception instead of a result. on_progress is
+    called after every batch.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown bulk operation: {operation}")
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    progress = BulkProgress(started_at=time.perf_counter())
+    source = iter(profiles)
+
+    if use_processes:
+        executor: Executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(security_manager,))
+        submit = lambda batch: executor.submit(_run_batch, operation, batch)
+    else:
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="bulk-crypto")
+        submit = lambda batch: executor.submit(_run_batch, operation, batch, security_manager)
+
+    in_flight: Deque = deque()
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                batch = list(islice(source, batch_size))
+                if not batch:
+                    break
+                in_flight.append(submit(batch))
+            if not in_flight:
+                break
+            results = in_flight.popleft().result()
+            for name, result in results:
+                if isinstance(result, Exception):
+                    progress.failed += 1
+                else:
+                    progress.done += 1
+                yield name, result
+            if on_progress is not None:
+                on_progress(progress)
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -1,86 +1,334 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from collections.abc import Mapping
+from datetime import datetime, timedelta
 import base64
+import hashlib
 import os
 import json
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Iterator, List, Tuple
+from exceptions import SecurityError
+
+SENSITIVE_FIELDS = {
+    'personal': ['ssn', 'passport', 'driver_license'],
+    'payment': ['card_number', 'cvv']
+}
+
+# Profiles in envelope mode keep their sensitive fields in one token under this key
+ENVELOPE_KEY = "__sealed__"
+
+# Fernet tokens start with the version byte 0x80; older releases wrapped them in base64 once more
+TOKEN_PREFIX = "gAAAAA"
+LEGACY_TOKEN_PREFIX = "Z0FBQUFB"
+
+DEFAULT_KDF_ITERATIONS = 600_000
+
+# Derived keys for this session, keyed by (passphrase digest, salt, iterations)
+_derived_keys: Dict[Tuple[bytes, bytes, int], bytes] = {}
+_derived_keys_lock = threading.Lock()
+
+def derive_key(passphrase: str, salt: bytes, iterations: int = DEFAULT_KDF_ITERATIONS) -> bytes:
+    """Fernet key from a passphrase via PBKDF2-HMAC-SHA256, computed once per session"""
+    cache_key = (hashlib.sha256(passphrase.encode()).digest(), salt, iterations)
+    with _derived_keys_lock:
+        key = _derived_keys.get(cache_key)
+        if key is None:
+            kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
+            key = base64.urlsafe_b64encode(kdf.derive(passphrase.encode()))
+            _derived_keys[cache_key] = key
+        return key
 
 class SecurityManager:
-    def __init__(self, key_file: str = "security/master.key"):
+    """Encrypts sensitive profile fields with a ring of Fernet keys.
+
+    The newest key encrypts, and every key in the ring can decrypt. Without a
+    passphrase the first key lives in key_file. With one, keys are derived
+    by PBKDF2 from the passphrase and a per-key salt, and only the salts are
+    stored. Rotated keys and their creation dates are kept in the keyring
+    file next to key_file, and rotation_due() honours key_rotation_days.
+    """
+    def __init__(self, key_file: str = "security/master.key", envelope: bool = False,
+                 passphrase: Optional[str] = None, kdf_iterations: int = DEFAULT_KDF_ITERATIONS,
+                 key_rotation_days: int = 90):
         self.key_file = key_file
-        self.key = self._load_or_create_key()
-        self.fernet = Fernet(self.key)
-        
+        self.keyring_file = os.path.splitext(key_file)[0] + ".keyring.json"
+        self.passphrase = passphrase
+        self.kdf_iterations = kdf_iterations
+        self.key_rotation_days = key_rotation_days
+        self._keyring_lock = threading.Lock()
+        self.keyring = self._load_keyring()
+        self._build_fernet()
+        # Seal all sensitive fields of a profile into a single token
+        self.envelope = envelope
+
     def _load_or_create_key(self) -> bytes:
-        """Load existing key or create a new one"""
+        """Load existing key or create a new one.
+
+        New key files hold the 32 raw key bytes. Key files written by older
+        releases hold the 44-byte URL-safe base64 form Fernet.generate_key()
+        returns; both are read, anything else is refused.
+        """
         try:
             with open(self.key_file, 'rb') as f:
-                return f.read()
+                key = f.read()
         except FileNotFoundError:
-            key = Fernet.generate_key()
+            key = os.urandom(32)
             os.makedirs(os.path.dirname(self.key_file), exist_ok=True)
             with open(self.key_file, 'wb') as f:
                 f.write(key)
+        if len(key) == 32:
+            return base64.urlsafe_b64encode(key)
+        key = key.strip()
+        if len(key) == 44:
             return key
-    
+        raise SecurityError(f"Key file {self.key_file} holds neither a raw nor a base64 Fernet key")
+
+    def _load_keyring(self) -> List[Dict[str, Any]]:
+        """Key entries, newest first"""
+        try:
+            with open(self.keyring_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        if self.passphrase is None:
+            existed = os.path.exists(self.key_file)
+            self._load_or_create_key()
+            created = datetime.fromtimestamp(os.path.getmtime(self.key_file)) if existed else datetime.now()
+            return [{"id": "master", "created": created.isoformat(), "file": True}]
+        keyring = [self._new_entry()]
+        self._save_keyring(keyring)
+        return keyring
+
+    def _new_entry(self) -> Dict[str, Any]:
+        entry = {"id": os.urandom(4).hex(), "created": datetime.now().isoformat()}
+        if self.passphrase is None:
+            entry["key"] = base64.urlsafe_b64encode(os.urandom(32)).decode('ascii')
+        else:
+            entry["salt"] = base64.b64encode(os.urandom(16)).decode('ascii')
+            entry["iterations"] = self.kdf_iterations
+        return entry
+
+    def _save_keyring(self, keyring: List[Dict[str, Any]]):
+        directory = os.path.dirname(self.keyring_file) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".keyring-", suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(keyring, f)
+        os.replace(tmp_path, self.keyring_file)
+
+    def _entry_key(self, entry: Dict[str, Any]) -> bytes:
+        if entry.get("file"):
+            return self._load_or_create_key()
+        if "key" in entry:
+            return entry["key"].encode('ascii')
+        if self.passphrase is None:
+            raise SecurityError(f"Key {entry['id']} is passphrase-derived but no passphrase was given")
+        return derive_key(self.passphrase, base64.b64decode(entry["salt"]), entry["iterations"])
+
+    def _build_fernet(self, keys: Optional[List[bytes]] = None):
+        if keys is None:
+            keys = [self._entry_key(entry) for entry in self.keyring]
+        self._keys = keys
+        self.key = keys[0]
+        self._fernets = [Fernet(key) for key in keys]
+        self.primary = self._fernets[0]
+        # Encrypts with the primary key, decrypts with any key in the ring
+        self.fernet = MultiFernet(self._fernets)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Ship the key material to worker processes, not the passphrase or lock
+        return {k: v for k, v in self.__dict__.items()
+                if k not in ("passphrase", "fernet", "primary", "_fernets", "_keyring_lock")}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.passphrase = None
+        self._keyring_lock = threading.Lock()
+        self._build_fernet(self._keys)
+
+    @property
+    def key_age_days(self) -> float:
+        created = datetime.fromisoformat(self.keyring[0]["created"])
+        return (datetime.now() - created) / timedelta(days=1)
+
+    def rotation_due(self) -> bool:
+        return self.key_rotation_days > 0 and self.key_age_days >= self.key_rotation_days
+
+    def rotate_key(self) -> str:
+        """Make a new primary key; older keys stay in the ring until retired"""
+        with self._keyring_lock:
+            keyring = [self._new_entry()] + self.keyring
+            self._save_keyring(keyring)
+            self.keyring = keyring
+            self._build_fernet()
+            return keyring[0]["id"]
+
+    def retire_old_keys(self):
+        """Drop every key but the primary, once nothing is encrypted with them anymore"""
+        with self._keyring_lock:
+            keyring = self.keyring[:1]
+            self._save_keyring(keyring)
+            self.keyring = keyring
+            self._build_fernet()
+
+    def is_current(self, value: Any) -> bool:
+        """True if value is a token made with the primary key"""
+        if not isinstance(value, str) or not value.startswith(TOKEN_PREFIX):
+            return False
+        try:
+            self.primary.extract_timestamp(value.encode())
+            return True
+        except Exception:
+            return False
+
+    def rotate_value(self, value: Any) -> Any:
+        """Re-encrypt a token under the primary key; other values pass through"""
+        if not self.is_encrypted(value) or self.is_current(value):
+            return value
+        return self.fernet.rotate(self._token_bytes(value)).decode('ascii')
+
+    def rotate_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored profile with every token re-encrypted under the primary key, inputs untouched"""
+        rotated = dict(profile)
+        envelope = profile.get(ENVELOPE_KEY)
+        if isinstance(envelope, dict) and "token" in envelope:
+            rotated[ENVELOPE_KEY] = dict(envelope, token=self.rotate_value(envelope["token"]))
+        for section, fields in SENSITIVE_FIELDS.items():
+            values = profile.get(section)
+            if not isinstance(values, dict):
+                continue
+            for field in fields:
+                value = values.get(field)
+                new_value = self.rotate_value(value)
+                if new_value is not value:
+                    if rotated[section] is values:
+                        rotated[section] = dict(values)
+                    rotated[section][field] = new_value
+        return rotated
+
     def encrypt_value(self, value: str) -> str:
-        """Encrypt a single value"""
+        """Encrypt a single value into a Fernet token (already URL-safe base64)"""
         if not value:
             return value
-        return base64.b64encode(
-            self.fernet.encrypt(value.encode())
-        ).decode('utf-8')
-    
+        return self.fernet.encrypt(value.encode()).decode('ascii')
+
     def decrypt_value(self, encrypted_value: str) -> str:
-        """Decrypt a single value"""
+        """Decrypt a single value; anything that is not a token is returned unchanged"""
         if not encrypted_value:
             return encrypted_value
         try:
-            return self.fernet.decrypt(
-                base64.b64decode(encrypted_value.encode())
-            ).decode('utf-8')
+            return self.fernet.decrypt(self._token_bytes(encrypted_value)).decode('utf-8')
         except Exception:
             return encrypted_value
-    
+
+    def is_encrypted(self, value: Any) -> bool:
+        """True if value is a token made with our key, in the current or legacy format"""
+        if not isinstance(value, str) or not value.startswith((TOKEN_PREFIX, LEGACY_TOKEN_PREFIX)):
+            return False
+        try:
+            token = self._token_bytes(value)
+        except ValueError:
+            return False
+        # Verifies the signature without decrypting; MultiFernet only has
+        # extract_timestamp from cryptography 44, so try each key in turn
+        for fernet in self._fernets:
+            try:
+                fernet.extract_timestamp(token)
+                return True
+            except InvalidToken:
+                continue
+        return False
+
+    def profile_is_current(self, profile: Dict[str, Any]) -> bool:
+        """True if every token in a stored profile was made with the primary key"""
+        envelope = profile.get(ENVELOPE_KEY)
+        values = [envelope.get("token")] if isinstance(envelope, dict) else []
+        for section, fields in SENSITIVE_FIELDS.items():
+            section_values = profile.get(section)
+            if isinstance(section_values, dict):
+                values.extend(section_values.get(field) for field in fields)
+        return all(self.is_current(value) for value in values
+                   if isinstance(value, str) and value.startswith((TOKEN_PREFIX, LEGACY_TOKEN_PREFIX)))
+
+    @staticmethod
+    def _token_bytes(value: str) -> bytes:
+        if value.startswith(LEGACY_TOKEN_PREFIX):
+            return base64.b64decode(value.encode())
+        return value.encode()
+
     def encrypt_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Encrypt sensitive fields in a profile"""
-        sensitive_fields = {
-            'personal': ['ssn', 'passport', 'driver_license'],
-            'payment': ['card_number', 'cvv']
-        }
-        
-        encrypted_profile = profile.copy()
-        
-        for section, fields in sensitive_fields.items():
-            if section in encrypted_profile:
-                for field in fields:
-                    if field in encrypted_profile[section]:
-                        encrypted_profile[section][field] = self.encrypt_value(
-                            encrypted_profile[section][field]
-                        )
-        
+        """Encrypt sensitive fields in a profile.
+
+        The input is left untouched: only the sections that change are
+        copied. Values that are already encrypted are kept as they are.
+        """
+        if self.envelope:
+            return self.seal_profile(profile)
+
+        encrypted_profile = dict(profile)
+        for section, fields in SENSITIVE_FIELDS.items():
+            values = profile.get(section)
+            if not isinstance(values, dict):
+                continue
+            copied = None
+            for field in fields:
+                if field in values and values[field] and not self.is_encrypted(values[field]):
+                    if copied is None:
+                        copied = encrypted_profile[section] = dict(values)
+                    copied[field] = self.encrypt_value(values[field])
+
         return encrypted_profile
-    
+
     def decrypt_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Decrypt sensitive fields in a profile"""
-        sensitive_fields = {
-            'personal': ['ssn', 'passport', 'driver_license'],
-            'payment': ['card_number', 'cvv']
-        }
-        
-        decrypted_profile = profile.copy()
-        
-        for section, fields in sensitive_fields.items():
-            if section in decrypted_profile:
-                for field in fields:
-                    if field in decrypted_profile[section]:
-                        decrypted_profile[section][field] = self.decrypt_value(
-                            decrypted_profile[section][field]
-                        )
-        
+        """Decrypt sensitive fields in a profile, per-field or envelope format"""
+        if ENVELOPE_KEY in profile:
+            return self.open_profile(profile).to_dict()
+
+        decrypted_profile = dict(profile)
+        for section, fields in SENSITIVE_FIELDS.items():
+            values = profile.get(section)
+            if not isinstance(values, dict):
+                continue
+            copied = None
+            for field in fields:
+                if field in values and values[field]:
+                    if copied is None:
+                        copied = decrypted_profile[section] = dict(values)
+                    copied[field] = self.decrypt_value(values[field])
+
         return decrypted_profile
-    
+
+    def seal_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Move every sensitive field into one encrypted envelope.
+
+        The envelope records which sections it holds fields for, so opening
+        the profile only decrypts when one of those sections is read.
+        """
+        if ENVELOPE_KEY in profile:
+            return dict(profile)
+        sealed = dict(profile)
+        secrets: Dict[str, Dict[str, Any]] = {}
+        for section, fields in SENSITIVE_FIELDS.items():
+            values = profile.get(section)
+            if not isinstance(values, dict):
+                continue
+            found = {field: values[field] for field in fields if field in values}
+            if found:
+                secrets[section] = found
+                # Placeholders keep the field order for when the section is opened
+                sealed[section] = {k: None if k in found else v for k, v in values.items()}
+        if secrets:
+            token = self.fernet.encrypt(json.dumps(secrets, separators=(',', ':')).encode())
+            sealed[ENVELOPE_KEY] = {"sections": sorted(secrets), "token": token.decode('ascii')}
+        return sealed
+
+    def open_profile(self, sealed: Dict[str, Any]) -> 'OpenedProfile':
+        """Read-only view of a sealed profile that decrypts on first access to a sealed section"""
+        return OpenedProfile(self, sealed)
+
     def secure_wipe(self, filepath: str) -> bool:
         """Securely wipe a file by overwriting with random data before deletion"""
         try:
@@ -102,3 +350,45 @@ class SecurityManager:
         if not value or len(value) <= show_chars:
             return value
         return '*' * (len(value) - show_chars) + value[-show_chars:]
+
+class OpenedProfile(Mapping):
+    """Lazily decrypted view of a profile sealed by SecurityManager.seal_profile"""
+    def __init__(self, security_manager: SecurityManager, sealed: Dict[str, Any]):
+        self._security_manager = security_manager
+        self._sealed = sealed
+        envelope = sealed.get(ENVELOPE_KEY) or {}
+        self._sealed_sections = frozenset(envelope.get("sections", ()))
+        self._opened: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened is not None
+
+    def _open(self) -> Dict[str, Dict[str, Any]]:
+        if self._opened is None:
+            token = self._sealed[ENVELOPE_KEY]["token"]
+            try:
+                secrets = json.loads(self._security_manager.fernet.decrypt(token.encode()))
+            except InvalidToken as e:
+                raise SecurityError("Profile envelope could not be decrypted") from e
+            self._opened = {
+                section: {k: values.get(k, v) for k, v in self._sealed.get(section, {}).items()}
+                for section, values in secrets.items()
+            }
+        return self._opened
+
+    def __getitem__(self, section: str) -> Any:
+        if section == ENVELOPE_KEY:
+            raise KeyError(section)
+        if section in self._sealed_sections:
+            return self._open()[section]
+        return self._sealed[section]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._sealed if key != ENVELOPE_KEY)
+
+    def __len__(self) -> int:
+        return len(self._sealed) - (ENVELOPE_KEY in self._sealed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {section: self[section] for section in self}
@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+class KeyRotationJob:
+    """Re-encrypts every stored profile under the security manager's primary key.
+
+    Profiles are rewritten in name order, batch_size at a time, and the
+    repository lock is only held for one profile, so fills keep loading
+    profiles while the job runs. After each batch the last finished name is
+    checkpointed in the state manager, so a restarted job resumes where the
+    previous one stopped. Old keys are retired from the keyring only once
+    every stored profile is confirmed to be under the primary key.
+    """
+    def __init__(self, repository, security_manager, state_manager=None,
+                 batch_size: int = 50, pause: float = 0.0, state_key: str = "key_rotation"):
+        self.repository = repository
+        self.security_manager = security_manager
+        self.state_manager = state_manager
+        self.batch_size = batch_size
+        self.pause = pause  # Seconds to yield between batches
+        self.state_key = state_key
+        self.processed = 0
+        self.rewritten = 0
+        self.total = 0
+        self.done = False
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, rotate: bool = False) -> threading.Thread:
+        """Run the job on a daemon thread, making a new key first if rotate is set or rotation is due"""
+        if rotate or (self._checkpoint() is None and self.security_manager.rotation_due()):
+            self.security_manager.rotate_key()
+        self._thread = threading.Thread(target=self.run, name="key-rotation", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if self.done or not self.total else self.processed / self.total
+
+    def run(self) -> bool:
+        """Rewrite all profiles not yet done; return True once the rotation is complete"""
+        key_id = self.security_manager.keyring[0]["id"]
+        checkpoint = self._checkpoint()
+        after = checkpoint["after"] if checkpoint and checkpoint.get("key_id") == key_id else ""
+        names = [name for name in self.repository.list_profiles() if name > after]
+        self.total = len(names)
+        try:
+            for start in range(0, len(names), self.batch_size):
+                if self._cancelled.is_set():
+                    return False
+                batch = names[start:start + self.batch_size]
+                for name in batch:
+                    if self.repository.reencrypt(name):
+                        self.rewritten += 1
+                    self.processed += 1
+                self._save_checkpoint({"key_id": key_id, "after": batch[-1]})
+                if self.pause:
+                    time.sleep(self.pause)
+        except Exception as e:
+            logging.error(f"Key rotation stopped: {str(e)}")
+            return False
+
+        if len(self.security_manager.keyring) > 1:
+            stale = self._stale_profiles()
+            if stale:
+                logging.error(f"Key rotation left {len(stale)} profiles under old keys, keeping them: "
+                              f"{', '.join(stale[:5])}")
+                # Start over on the next run rather than resuming past them
+                self._save_checkpoint(None)
+                return False
+            self.security_manager.retire_old_keys()
+        self._save_checkpoint(None)
+        self.done = True
+        return True
+
+    def _stale_profiles(self) -> List[str]:
+        """Names of stored profiles that still hold tokens made with an older key"""
+        stale = []
+        for name in self.repository.list_profiles():
+            stored, _ = self.repository.store.load(name)
+            if stored is not None and not self.security_manager.profile_is_current(stored):
+                stale.append(name)
+        return stale
+
+    def _checkpoint(self) -> Optional[Dict[str, Any]]:
+        if self.state_manager is None:
+            return None
+        return self.state_manager.get_state_value(self.state_key)
+
+    def _save_checkpoint(self, checkpoint: Optional[Dict[str, Any]]):
+        if self.state_manager is not None:
+            self.state_manager.update_state(self.state_key, checkpoint)
@@ -0,0 +1,60 @@
+import re
+import sys
+import logging
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse the stderr of `python -X importtime` into timings"""
+    timings = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # The report indents nested imports by two spaces per level
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return timings
+
+def profile_imports(module: str = "main", python: str = sys.executable,
+                    cwd: Optional[str] = None) -> List[ImportTiming]:
+    """Import `module` in a fresh interpreter under -X importtime and collect the timings"""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=cwd
+    )
+    if result.returncode != 0:
+        # Timings up to the failing import are still worth reporting
+        logging.warning(f"Importing {module} failed during startup profiling")
+    return parse_importtime(result.stderr)
+
+def format_report(timings: List[ImportTiming], limit: int = 25) -> str:
+    """Slowest imports by cumulative time, as a text table"""
+    total = max((timing.cumulative_us for timing in timings if timing.depth == 0), default=0)
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:limit]:
+        lines.append(
+            f"{timing.cumulative_us / 1000:>14.1f} {timing.self_us / 1000:>9.1f}  "
+            f"{'  ' * timing.depth}{timing.module}"
+        )
+    lines.append(f"Slowest top-level import: {total / 1000:.1f} ms")
+    return "\n".join(lines)
+
+def record_cold_start(state_manager, seconds: float, key: str = "cold_start", keep: int = 20) -> List[dict]:
+    """Append a cold start measurement to the state store, keeping the last `keep`"""
+    history = list(state_manager.get_state_value(key, []) or [])
+    history.append({"timestamp": datetime.now().isoformat(), "seconds": round(seconds, 4)})
+    history = history[-keep:]
+    state_manager.update_state(key, history)
+    state_manager.save_state(force=True)
+    return history
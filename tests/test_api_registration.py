@@ -0,0 +1,109 @@
+import os
+import time
+import asyncio
+import pytest
+
+for module in ("fastapi", "httpx", "sqlalchemy", "aiosqlite", "bcrypt", "slowapi", "bleach"):
+    pytest.importorskip(module)
+
+import bcrypt
+import httpx
+import api
+from database import AsyncDatabase
+from email_service import EmailQueue
+
+SMTP_DELAY = 0.2  # a slow mail server
+
+@pytest.fixture
+def cheap_hashing(monkeypatch):
+    """Minimum bcrypt cost, so timings measure the request path rather than the CPU"""
+    gensalt = bcrypt.gensalt
+    monkeypatch.setattr(bcrypt, "gensalt", lambda rounds=4, prefix=b"2b": gensalt(4, prefix))
+
+def slow_sender(sent):
+    def send(to_email, otp):
+        time.sleep(SMTP_DELAY)
+        sent.append(to_email)
+    return send
+
+def registration(i):
+    return {"username": f"user{i}", "email": f"user{i}@example.com", "password": "StrongPassword123!"}
+
+@pytest.fixture
+def sent(temp_dir, monkeypatch):
+    """Emails delivered by a fake mail server; the app gets a temporary database and no rate limit"""
+    sent = []
+    monkeypatch.setattr(api.limiter, "enabled", False)
+    monkeypatch.setattr(api, "_hash_slots", None)
+    monkeypatch.setattr(api, "database", AsyncDatabase(f"sqlite+aiosqlite:///{os.path.join(temp_dir, 'users.db')}"))
+    monkeypatch.setattr(api, "email_queue", EmailQueue(sender=slow_sender(sent), workers=8))
+    return sent
+
+async def with_app(scenario):
+    """Run scenario(client) against the app, with its startup and shutdown events"""
+    await api.startup()
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+    finally:
+        await api.shutdown()
+
+def test_register_and_duplicate(sent):
+    """Test that registration succeeds once per email and the email is sent in the background"""
+
+    async def scenario(client):
+        response = await client.post("/register/", json=registration(1))
+        assert response.status_code == 200
+        duplicate = dict(registration(1), username="other")
+        response = await client.post("/register/", json=duplicate)
+        assert response.status_code == 400
+        assert response.json() == {"detail": "User already exists"}
+
+    asyncio.run(with_app(scenario))
+    assert sent == ["user1@example.com"]
+
+def test_register_without_lifespan_events(sent):
+    """Test that registration works when startup never ran, as under a TestClient without a with block"""
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Concurrent first requests all find the tables missing
+            responses = await asyncio.gather(*(client.post("/register/", json=registration(i))
+                                               for i in range(10)))
+        await api.shutdown()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200] * 10
+    assert sorted(sent) == sorted(f"user{i}@example.com" for i in range(10))
+
+@pytest.mark.slow
+def test_concurrent_registration_throughput(sent, cheap_hashing, record_property):
+    """Load test: concurrent registrations against the old one-at-a-time blocking path
+
+    Hashing is made cheap on both sides, so the gain measured is from not
+    waiting on SMTP and the database, whatever the number of cores.
+    """
+    count = 20
+    start = time.perf_counter()
+    for _ in range(count):
+        # What the endpoint used to do on the event loop for every request
+        bcrypt.hashpw(b"StrongPassword123!", bcrypt.gensalt())
+        time.sleep(SMTP_DELAY)
+    blocking_rate = count / (time.perf_counter() - start)
+
+    async def scenario(client):
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/register/", json=registration(i))
+                                           for i in range(count)))
+        elapsed = time.perf_counter() - start
+        assert all(response.status_code == 200 for response in responses)
+        return count / elapsed
+
+    async_rate = asyncio.run(with_app(scenario))
+    record_property("blocking_registrations_per_second", round(blocking_rate, 1))
+    record_property("async_registrations_per_second", round(async_rate, 1))
+    assert len(sent) == count
+    assert async_rate > blocking_rate * 4
@@ -1,6 +1,9 @@
+import os
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from api import app
+from api import app, get_database
+from database import AsyncDatabase
 
 client = TestClient(app)
 
@@ -9,7 +12,16 @@ def test_password_recovery():
     assert response.status_code == 200
     assert response.json() == {"message": "Password reset link sent to your email."}
 
-def test_user_registration():
+@pytest.fixture
+def database(temp_dir):
+    """Serve the app from a throwaway database instead of the one in the data dir"""
+    database = AsyncDatabase(f"sqlite+aiosqlite:///{os.path.join(temp_dir, 'users.db')}")
+    app.dependency_overrides[get_database] = lambda: database
+    yield database
+    app.dependency_overrides.pop(get_database, None)
+    asyncio.run(database.close())
+
+def test_user_registration(database):
     response = client.post("/register/", json={
         "username": "newuser",
         "email": "newuser@example.com",
@@ -0,0 +1,85 @@
+import os
+import time
+import pytest
+from security.encryption import SecurityManager
+from security.bulk_crypto import bulk_process
+
+@pytest.fixture
+def security_manager(temp_dir):
+    return SecurityManager(os.path.join(temp_dir, "master.key"))
+
+def named_profiles(sample_profile, count):
+    for i in range(count):
+        yield f"profile-{i}", sample_profile
+
+def test_bulk_roundtrip_keeps_order(security_manager, sample_profile):
+    """Test that bulk encryption and decryption stream results back in input order"""
+    encrypted = list(bulk_process(security_manager, named_profiles(sample_profile, 50),
+                                  workers=4, batch_size=8))
+    assert [name for name, _ in encrypted] == [f"profile-{i}" for i in range(50)]
+    assert all(security_manager.is_encrypted(p["payment"]["card_number"]) for _, p in encrypted)
+    decrypted = bulk_process(security_manager, encrypted, operation="decrypt", workers=4, batch_size=8)
+    assert all(profile == sample_profile for _, profile in decrypted)
+
+def test_bulk_reads_ahead_boundedly(security_manager, sample_profile):
+    """Test that only max_in_flight batches are pulled from the source ahead of the consumer"""
+    pulled = []
+
+    def source():
+        for name, profile in named_profiles(sample_profile, 1000):
+            pulled.append(name)
+            yield name, profile
+
+    results = bulk_process(security_manager, source(), workers=2, batch_size=10, max_in_flight=3)
+    next(results)
+    assert len(pulled) <= 40
+    results.close()
+
+def test_bulk_reports_progress_and_failures(security_manager, sample_profile):
+    """Test progress callbacks and that a failing profile does not stop the batch"""
+    reports = []
+    profiles = [("good", sample_profile), ("bad", {"payment": {"card_number": 4111}})]
+    results = dict(bulk_process(security_manager, profiles, workers=1, batch_size=1,
+                                on_progress=lambda p: reports.append((p.done, p.failed))))
+    assert isinstance(results["bad"], Exception)
+    assert reports == [(1, 0), (1, 1)]
+
+def test_bulk_rotate(security_manager, sample_profile):
+    """Test rotating many stored profiles to a new primary key"""
+    stored = [(name, security_manager.encrypt_profile(p)) for name, p in named_profiles(sample_profile, 20)]
+    security_manager.rotate_key()
+    rotated = list(bulk_process(security_manager, stored, operation="rotate", workers=2))
+    assert all(security_manager.is_current(p["payment"]["card_number"]) for _, p in rotated)
+
+def test_bulk_process_pool(security_manager, sample_profile):
+    """Test that worker processes get the key material they need"""
+    encrypted = list(bulk_process(security_manager, named_profiles(sample_profile, 20),
+                                  workers=2, batch_size=5, use_processes=True))
+    assert security_manager.decrypt_profile(encrypted[-1][1]) == sample_profile
+
+def test_unknown_operation(security_manager):
+    with pytest.raises(ValueError):
+        list(bulk_process(security_manager, [], operation="shred"))
+
+@pytest.mark.slow
+def test_bulk_throughput(security_manager, sample_profile, record_property):
+    """Benchmark serial against threaded and process-pool bulk encryption"""
+    count = 5000
+    start = time.perf_counter()
+    for _, profile in named_profiles(sample_profile, count):
+        security_manager.encrypt_profile(profile)
+    serial = time.perf_counter() - start
+
+    timings = {}
+    for use_processes in (False, True):
+        start = time.perf_counter()
+        for _ in bulk_process(security_manager, named_profiles(sample_profile, count),
+                              batch_size=128, use_processes=use_processes):
+            pass
+        timings[use_processes] = time.perf_counter() - start
+    record_property("serial_seconds", round(serial, 2))
+    record_property("thread_seconds", round(timings[False], 2))
+    record_property("process_seconds", round(timings[True], 2))
+    if (os.cpu_count() or 1) > 1:
+        # Fanning out has to beat doing the same work on one core
+        assert min(timings.values()) < serial
@@ -0,0 +1,88 @@
+import os
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from utils.bulk_validation import ProfileImportPipeline
+from utils.validation_engine import validation_engine
+
+ROWS = [
+    {"first_name": "jane doe", "personal.phone": "(210) 274-2163", "email": "Jane@Example.COM",
+     "dob": "01.09.1991", "zip": "78213", "notes": "anything"},
+    {"first_name": "J0hn", "personal.phone": "123", "email": "john@example.com",
+     "dob": "1990-02-28", "zip": "7821", "notes": ""},
+    {"first_name": "", "personal.phone": "+1 555.123.4567", "email": "",
+     "dob": "13/45/1990", "zip": "", "notes": "x"},
+]
+
+@pytest.fixture
+def source(temp_dir):
+    path = os.path.join(temp_dir, "profiles.csv")
+    pd.DataFrame(ROWS).to_csv(path, index=False)
+    return path
+
+def test_process_chunk_normalizes_and_reports():
+    """Test that valid values are canonicalized and bad ones reported per row"""
+    normalized, errors = ProfileImportPipeline().process_chunk(pd.DataFrame(ROWS))
+    assert normalized["personal.phone"].tolist() == ["+1 210-274-2163", "123", "+1 555-123-4567"]
+    assert normalized["dob"].tolist() == ["09/01/1991", "02/28/1990", "13/45/1990"]
+    assert normalized["email"].tolist() == ["jane@example.com", "john@example.com", ""]
+    assert normalized["first_name"].tolist() == ["Jane Doe", "J0hn", ""]
+    assert normalized["notes"].tolist() == ["anything", "", "x"]
+    assert list(zip(errors["row"], errors["field"])) == [
+        (1, "first_name"), (1, "personal.phone"), (1, "zip"), (2, "dob")]
+
+def test_vectorized_matches_engine():
+    """Test that the column path agrees with the engine's per-value checks"""
+    _, errors = ProfileImportPipeline().process_chunk(pd.DataFrame(ROWS))
+    flagged = set(zip(errors["row"], errors["field"]))
+    for row, values in enumerate(ROWS):
+        for column, value in values.items():
+            field = column.rsplit(".", 1)[-1]
+            if field == "dob":
+                continue  # the pipeline also accepts ISO and dotted dates
+            assert validation_engine.is_valid(field, value) == ((row, column) not in flagged)
+
+def test_run_streams_chunks(source, temp_dir):
+    """Test that a chunked run writes valid rows and an error report"""
+    output = os.path.join(temp_dir, "clean.csv")
+    error_report = os.path.join(temp_dir, "errors.csv")
+    report = ProfileImportPipeline(chunksize=1).run(source, output, error_report)
+    assert (report.rows, report.invalid_rows, report.errors, report.chunks) == (3, 2, 4, 3)
+    clean = pd.read_csv(output, dtype=str, keep_default_na=False)
+    assert clean["email"].tolist() == ["jane@example.com"]
+    errors = pd.read_csv(error_report)
+    assert errors["row"].tolist() == [1, 1, 1, 2]
+
+    report = ProfileImportPipeline(chunksize=2).run(source, output, keep_invalid=True)
+    assert len(pd.read_csv(output)) == 3
+
+def test_parquet_roundtrip(temp_dir):
+    """Test reading and writing Parquet in batches"""
+    pytest.importorskip("pyarrow")
+    source = os.path.join(temp_dir, "profiles.parquet")
+    pd.DataFrame(ROWS).to_parquet(source, index=False)
+    output = os.path.join(temp_dir, "clean.parquet")
+    report = ProfileImportPipeline(chunksize=2).run(source, output)
+    assert report.valid_rows == 1
+    assert pd.read_parquet(output)["dob"].tolist() == ["09/01/1991"]
+
+def test_parquet_without_pyarrow(temp_dir, monkeypatch):
+    """Test that Parquet files without pyarrow installed fail with the package to install"""
+    from lazy_import import lazy_import
+    from utils import bulk_validation
+    monkeypatch.setattr(bulk_validation, "pa", lazy_import("pyarrow"))
+    monkeypatch.setattr("importlib.util.find_spec", lambda name, package=None: None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        list(ProfileImportPipeline().read_chunks(os.path.join(temp_dir, "profiles.parquet")))
+
+@pytest.mark.slow
+def test_pipeline_throughput(temp_dir, record_property):
+    """Benchmark the pipeline on 100k rows read in chunks"""
+    source = os.path.join(temp_dir, "large.csv")
+    pd.DataFrame(ROWS * 33_334).to_csv(source, index=False)
+    report = ProfileImportPipeline(chunksize=20_000).run(source, os.path.join(temp_dir, "clean.csv"),
+                                                         os.path.join(temp_dir, "errors.csv"))
+    record_property("rows", report.rows)
+    record_property("rows_per_second", round(report.rows_per_second))
+    assert report.chunks == 6
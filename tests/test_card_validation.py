@@ -0,0 +1,67 @@
+import time
+from datetime import date
+import pytest
+from utils.card_validation import (BIN_TRIE, luhn_valid, expiry_valid, validate_card,
+                                   validate_cards, CardCheck)
+from utils.validation_engine import validation_engine
+
+@pytest.mark.parametrize("number,network", [
+    ("4111111111111111", "visa"),
+    ("5555555555554444", "mastercard"),
+    ("2223003122003222", "mastercard"),
+    ("378282246310005", "amex"),
+    ("6011111111111117", "discover"),
+    ("6221260000000000", "discover"),
+    ("6200000000000005", "unionpay"),
+    ("3530111333300000", "jcb"),
+    ("36227206271667", "diners"),
+])
+def test_known_test_cards(number, network):
+    """Test the networks' published test numbers"""
+    assert validate_card(number) == CardCheck(True, network)
+
+def test_luhn():
+    """Test the checksum on valid, mistyped and non-digit input"""
+    assert luhn_valid("79927398713")
+    assert not luhn_valid("79927398710")
+    assert not luhn_valid("4111-1111")
+    assert not luhn_valid("")
+
+def test_longest_prefix_wins():
+    """Test that a longer IIN prefix overrides a shorter one"""
+    assert BIN_TRIE.lookup("622126").name == "discover"
+    assert BIN_TRIE.lookup("622125").name == "unionpay"
+    assert BIN_TRIE.lookup("2720").name == "mastercard"
+    assert BIN_TRIE.lookup("2721") is None
+
+def test_rejections():
+    """Test the reason given for each kind of invalid card"""
+    assert validate_card("4111 1111 1111 1112").reason == "Card number failed the checksum"
+    assert validate_card("37828224631000").reason == "Invalid length for amex"
+    assert validate_card("4111-abcd").reason == "Card number must be 12 to 19 digits"
+    assert not validation_engine.is_valid("card_number", "4111111111111112")
+
+def test_expiry():
+    """Test that cards are valid through the end of their expiry month"""
+    today = date(2026, 10, 18)
+    assert expiry_valid("10/26", today)
+    assert expiry_valid("01/2027", today)
+    assert not expiry_valid("09/26", today)
+    assert not expiry_valid("13/30", today)
+    assert not expiry_valid("1030", today)
+    assert validate_card("4111111111111111", "09/26", today) == CardCheck(False, "visa", "Card has expired")
+
+def test_batch():
+    """Test validating a column of numbers with their expiries"""
+    results = validate_cards(["4111111111111111", "4111111111111112"], ["12/30", "12/30"])
+    assert [result.valid for result in results] == [True, False]
+
+@pytest.mark.slow
+def test_card_validation_throughput(record_property):
+    """Benchmark batch validation"""
+    numbers = ["4111111111111111", "5555555555554444", "378282246310005", "4111111111111112"] * 50_000
+    start = time.perf_counter()
+    validate_cards(numbers)
+    rate = len(numbers) / (time.perf_counter() - start)
+    record_property("cards_per_second", round(rate))
+    assert rate > 50_000
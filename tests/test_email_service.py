@@ -0,0 +1,29 @@
+import asyncio
+import smtplib
+import email_service
+from email_service import EmailQueue
+
+def refuse_connection(*args, **kwargs):
+    raise smtplib.SMTPConnectError(421, "Service not available")
+
+def test_failed_sends_are_counted(monkeypatch):
+    """Test that SMTP errors reach the queue, so undelivered mail is not counted as sent"""
+    monkeypatch.setattr(email_service.smtplib, "SMTP", refuse_connection)
+    queue = EmailQueue(workers=1)
+
+    async def scenario():
+        await queue.start()
+        assert queue.enqueue("user@example.com", "123456")
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert (queue.sent, queue.failed) == (0, 1)
+
+def test_enqueue_before_start():
+    """Test that emails queued before start() are still sent"""
+    sent = []
+    queue = EmailQueue(sender=lambda to_email, otp: sent.append(to_email))
+    assert queue.enqueue("user@example.com", "123456")
+    asyncio.run(queue.stop())
+    assert sent == ["user@example.com"]
+    assert queue.sent == 1
@@ -127,3 +127,155 @@ def test_profile_encryption_idempotency(security_manager, sample_profile):
     
     # Should match original
     assert decrypted == sample_profile
+
+def test_profile_encryption_leaves_input_untouched(security_manager, sample_profile):
+    """Test that encrypting and decrypting never mutate the caller's sections"""
+    import copy
+    original = copy.deepcopy(sample_profile)
+    encrypted = security_manager.encrypt_profile(sample_profile)
+    assert sample_profile == original
+    assert encrypted['preferences'] is sample_profile['preferences']
+    
+    security_manager.decrypt_profile(encrypted)
+    assert encrypted['payment']['cvv'] != original['payment']['cvv']
+
+def test_tokens_are_not_double_encoded(security_manager):
+    """Test that values are stored as plain Fernet tokens and legacy tokens still decrypt"""
+    import base64
+    token = security_manager.encrypt_value("4111111111111111")
+    assert token.startswith("gAAAAA")
+    assert security_manager.is_encrypted(token)
+    
+    legacy = base64.b64encode(security_manager.fernet.encrypt(b"123")).decode()
+    assert security_manager.decrypt_value(legacy) == "123"
+    assert security_manager.is_encrypted(legacy)
+    assert not security_manager.is_encrypted("gAAAAA-looks-like-a-token")
+
+def test_envelope_roundtrip(temp_dir, sample_profile):
+    """Test that envelope mode seals all sensitive fields into one token"""
+    manager = SecurityManager(key_file=os.path.join(temp_dir, "test_master.key"), envelope=True)
+    sealed = manager.encrypt_profile(sample_profile)
+    assert sealed['personal']['ssn'] is None
+    assert sealed['payment']['card_number'] is None
+    assert sealed['personal']['first_name'] == "John"
+    assert "__sealed__" in sealed
+    assert manager.encrypt_profile(sealed) == sealed
+    
+    decrypted = manager.decrypt_profile(sealed)
+    assert decrypted == sample_profile
+    assert list(decrypted['personal']) == list(sample_profile['personal'])
+
+def test_envelope_decrypts_lazily(temp_dir, sample_profile):
+    """Test that opening a sealed profile only decrypts when a sealed section is read"""
+    manager = SecurityManager(key_file=os.path.join(temp_dir, "test_master.key"), envelope=True)
+    opened = manager.open_profile(manager.seal_profile(sample_profile))
+    assert opened['preferences'] == sample_profile['preferences']
+    assert not opened.is_open
+    assert opened['payment']['cvv'] == "123"
+    assert opened.is_open
+    assert dict(opened) == sample_profile
+
+@pytest.mark.slow
+def test_envelope_vs_per_field_benchmark(temp_dir, sample_profile, record_property):
+    """Benchmark per-field and envelope layouts over 10k profiles"""
+    import time
+    key_file = os.path.join(temp_dir, "test_master.key")
+    profiles = [
+        {section: dict(values) for section, values in sample_profile.items()}
+        for _ in range(10_000)
+    ]
+    timings = {}
+    for envelope in (False, True):
+        manager = SecurityManager(key_file=key_file, envelope=envelope)
+        start = time.perf_counter()
+        encrypted = [manager.encrypt_profile(profile) for profile in profiles]
+        decrypted = [manager.decrypt_profile(profile) for profile in encrypted]
+        timings[envelope] = time.perf_counter() - start
+        assert decrypted[-1] == sample_profile
+    record_property("per_field_seconds", round(timings[False], 2))
+    record_property("envelope_seconds", round(timings[True], 2))
+    assert timings[True] < timings[False]
+
+def test_legacy_base64_key_file(temp_dir, sample_profile):
+    """Test that key files written in Fernet's base64 form still work"""
+    from cryptography.fernet import Fernet
+    key_file = os.path.join(temp_dir, "legacy.key")
+    key = Fernet.generate_key()
+    with open(key_file, 'wb') as f:
+        f.write(key)
+    manager = SecurityManager(key_file=key_file)
+    assert Fernet(key).decrypt(manager.encrypt_value("4111").encode()) == b"4111"
+
+def test_passphrase_keys_are_derived_once(temp_dir):
+    """Test that passphrase keys survive a restart and PBKDF2 runs once per session"""
+    from unittest.mock import patch
+    from security import encryption
+    key_file = os.path.join(temp_dir, "master.key")
+    manager = SecurityManager(key_file=key_file, passphrase="correct horse", kdf_iterations=1000)
+    token = manager.encrypt_value("4111")
+    assert not os.path.exists(key_file)
+    with open(manager.keyring_file) as f:
+        assert "correct horse" not in f.read()
+
+    with patch.object(encryption, "PBKDF2HMAC") as kdf:
+        reopened = SecurityManager(key_file=key_file, passphrase="correct horse", kdf_iterations=1000)
+    kdf.assert_not_called()
+    assert reopened.decrypt_value(token) == "4111"
+
+    encryption._derived_keys.clear()
+    wrong = SecurityManager(key_file=key_file, passphrase="wrong", kdf_iterations=1000)
+    assert not wrong.is_encrypted(token)
+    assert wrong.decrypt_value(token) == token
+
+def test_rotate_key(temp_dir, sample_profile):
+    """Test that old tokens stay readable after rotation and rotate to the new key"""
+    manager = SecurityManager(key_file=os.path.join(temp_dir, "master.key"), key_rotation_days=90)
+    assert not manager.rotation_due()
+    stored = manager.encrypt_profile(sample_profile)
+    old_id = manager.keyring[0]["id"]
+
+    assert manager.rotate_key() != old_id
+    assert len(SecurityManager(key_file=manager.key_file).keyring) == 2
+    assert not manager.is_current(stored["payment"]["card_number"])
+    assert manager.decrypt_profile(stored) == sample_profile
+
+    rotated = manager.rotate_profile(stored)
+    assert manager.is_current(rotated["payment"]["card_number"])
+    assert rotated["personal"]["first_name"] == stored["personal"]["first_name"]
+    assert manager.rotate_profile(rotated) == rotated
+    manager.retire_old_keys()
+    assert manager.decrypt_profile(rotated) == sample_profile
+
+def test_rotation_without_multifernet_extract_timestamp(temp_dir, sample_profile, monkeypatch):
+    """Test that tokens are recognized on cryptography releases before MultiFernet.extract_timestamp"""
+    from cryptography.fernet import MultiFernet
+    monkeypatch.delattr(MultiFernet, "extract_timestamp", raising=False)
+    manager = SecurityManager(key_file=os.path.join(temp_dir, "master.key"))
+    stored = manager.encrypt_profile(sample_profile)
+    assert manager.encrypt_profile(stored) == stored
+
+    manager.rotate_key()
+    assert manager.is_encrypted(stored["payment"]["card_number"])
+    assert not manager.profile_is_current(stored)
+    rotated = manager.rotate_profile(stored)
+    assert manager.profile_is_current(rotated)
+    manager.retire_old_keys()
+    assert manager.decrypt_profile(rotated) == sample_profile
+
+def test_key_file_formats(temp_dir):
+    """Test that raw and base64 key files are both read and anything else is refused"""
+    from exceptions import SecurityError
+    key_file = os.path.join(temp_dir, "master.key")
+    with open(key_file, 'wb') as f:
+        f.write(b"not a key")
+    with pytest.raises(SecurityError):
+        SecurityManager(key_file=key_file)
+
+def test_rotation_due(temp_dir):
+    """Test that rotation is due once the primary key is older than key_rotation_days"""
+    key_file = os.path.join(temp_dir, "master.key")
+    SecurityManager(key_file=key_file)
+    old = os.path.getmtime(key_file) - 91 * 86400
+    os.utime(key_file, (old, old))
+    assert SecurityManager(key_file=key_file, key_rotation_days=90).rotation_due()
+    assert not SecurityManager(key_file=key_file, key_rotation_days=0).rotation_due()
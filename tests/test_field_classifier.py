@@ -0,0 +1,104 @@
+import pytest
+import os
+import time
+import pandas as pd
+from field_classifier import FieldClassifier
+from field_mapping import FieldMappingRegistry, DEFAULT_FIELD_VARIATIONS
+
+# Labels as they appear on real forms, with the profile key they should map to
+FORM_LABELS = {
+    'Your First Name': 'first_name',
+    'E-mail Address *': 'email',
+    'Mobile Number': 'phone',
+    'Street Address Line 1': 'address',
+    'Postal/Zip Code': 'zip',
+    'Date of Birth (MM/DD/YYYY)': 'dob',
+    'Company Name': 'company',
+    'Job Title': 'job_title',
+    'Surname': 'last_name',
+    'Given name': 'first_name',
+    'Town / City': 'city',
+    'Province': 'state',
+    'LinkedIn Profile URL': 'linkedin',
+    'Nick name': 'preferred_name',
+    'Social Security Number': 'ssn',
+    'Telephone': 'phone',
+    'Home page': 'website'
+}
+
+@pytest.fixture(scope="module")
+def classifier(tmp_path_factory):
+    """Create a classifier whose model lives in a temporary directory"""
+    model_path = tmp_path_factory.mktemp("models") / "field_classifier.joblib"
+    return FieldClassifier(model_path=str(model_path))
+
+def test_model_loads_lazily(tmp_path):
+    """Test that the model is trained and saved on first use only"""
+    classifier = FieldClassifier(model_path=str(tmp_path / "field_classifier.joblib"))
+    assert classifier._model is None
+    assert not os.path.exists(classifier.model_path)
+    
+    classifier.predict(["First Name"])
+    assert os.path.exists(classifier.model_path)
+    
+    # A fresh instance loads the serialized model instead of retraining
+    reloaded = FieldClassifier(model_path=classifier.model_path)
+    assert reloaded.predict(["Email"])[0][0] == "email"
+
+def test_batch_predict(classifier):
+    """Test classification of a batch of labels"""
+    predictions = classifier.predict(["Your First Name", "Mobile Number", "Postal/Zip Code"])
+    
+    assert [field for field, _ in predictions] == ["first_name", "phone", "zip"]
+    assert all(0.0 < confidence <= 1.0 for _, confidence in predictions)
+    assert classifier.predict([]) == []
+
+def test_predict_form(classifier):
+    """Test classification of a whole form from element attributes"""
+    form = pd.DataFrame([
+        {"label": "Given name", "name": "fname", "placeholder": None},
+        {"label": None, "name": "user_email", "placeholder": "you@example.com"},
+        {"label": "Town / City", "name": "city", "placeholder": ""}
+    ])
+    result = classifier.predict_form(form)
+    
+    assert list(result["field"]) == ["first_name", "email", "city"]
+    assert "confidence" in result.columns
+    assert "field" not in form.columns
+    
+    with pytest.raises(ValueError):
+        classifier.predict_form(pd.DataFrame({"other": ["x"]}))
+
+@pytest.mark.slow
+def test_classifier_vs_dictionary_benchmark(classifier, record_property):
+    """Benchmark accuracy and throughput against the variation dictionary"""
+    registry = FieldMappingRegistry.from_variations(DEFAULT_FIELD_VARIATIONS)
+    labels = list(FORM_LABELS)
+    
+    matches = registry.find_mappings(labels)
+    dictionary_correct = sum(
+        1 for label, field in FORM_LABELS.items()
+        if matches[label].mapping is not None and matches[label].mapping.name == field
+    )
+    predictions = classifier.predict(labels)
+    classifier_correct = sum(
+        1 for (predicted, _), field in zip(predictions, FORM_LABELS.values()) if predicted == field
+    )
+    assert classifier_correct >= dictionary_correct
+    assert classifier_correct / len(labels) >= 0.85
+    
+    batch = labels * 1000
+    start = time.perf_counter()
+    classifier.predict(batch)
+    classifier_rate = len(batch) / (time.perf_counter() - start)
+    
+    registry.cache_size = 0
+    start = time.perf_counter()
+    registry.find_mappings(f"{label} {i}" for i, label in enumerate(batch))
+    dictionary_rate = len(batch) / (time.perf_counter() - start)
+    
+    record_property("classifier_correct", f"{classifier_correct}/{len(labels)}")
+    record_property("classifier_labels_per_second", round(classifier_rate))
+    record_property("dictionary_correct", f"{dictionary_correct}/{len(labels)}")
+    record_property("dictionary_labels_per_second", round(dictionary_rate))
+    assert classifier_rate > 10000
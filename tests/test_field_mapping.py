@@ -0,0 +1,154 @@
+import pytest
+import os
+import json
+import time
+from field_mapping import FieldMapping, FieldMappingRegistry, DEFAULT_FIELD_VARIATIONS
+
+@pytest.fixture
+def registry():
+    """Create a registry populated with the default field variations"""
+    return FieldMappingRegistry.from_variations(DEFAULT_FIELD_VARIATIONS)
+
+def test_exact_variation_lookup(registry):
+    """Test that any registered variation resolves to its field"""
+    assert registry.find_mapping("FName").name == "first_name"
+    assert registry.find_mapping("e-mail").name == "email"
+    assert registry.find_mapping("postal_code").name == "zip"
+
+def test_fill_plan_order(registry, sample_profile):
+    """Test that the fill plan follows registry order and skips unknown fields"""
+    plan = registry.fill_plan(sample_profile)
+    
+    assert plan[0] == ("personal", "first_name")
+    assert ("payment", "card_number") not in plan  # No mapping registered
+    assert [field for _, field in plan] == [
+        "first_name", "last_name", "email", "phone", "address", "ssn"
+    ]
+
+def test_fill_plan_is_cached(registry, sample_profile):
+    """Test that repeated fills reuse the same plan object"""
+    first = registry.fill_plan(sample_profile)
+    assert registry.fill_plan(sample_profile) is first
+    
+    registry.register(FieldMapping(name="card_number", variations=["cardnumber"]))
+    rebuilt = registry.fill_plan(sample_profile)
+    assert rebuilt is not first
+    assert ("payment", "card_number") in rebuilt
+
+def test_fill_plan_follows_field_names(registry, sample_profile):
+    """Test that a profile with the same number of different fields gets a new plan"""
+    registry.fill_plan(sample_profile)
+    personal = dict(sample_profile["personal"])
+    del personal["phone"]
+    personal["nickname"] = "JD"
+    other = dict(sample_profile, personal=personal)
+    assert ("personal", "phone") not in registry.fill_plan(other)
+    assert "phone" not in dict(registry.iter_fill_values(other))
+
+def test_iter_fill_values_skips_empty(registry, sample_profile):
+    """Test that empty values are not filled"""
+    sample_profile["personal"]["phone"] = ""
+    fields = dict(registry.iter_fill_values(sample_profile))
+    
+    assert "phone" not in fields
+    assert fields["first_name"] == "John"
+
+def test_custom_mappings_reload(registry, temp_dir):
+    """Test incremental refresh of custom mappings from disk"""
+    mappings_file = os.path.join(temp_dir, "field_mappings.json")
+    with open(mappings_file, 'w') as f:
+        json.dump({"email": ["contact"], "card_number": ["cc"]}, f)
+    
+    assert registry.load_custom_mappings(mappings_file) is True
+    assert registry.find_mapping("contact").name == "email"
+    assert registry.find_mapping("cc").name == "card_number"
+    
+    # Unchanged file is a no-op
+    assert registry.load_custom_mappings(mappings_file) is False
+    
+    # Removing an override restores the default variations
+    time.sleep(0.01)
+    with open(mappings_file, 'w') as f:
+        json.dump({"card_number": ["cc"]}, f)
+    os.utime(mappings_file, (time.time() + 1, time.time() + 1))
+    
+    assert registry.load_custom_mappings(mappings_file) is True
+    assert registry.find_mapping("e-mail").name == "email"
+    assert registry.find_mapping("contact") is None
+    assert list(registry._mappings).index("email") == 2
+
+def test_removed_mapping_returns_variations(registry):
+    """Test that a variation taken over by a custom mapping goes back to its default owner"""
+    registry.register(FieldMapping(name="employer_name", variations=["company", "employer"]))
+    assert registry.find_mapping("company").name == "employer_name"
+    registry.unregister("employer_name")
+    assert registry.find_mapping("company").name == "company"
+    assert registry.find_mapping("employer").name == "company"
+    assert registry.find_mapping("employr").name == "company"
+
+def test_fuzzy_match_typos(registry):
+    """Test that misspelled and decorated labels resolve through the fuzzy index"""
+    assert registry.find_mapping("First Name:").name == "first_name"
+    assert registry.find_mapping("emial").name == "email"
+    assert registry.find_mapping("telephon").name == "phone"
+    assert registry.find_mapping("linkdin").name == "linkedin"
+    
+    # Unrelated labels do not match
+    assert registry.find_mapping("xyz") is None
+    assert registry.find_mapping("") is None
+
+def test_fuzzy_cache_invalidation(registry):
+    """Test that cached fuzzy results are dropped when mappings change"""
+    assert registry.find_mapping("loyaltynumbr") is None
+    assert "loyaltynumbr" in registry._fuzzy_cache
+    
+    registry.register(FieldMapping(name="loyalty_number", variations=["loyaltynumber"]))
+    assert registry.find_mapping("loyaltynumbr").name == "loyalty_number"
+    
+    registry.unregister("loyalty_number")
+    assert registry.find_mapping("loyaltynumbr") is None
+
+@pytest.mark.slow
+def test_fuzzy_lookup_benchmark():
+    """Benchmark fuzzy lookups against 50k registered variations"""
+    import random
+    import string
+    
+    rng = random.Random(1234)
+    syllables = ['ad', 'dr', 'ess', 'name', 'first', 'last', 'num', 'ber', 'code', 'zip',
+                 'ph', 'one', 'mail', 'bill', 'ing', 'ship', 'card', 'date', 'city', 'state',
+                 'co', 'un', 'try', 'user', 'pass', 'word', 'id', 'tax', 'vat', 'home']
+    words = set()
+    while len(words) < 50000:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    variations = {f"field_{i}": words[i:i + 10] for i in range(0, len(words), 10)}
+    registry = FieldMappingRegistry.from_variations(variations)
+    
+    def typo(word):
+        i = rng.randrange(len(word))
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    
+    queries = [typo(rng.choice(words)) for _ in range(2000)]
+    registry.cache_size = 0  # Measure the index, not the LRU cache
+    
+    start = time.perf_counter()
+    matched = sum(1 for query in queries if registry.find_mapping(query) is not None)
+    per_lookup = (time.perf_counter() - start) / len(queries)
+    
+    assert matched / len(queries) > 0.95
+    assert per_lookup < 0.001
+
+def test_find_mappings_batch(registry):
+    """Test bulk resolution with per-label confidence"""
+    labels = ["Email", "email", "emial", "First Name", "xyz", "Email"]
+    matches = registry.find_mappings(labels)
+    
+    assert set(matches) == {"Email", "email", "emial", "First Name", "xyz"}
+    assert matches["Email"].mapping.name == "email"
+    assert matches["Email"].confidence == 1.0
+    assert matches["First Name"].mapping.name == "first_name"
+    assert matches["emial"].mapping.name == "email"
+    assert 0.8 <= matches["emial"].confidence < 1.0
+    assert matches["xyz"].mapping is None
+    assert matches["xyz"].confidence == 0.0
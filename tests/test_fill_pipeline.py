@@ -0,0 +1,94 @@
+import pytest
+import threading
+from fill_pipeline import FillAction, FillExecutor, build_fill_plan
+from field_mapping import FieldMappingRegistry, DEFAULT_FIELD_VARIATIONS
+from injection import RecordingInjector
+from pacing import AdaptivePacer
+from retry import RetryPolicy
+from exceptions import FillAbortedError
+
+@pytest.fixture
+def registry():
+    return FieldMappingRegistry.from_variations(DEFAULT_FIELD_VARIATIONS)
+
+def synthetic_form(size):
+    """Build a registry and profile with `size` fillable fields"""
+    names = [f"field_{i}" for i in range(size)]
+    registry = FieldMappingRegistry.from_variations({name: [name] for name in names})
+    profile = {"personal": {name: f"value {i}" for i, name in enumerate(names)}, "payment": {}}
+    return registry, profile
+
+def test_build_fill_plan(registry, sample_profile):
+    """Test that planning is ordered, skips empty values and touches nothing"""
+    sample_profile["personal"]["phone"] = ""
+    plan = build_fill_plan(sample_profile, registry)
+    
+    assert plan[0] == FillAction("personal", "first_name", "John")
+    assert [action.field for action in plan] == ["first_name", "last_name", "email", "address", "ssn"]
+
+def test_execute_with_recorder(registry, sample_profile):
+    """Test a headless fill through the in-memory backend"""
+    injector = RecordingInjector(typed_fields=["ssn"])
+    plan = build_fill_plan(sample_profile, registry)
+    progressed = []
+    
+    result = FillExecutor(injector).execute(plan, progress=progressed.append)
+    
+    assert injector.filled == [action.value for action in plan]
+    assert result.filled == progressed == [action.field for action in plan]
+    assert ('type', '1') in injector.events  # ssn is typed, the rest pasted
+    assert injector.clipboard == ""  # Original clipboard restored
+
+def test_execute_retries_and_backs_off(registry, sample_profile):
+    """Test that failures are retried without duplicating input"""
+    injector = RecordingInjector(paste=False)
+    pacer = AdaptivePacer(0.2, 0.05)
+    plan = build_fill_plan(sample_profile, registry)[:1]
+    executor = FillExecutor(injector, pacer=pacer, retry_policy=RetryPolicy(base_delay=0))
+    
+    injector.fail(1)
+    result = executor.execute(plan)
+    
+    assert result.filled == ["first_name"]
+    assert injector.filled == ["John"]
+    assert pacer.level("default") > 0
+
+def test_execute_circuit_breaker(registry, sample_profile):
+    """Test that a dead target aborts the fill"""
+    injector = RecordingInjector()
+    injector.fail(1000)
+    executor = FillExecutor(injector, retry_policy=RetryPolicy(base_delay=0, breaker_threshold=2))
+    
+    with pytest.raises(FillAbortedError):
+        executor.execute(build_fill_plan(sample_profile, registry))
+
+def test_execute_cancelled(registry, sample_profile):
+    """Test that a cancelled fill stops before the next field"""
+    cancel = threading.Event()
+    cancel.set()
+    result = FillExecutor(RecordingInjector()).execute(build_fill_plan(sample_profile, registry), cancel)
+    
+    assert result.cancelled
+    assert result.filled == []
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", [10, 100, 1000, 10000])
+def test_benchmark_plan_building(benchmark, size):
+    """Benchmark the planning stage for growing profiles"""
+    registry, profile = synthetic_form(size)
+    # Fresh profile sections each round so the cached plan is rebuilt
+    plan = benchmark(lambda: build_fill_plan({"personal": dict(profile["personal"]), "payment": {}}, registry))
+    assert len(plan) == size
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", [10, 100, 1000, 10000])
+def test_benchmark_execution(benchmark, size):
+    """Benchmark executor overhead with the in-memory backend"""
+    registry, profile = synthetic_form(size)
+    plan = build_fill_plan(profile, registry)
+    
+    def run():
+        return FillExecutor(RecordingInjector()).execute(plan)
+    
+    result = benchmark(run)
+    assert len(result.filled) == size
@@ -0,0 +1,97 @@
+import pytest
+import time
+import threading
+from fill_worker import FillWorker
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.005)
+
+def make_fill(fields, delay=0.0, started=None):
+    def fill(job, progress):
+        if started is not None:
+            started.set()
+        for field in fields:
+            if job.cancelled:
+                return
+            time.sleep(delay)
+            progress(field)
+    return fill
+
+def test_job_runs_off_caller_thread(sample_profile):
+    """Test that fills run on the worker thread and report progress"""
+    threads = []
+    
+    def fill(job, progress):
+        threads.append(threading.current_thread().name)
+        progress("first_name")
+        progress("last_name")
+    
+    worker = FillWorker(fill)
+    job = worker.submit("default", sample_profile)
+    wait_for(lambda: job.status == "done")
+    
+    assert threads == ["fill-worker"]
+    assert job.fields_filled == 2
+    assert job.duration >= 0 and job.queue_latency >= 0
+    worker.shutdown()
+
+def test_events_delivered_on_drain(sample_profile):
+    """Test that events are only dispatched when the UI thread drains them"""
+    events = []
+    worker = FillWorker(make_fill(["email"]))
+    for name in ("started", "progress", "finished"):
+        worker.subscribe(name, lambda job, data, name=name: events.append((name, data)))
+    
+    job = worker.submit("default", sample_profile)
+    wait_for(lambda: job.status == "done" and not worker.busy)
+    assert events == []
+    
+    worker.drain_events()
+    assert events == [("started", None), ("progress", "email"), ("finished", None)]
+    worker.shutdown()
+
+def test_second_submit_cancels(sample_profile):
+    """Test that a second hotkey press cancels the running fill"""
+    started = threading.Event()
+    worker = FillWorker(make_fill(["f"] * 100, delay=0.01, started=started), on_busy="cancel")
+    job = worker.submit("default", sample_profile)
+    started.wait(1)
+    
+    assert worker.submit("default", sample_profile) is None
+    wait_for(lambda: job.status == "cancelled")
+    assert job.fields_filled < 100
+    
+    # Once idle, the next press starts a new fill
+    wait_for(lambda: not worker.busy)
+    assert worker.submit("default", sample_profile) is not None
+    worker.shutdown()
+
+def test_second_submit_queues(sample_profile):
+    """Test that the queue policy runs fills one after another"""
+    worker = FillWorker(make_fill(["a", "b"], delay=0.01), on_busy="queue")
+    jobs = [worker.submit("default", sample_profile) for _ in range(3)]
+    wait_for(lambda: all(job.status == "done" for job in jobs))
+    
+    # Jobs never overlap
+    for earlier, later in zip(jobs, jobs[1:]):
+        assert later.started_at >= earlier.finished_at
+    assert [job.job_id for job in worker.completed] == [1, 2, 3]
+    worker.shutdown()
+
+def test_failed_job_is_reported(sample_profile):
+    """Test that an exception in the fill marks the job failed"""
+    def fill(job, progress):
+        raise RuntimeError("window closed")
+    
+    worker = FillWorker(fill)
+    job = worker.submit("default", sample_profile)
+    wait_for(lambda: job.status == "failed")
+    assert job.error == "window closed"
+    
+    with pytest.raises(ValueError):
+        FillWorker(fill, on_busy="stack")
+    worker.shutdown()
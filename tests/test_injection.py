@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import patch, call, MagicMock
+from injection import TypingInjector, ClipboardInjector, create_injector, PASTE_HOTKEY, SELECT_ALL_HOTKEY
+from exceptions import InjectionError
+
+@pytest.fixture
+def gui():
+    """Patch pyautogui and pyperclip inside the injection module"""
+    # Explicit mocks so patch() doesn't inspect (and import) the lazy modules
+    with patch('injection.pyautogui', new=MagicMock()) as pyautogui, \
+         patch('injection.pyperclip', new=MagicMock()) as pyperclip, \
+         patch('injection.time.sleep'):
+        pyperclip.paste.return_value = "user clipboard"
+        yield pyautogui, pyperclip
+
+def test_typing_injector_writes_keystrokes(gui):
+    """Test that typed mode writes the value and tabs forward"""
+    pyautogui, pyperclip = gui
+    injector = TypingInjector(key_delay=0.01, field_delay=0.1)
+    injector.inject('first_name', 'John')
+    
+    assert ''.join(c.args[0] for c in pyautogui.write.call_args_list) == 'John'
+    pyautogui.press.assert_called_once_with('tab', _pause=False)
+    pyperclip.copy.assert_not_called()
+
+def test_typing_injector_resumes_partial_write(gui):
+    """Test that a failed write reports progress and a retry resumes from it"""
+    pyautogui, pyperclip = gui
+    pyautogui.write.side_effect = [None, None, RuntimeError("focus lost")]
+    injector = TypingInjector(key_delay=0, field_delay=0)
+    
+    with pytest.raises(InjectionError) as error:
+        injector.inject('first_name', 'John')
+    assert error.value.written == 2
+    
+    pyautogui.write.reset_mock(side_effect=True)
+    injector.inject('first_name', 'John', offset=error.value.written)
+    assert [c.args[0] for c in pyautogui.write.call_args_list] == ['h', 'n']
+
+def test_clipboard_injector_pastes_values(gui):
+    """Test that paste mode uses a single paste per field"""
+    pyautogui, pyperclip = gui
+    injector = ClipboardInjector()
+    injector.inject('first_name', 'John')
+    
+    pyperclip.copy.assert_called_once_with('John')
+    pyautogui.hotkey.assert_called_once_with(*PASTE_HOTKEY, _pause=False)
+    pyautogui.write.assert_not_called()
+
+def test_clipboard_retry_replaces_field(gui):
+    """Test that a retried paste replaces the field instead of appending"""
+    pyautogui, pyperclip = gui
+    pyautogui.hotkey.side_effect = RuntimeError("paste failed")
+    injector = ClipboardInjector()
+    
+    with pytest.raises(InjectionError) as error:
+        injector.inject('email', 'john@example.com')
+    
+    pyautogui.hotkey.reset_mock(side_effect=True)
+    injector.inject('email', 'john@example.com', offset=error.value.written)
+    assert pyautogui.hotkey.call_args_list == [
+        call(*SELECT_ALL_HOTKEY, _pause=False), call(*PASTE_HOTKEY, _pause=False)
+    ]
+
+def test_clipboard_injector_restores_clipboard(gui):
+    """Test that the original clipboard is restored after filling"""
+    pyautogui, pyperclip = gui
+    injector = ClipboardInjector()
+    injector.begin()
+    injector.inject('email', 'john@example.com')
+    injector.end()
+    
+    assert pyperclip.copy.call_args_list == [call('john@example.com'), call('user clipboard')]
+
+def test_clipboard_injector_types_masked_fields(gui):
+    """Test fallback to typed input for fields that need keystrokes"""
+    pyautogui, pyperclip = gui
+    injector = ClipboardInjector(typed_fields=['cvv'])
+    injector.inject('cvv', '123')
+    injector.inject('bio', 'line one\nline two')
+    
+    typed = ''.join(c.args[0] for c in pyautogui.write.call_args_list)
+    assert typed == '123' + 'line one\nline two'
+    pyperclip.copy.assert_not_called()
+
+def test_create_injector_modes():
+    """Test injector selection from configuration"""
+    config = {"field_delay": 0.2, "key_delay": 0.05}
+    assert isinstance(create_injector(config), ClipboardInjector)
+    assert type(create_injector({**config, "injection_mode": "type"})) is TypingInjector
+    
+    with pytest.raises(ValueError):
+        create_injector({**config, "injection_mode": "telepathy"})
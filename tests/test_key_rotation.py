@@ -0,0 +1,96 @@
+import os
+import time
+import pytest
+from profile_repository import ProfileRepository
+from profile_store import SQLiteProfileStore
+from security.encryption import SecurityManager
+from security.key_rotation import KeyRotationJob
+
+@pytest.fixture
+def security_manager(temp_dir):
+    return SecurityManager(os.path.join(temp_dir, "master.key"))
+
+@pytest.fixture
+def repository(temp_dir, security_manager, sample_profile):
+    repository = ProfileRepository(SQLiteProfileStore(os.path.join(temp_dir, "profiles.db")),
+                                   security_manager=security_manager, revalidate_interval=0)
+    for i in range(7):
+        repository.save(f"profile-{i}", sample_profile)
+    yield repository
+    repository.store.close()
+
+class FakeState:
+    def __init__(self):
+        self.values = {}
+
+    def get_state_value(self, key, default=None):
+        return self.values.get(key, default)
+
+    def update_state(self, key, value):
+        self.values[key] = value
+        return True
+
+def stored_cards(repository):
+    return [repository.store.get_field(name, "payment", "card_number")
+            for name in repository.list_profiles()]
+
+def test_rotation_job_reencrypts_all_profiles(repository, security_manager, sample_profile):
+    """Test that the background job moves every profile to the new key and retires the old one"""
+    job = KeyRotationJob(repository, security_manager, batch_size=3)
+    job.start(rotate=True)
+    job.join(10)
+    assert job.done and job.progress == 1.0
+    assert job.rewritten == 7
+    assert len(security_manager.keyring) == 1
+    assert all(security_manager.is_current(card) for card in stored_cards(repository))
+    repository.invalidate()
+    assert repository.load("profile-3") == sample_profile
+
+def test_rotation_job_resumes(repository, security_manager):
+    """Test that a cancelled job picks up after its last checkpoint"""
+    state = FakeState()
+    security_manager.rotate_key()
+    first = KeyRotationJob(repository, security_manager, state_manager=state, batch_size=2)
+    original = repository.reencrypt
+    calls = []
+
+    def reencrypt_then_cancel(name):
+        calls.append(name)
+        if len(calls) == 4:
+            first.cancel()
+        return original(name)
+
+    repository.reencrypt = reencrypt_then_cancel
+    assert not first.run()
+    assert state.values["key_rotation"]["after"] == "profile-3"
+    assert len(security_manager.keyring) == 2
+
+    repository.reencrypt = original
+    second = KeyRotationJob(repository, security_manager, state_manager=state, batch_size=2)
+    assert second.run()
+    assert second.total == 3
+    assert state.values["key_rotation"] is None
+    assert all(security_manager.is_current(card) for card in stored_cards(repository))
+
+def test_old_keys_kept_while_profiles_use_them(repository, security_manager, sample_profile):
+    """Test that the job keeps the old keys when a profile was not moved to the new one"""
+    security_manager.rotate_key()
+    original = repository.reencrypt
+    repository.reencrypt = lambda name: False if name == "profile-5" else original(name)
+    job = KeyRotationJob(repository, security_manager)
+    assert not job.run()
+    assert len(security_manager.keyring) == 2
+    repository.invalidate()
+    assert repository.load("profile-5") == sample_profile
+
+def test_fills_read_during_rotation(repository, security_manager, sample_profile):
+    """Test that cached profiles keep loading while the job rewrites them"""
+    repository.load("profile-0")
+    security_manager.rotate_key()
+    job = KeyRotationJob(repository, security_manager, batch_size=1, pause=0.01)
+    thread = job.start()
+    deadline = time.monotonic() + 10
+    while thread.is_alive() and time.monotonic() < deadline:
+        assert repository.load("profile-0") == sample_profile
+    job.join(1)
+    assert job.done
@@ -0,0 +1,64 @@
+import pytest
+from pacing import AdaptivePacer, FixedPacer, Timing, create_pacer
+from utils.state_manager import StateManager
+
+@pytest.fixture
+def state_manager(temp_dir, monkeypatch):
+    """Create a StateManager rooted in a temporary directory"""
+    monkeypatch.chdir(temp_dir)
+    return StateManager()
+
+def test_adaptive_starts_aggressive():
+    """Test that unknown targets get only the floor delays"""
+    pacer = AdaptivePacer(max_field_delay=0.2, max_key_delay=0.05)
+    assert pacer.timing_for("Checkout") == Timing(0.02, 0.0, 0.02)
+
+def test_paste_delay_floor():
+    """Test that paste settle time never drops below the configured paste_delay"""
+    pacer = AdaptivePacer(max_field_delay=0.2, max_key_delay=0.05, min_field_delay=0.01, paste_delay=0.05)
+    assert pacer.timing_for("Checkout") == Timing(0.01, 0.0, 0.05)
+    adaptive = create_pacer({"field_delay": 0.2, "key_delay": 0.05, "paste_delay": 0.03})
+    assert adaptive.timing_for("Checkout").paste_delay == 0.03
+
+def test_backoff_and_recovery():
+    """Test that failures back off and successes recover"""
+    pacer = AdaptivePacer(max_field_delay=0.2, max_key_delay=0.05)
+    pacer.record_failure("Checkout")
+    first = pacer.timing_for("Checkout").field_delay - pacer.min_field_delay
+    assert first > 0
+    
+    pacer.record_failure("Checkout")
+    assert pacer.timing_for("Checkout").field_delay - pacer.min_field_delay == pytest.approx(first * 2)
+    
+    # Delays never exceed the configured worst case
+    for _ in range(10):
+        pacer.record_failure("Checkout")
+    assert pacer.timing_for("Checkout") == Timing(0.2, 0.05, 0.2)
+    
+    for _ in range(200):
+        pacer.record_success("Checkout")
+    assert pacer.timing_for("Checkout").field_delay == pacer.min_field_delay
+    
+    # Other targets are unaffected
+    assert pacer.level("Signup") == 0.0
+
+def test_learned_timings_persist(state_manager):
+    """Test that learned levels are stored and reloaded from state"""
+    pacer = AdaptivePacer(0.2, 0.05, state_manager=state_manager)
+    pacer.record_failure("Slow App")
+    pacer.save()
+    
+    reloaded = AdaptivePacer(0.2, 0.05, state_manager=state_manager)
+    assert reloaded.level("Slow App") == pacer.level("Slow App")
+
+def test_create_pacer_modes():
+    """Test pacer selection from configuration"""
+    config = {"field_delay": 0.2, "key_delay": 0.05, "paste_delay": 0.02}
+    assert isinstance(create_pacer(config), AdaptivePacer)
+    
+    fixed = create_pacer({**config, "timing_mode": "fixed"})
+    assert isinstance(fixed, FixedPacer)
+    assert fixed.timing_for("anything") == Timing(0.2, 0.05, 0.02)
+    
+    with pytest.raises(ValueError):
+        create_pacer({**config, "timing_mode": "psychic"})
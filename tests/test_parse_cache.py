@@ -0,0 +1,115 @@
+import os
+import threading
+import pytest
+from utils.parse_cache import ParseCache
+from utils.validator import DataValidator
+
+def test_memoizes_and_counts():
+    """Test that a key is parsed once and lookups are counted"""
+    cache = ParseCache(maxsize=2)
+    calls = []
+    parse = lambda: calls.append(1) or "parsed"
+    assert cache.get_or_parse("a", parse) == "parsed"
+    assert cache.get_or_parse("a", parse) == "parsed"
+    assert len(calls) == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5}
+
+def test_bounded_lru():
+    """Test that the least recently used entry is evicted"""
+    cache = ParseCache(maxsize=2)
+    for key in ("a", "b"):
+        cache.get_or_parse(key, lambda: key)
+    cache.get_or_parse("a", lambda: "again")
+    cache.get_or_parse("c", lambda: "c")
+    assert list(cache._entries) == ["a", "c"]
+
+def test_failed_parses_are_cached():
+    """Test that None results are remembered too"""
+    cache = ParseCache()
+    cache.get_or_parse("bad", lambda: None)
+    assert cache.get_or_parse("bad", lambda: "reparsed") is None
+
+def test_persistence(temp_dir):
+    """Test that entries survive a restart and unchanged caches are not rewritten"""
+    path = os.path.join(temp_dir, "cache.json")
+    cache = ParseCache(path=path)
+    cache.get_or_parse("k", lambda: {"e164": "+12102742163"})
+    assert cache.save()
+    assert not cache.save()
+    reloaded = ParseCache(path=path)
+    assert reloaded.get_or_parse("k", lambda: None) == {"e164": "+12102742163"}
+    assert reloaded.stats["hits"] == 1
+
+def test_thread_safety():
+    """Test concurrent lookups keep the cache bounded and the counters exact"""
+    cache = ParseCache(maxsize=50)
+
+    def worker():
+        for i in range(2000):
+            cache.get_or_parse(str(i % 100), lambda: i)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits + cache.misses == 16000
+    assert len(cache._entries) <= 50
+
+def test_validator_phone_parsing(temp_dir):
+    """Test that differently formatted copies of a number share one parse"""
+    pytest.importorskip("phonenumbers")
+    validator = DataValidator(cache_dir=temp_dir)
+    parsed = validator.parse_phone("(210) 274-2163")
+    assert parsed["e164"] == "+12102742163" and parsed["valid"]
+    assert validator.parse_phone("210.274.2163") == parsed
+    assert validator.parse_phone("not a number") is None
+    assert validator.cache_stats["phone"]["hits"] == 1
+    validator.save_caches()
+    assert DataValidator(cache_dir=temp_dir).phone_cache.stats["size"] == 2
+
+def test_validator_address_parsing():
+    """Test that addresses differing only in case and spacing share one parse"""
+    pytest.importorskip("postal.parser")
+    validator = DataValidator()
+    parsed = validator.parse_address("11800 Braesview  San Antonio TX 78213")
+    assert parsed["postcode"] == "78213"
+    assert validator.parse_address("11800 braesview san antonio tx 78213") == parsed
+    assert validator.cache_stats["address"]["hits"] == 1
+
+def test_results_are_copies():
+    """Test that mutating a returned result does not change the cache"""
+    cache = ParseCache()
+    first = cache.get_or_parse("k", lambda: {"region": "US"})
+    first["region"] = "GB"
+    again = cache.get_or_parse("k", lambda: None)
+    again["region"] = "FR"
+    assert cache.get_or_parse("k", lambda: None) == {"region": "US"}
+
+def test_repeat_profile_validation_hits_the_cache(sample_profile):
+    """Test that saving the same profile again does not reparse its phone number"""
+    pytest.importorskip("phonenumbers")
+    validator = DataValidator()
+    profile = dict(sample_profile, personal=dict(sample_profile["personal"], address="11800 Braesview"))
+    assert validator.validate_profile(profile) == []
+    assert validator.validate_profile(profile) == []
+    assert validator.cache_stats["phone"] == {"hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5}
+
+    # Passes the pattern, but has too few digits for a North American number
+    profile["personal"]["phone"] = "+1 999 999 999"
+    errors = validator.validate_profile(profile)
+    assert [(error.field, error.reason) for error in errors] == [("personal.phone", "Invalid phone number")]
+
+def test_import_pipeline_shares_the_cache(sample_profile):
+    """Test that bulk imports parse each distinct phone number once, across chunks"""
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("phonenumbers")
+    from utils.bulk_validation import ProfileImportPipeline
+    validator = DataValidator()
+    pipeline = ProfileImportPipeline(validator=validator)
+    frame = pd.DataFrame({"phone": ["(210) 274-2163", "210.274.2163", "+1 555 123 4567"]})
+    for offset in (0, 3):
+        normalized, errors = pipeline.process_chunk(frame, offset)
+    assert normalized["phone"].tolist() == ["+1 210-274-2163", "+1 210-274-2163", "+1 555-123-4567"]
+    assert errors.empty
+    assert validator.cache_stats["phone"]["misses"] == 2
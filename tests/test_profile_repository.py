@@ -0,0 +1,95 @@
+import os
+import json
+import pytest
+from unittest.mock import patch
+from profile_repository import ProfileRepository
+from profile_store import JsonProfileStore
+from security.encryption import SecurityManager
+from exceptions import ProfileError
+
+@pytest.fixture
+def repository(temp_dir):
+    return ProfileRepository(JsonProfileStore(os.path.join(temp_dir, "profiles")))
+
+def test_save_and_load_roundtrip(repository, sample_profile):
+    """Test that a saved profile loads back unchanged"""
+    assert repository.load("default") is None
+    assert repository.save("default", sample_profile)
+    assert repository.load("default") == sample_profile
+    assert repository.list_profiles() == ["default"]
+
+def test_saved_file_is_compact(repository, sample_profile):
+    """Test that profiles are written without indentation"""
+    repository.save("default", sample_profile)
+    with open(repository.store.path("default")) as f:
+        text = f.read()
+    assert "\n" not in text
+    assert json.loads(text) == sample_profile
+
+def test_cached_load_skips_disk(repository, sample_profile):
+    """Test that switching back to a recent profile does no I/O"""
+    repository.save("default", sample_profile)
+    with patch("builtins.open") as mock_open, patch("os.stat") as mock_stat:
+        assert repository.load("default") == sample_profile
+    mock_open.assert_not_called()
+    mock_stat.assert_not_called()
+
+def test_loaded_profile_is_a_copy(repository, sample_profile):
+    """Test that editing a loaded profile does not change the cache"""
+    repository.save("default", sample_profile)
+    profile = repository.load("default")
+    profile["personal"]["first_name"] = "Jane"
+    assert repository.load("default")["personal"]["first_name"] == "John"
+
+def test_external_change_invalidates(temp_dir, sample_profile):
+    """Test that an edit on disk is picked up once the entry is revalidated"""
+    repository = ProfileRepository(JsonProfileStore(os.path.join(temp_dir, "profiles")), revalidate_interval=0)
+    repository.save("default", sample_profile)
+    changed = dict(sample_profile, personal={"first_name": "Jane, edited elsewhere"})
+    with open(repository.store.path("default"), "w") as f:
+        json.dump(changed, f)
+    assert repository.load("default")["personal"] == {"first_name": "Jane, edited elsewhere"}
+
+def test_unchanged_save_is_skipped(repository, sample_profile):
+    """Test that saving an identical profile does not rewrite the file"""
+    assert repository.save("default", sample_profile)
+    assert not repository.save("default", sample_profile)
+
+def test_lru_eviction(temp_dir, sample_profile):
+    """Test that the cache holds at most cache_size profiles"""
+    repository = ProfileRepository(JsonProfileStore(os.path.join(temp_dir, "profiles")), cache_size=2)
+    for name in ("a", "b", "c"):
+        repository.save(name, sample_profile)
+    assert list(repository._cache) == ["b", "c"]
+    assert repository.load("a") == sample_profile
+
+def test_encrypted_profiles(temp_dir, sample_profile):
+    """Test that sensitive fields are encrypted on disk but not in the decrypted view"""
+    security = SecurityManager(os.path.join(temp_dir, "master.key"))
+    repository = ProfileRepository(JsonProfileStore(os.path.join(temp_dir, "profiles")), security_manager=security)
+    repository.save("default", sample_profile)
+    with open(repository.store.path("default")) as f:
+        stored = json.load(f)
+    assert stored["payment"]["card_number"] != sample_profile["payment"]["card_number"]
+    assert repository.load("default") == sample_profile
+
+    repository.invalidate()
+    assert repository.load("default") == sample_profile
+
+def test_corrupt_profile(repository):
+    """Test that an unreadable profile raises ProfileError"""
+    with open(repository.store.path("broken"), "w") as f:
+        f.write("{not json")
+    with pytest.raises(ProfileError):
+        repository.load("broken")
+
+def test_envelope_partial_update(temp_dir, sample_profile):
+    """Test that partial updates of sealed profiles keep the envelope intact"""
+    security = SecurityManager(os.path.join(temp_dir, "master.key"), envelope=True)
+    repository = ProfileRepository(JsonProfileStore(os.path.join(temp_dir, "profiles")), security_manager=security)
+    repository.save("default", sample_profile)
+    repository.update_fields("default", {("payment", "cvv"): "999"})
+    repository.invalidate()
+    profile = repository.load("default")
+    assert profile["payment"]["cvv"] == "999"
+    assert profile["personal"]["ssn"] == sample_profile["personal"]["ssn"]
@@ -0,0 +1,127 @@
+import os
+import pytest
+from profile_store import ProfileStore, JsonProfileStore, SQLiteProfileStore, create_profile_store
+from profile_repository import ProfileRepository
+from exceptions import ProfileError
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, temp_dir):
+    if request.param == "json":
+        store = JsonProfileStore(os.path.join(temp_dir, "profiles"))
+    else:
+        store = SQLiteProfileStore(os.path.join(temp_dir, "profiles.db"))
+    yield store
+    store.close()
+
+def test_roundtrip_preserves_types_and_order(store, sample_profile):
+    """Test that a profile loads back with its value types and field order"""
+    store.save("default", sample_profile)
+    profile, stamp = store.load("default")
+    assert profile == sample_profile
+    assert list(profile["personal"]) == list(sample_profile["personal"])
+    assert profile["preferences"]["newsletter"] is True
+    assert stamp == store.stamp("default")
+
+def test_missing_profile(store):
+    """Test that missing profiles load as None"""
+    assert store.load("nobody") == (None, None)
+    assert store.stamp("nobody") is None
+    assert store.get_field("nobody", "personal", "email", "n/a") == "n/a"
+
+def test_update_fields(store, sample_profile):
+    """Test partial updates of existing and new fields"""
+    store.save("default", sample_profile)
+    before = store.stamp("default")
+    store.update_fields("default", {("personal", "email"): "jane@example.com",
+                                    ("personal", "nickname"): "JD"})
+    profile, _ = store.load("default")
+    assert profile["personal"]["email"] == "jane@example.com"
+    assert list(profile["personal"])[-1] == "nickname"
+    assert profile["payment"] == sample_profile["payment"]
+    assert store.stamp("default") != before
+    assert store.get_field("default", "personal", "email") == "jane@example.com"
+
+def test_update_missing_profile(store):
+    """Test that partial updates need an existing profile"""
+    with pytest.raises(ProfileError):
+        store.update_fields("nobody", {("personal", "email"): "x@example.com"})
+
+def test_list_and_delete(store, sample_profile):
+    """Test listing by prefix and deleting profiles"""
+    for name in ("work", "work-2", "home"):
+        store.save(name, sample_profile)
+    assert store.list_profiles() == ["home", "work", "work-2"]
+    assert store.list_profiles("work") == ["work", "work-2"]
+    store.delete("work")
+    assert store.list_profiles() == ["home", "work-2"]
+    assert store.load("work") == (None, None)
+
+def test_store_interface_is_abstract():
+    """Test that a store missing part of the interface cannot be created"""
+    class Incomplete(ProfileStore):
+        def load(self, name):
+            return None, None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_sqlite_stamp_survives_recreation(temp_dir, sample_profile):
+    """Test that a deleted and recreated profile never gets one of its old stamps"""
+    store = SQLiteProfileStore(os.path.join(temp_dir, "profiles.db"))
+    first = store.save("work", sample_profile)
+    store.delete("work")
+    store.save("other", sample_profile)
+    assert store.save("work", sample_profile) not in (first, None)
+    store.close()
+
+    reopened = SQLiteProfileStore(os.path.join(temp_dir, "profiles.db"))
+    assert reopened.save("new", sample_profile) > reopened.stamp("work")
+    reopened.close()
+
+def test_sqlite_uses_wal_and_indexes(temp_dir, sample_profile):
+    """Test that the SQLite store runs in WAL mode and answers lookups from indexes"""
+    store = SQLiteProfileStore(os.path.join(temp_dir, "profiles.db"))
+    store.save("default", sample_profile)
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(row[-1] for row in store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT f.value FROM profile_fields f JOIN profiles p ON p.id = f.profile_id "
+        "WHERE p.name = ? AND f.section = ? AND f.field = ?", ("default", "personal", "email")
+    ))
+    assert "SCAN" not in plan
+    store.close()
+
+def test_sqlite_json_import_export(temp_dir, sample_profile):
+    """Test bulk migration from and back to the one-file-per-profile layout"""
+    source = JsonProfileStore(os.path.join(temp_dir, "profiles"))
+    source.save("default", sample_profile)
+    source.save("work", sample_profile)
+
+    store = SQLiteProfileStore(os.path.join(temp_dir, "profiles.db"))
+    assert store.import_json(source.profiles_dir) == 2
+    assert store.load("work")[0] == sample_profile
+
+    assert store.export_json(os.path.join(temp_dir, "exported")) == 2
+    assert JsonProfileStore(os.path.join(temp_dir, "exported")).load("default")[0] == sample_profile
+    store.close()
+
+def test_create_profile_store_migrates_json(temp_dir, sample_profile):
+    """Test that the first SQLite store created imports existing JSON profiles"""
+    profiles_dir = os.path.join(temp_dir, "profiles")
+    JsonProfileStore(profiles_dir).save("default", sample_profile)
+    store = create_profile_store({"profile_store": "sqlite"}, profiles_dir)
+    assert isinstance(store, SQLiteProfileStore)
+    assert store.load("default")[0] == sample_profile
+    store.close()
+    assert isinstance(create_profile_store({"profile_store": "json"}, profiles_dir), JsonProfileStore)
+    with pytest.raises(ValueError):
+        create_profile_store({"profile_store": "floppy"}, profiles_dir)
+
+def test_repository_partial_update_keeps_cache(store, sample_profile):
+    """Test that partial updates through the repository refresh the cached profile"""
+    repository = ProfileRepository(store, revalidate_interval=0)
+    repository.save("default", sample_profile)
+    repository.update_fields("default", {("payment", "cvv"): "999"})
+    assert repository.load("default")["payment"]["cvv"] == "999"
+    assert repository.get_field("default", "payment", "cvv") == "999"
+    repository.invalidate()
+    assert repository.get_field("default", "payment", "cvv") == "999"
@@ -0,0 +1,87 @@
+import pytest
+from retry import RetryPolicy
+from config import AppConfig
+from exceptions import FillAbortedError
+
+class FakeClock:
+    """Deterministic clock whose sleep just advances time"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def failing(times):
+    calls = {"count": 0}
+    def operation():
+        calls["count"] += 1
+        if calls["count"] <= times:
+            raise RuntimeError("dropped input")
+    operation.calls = calls
+    return operation
+
+def test_backoff_is_exponential_and_capped():
+    """Test exponential growth, cap and jitter range"""
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.5, jitter=0.5)
+    assert policy.backoff(0, rng=lambda: 0.0) == pytest.approx(0.1)
+    assert policy.backoff(2, rng=lambda: 0.0) == pytest.approx(0.4)
+    assert policy.backoff(5, rng=lambda: 0.0) == pytest.approx(0.5)
+    assert policy.backoff(2, rng=lambda: 1.0) == pytest.approx(0.2)
+
+def test_retries_until_success():
+    """Test iterative retries and on_retry notifications"""
+    clock = FakeClock()
+    session = RetryPolicy(max_attempts=3, jitter=0).start(sleep=clock.sleep, clock=clock)
+    retried = []
+    
+    assert session.run(failing(2), on_retry=lambda attempt, e: retried.append(attempt)) is True
+    assert retried == [0, 1]
+    assert clock.sleeps == [pytest.approx(0.05), pytest.approx(0.1)]
+
+def test_gives_up_after_max_attempts():
+    """Test that a field fails after max_attempts without a trailing sleep"""
+    clock = FakeClock()
+    session = RetryPolicy(max_attempts=3, jitter=0).start(sleep=clock.sleep, clock=clock)
+    operation = failing(10)
+    
+    assert session.run(operation) is False
+    assert operation.calls["count"] == 3
+    assert len(clock.sleeps) == 2
+
+def test_circuit_breaker_aborts_fill():
+    """Test that consecutive failed fields abort the remaining ones"""
+    clock = FakeClock()
+    session = RetryPolicy(max_attempts=1, breaker_threshold=2).start(sleep=clock.sleep, clock=clock)
+    
+    assert session.run(failing(1)) is False
+    assert session.run(lambda: None) is True  # A success resets the count
+    assert session.run(failing(1)) is False
+    assert session.run(failing(1)) is False
+    with pytest.raises(FillAbortedError):
+        session.run(lambda: None)
+
+def test_deadline_bounds_wall_time():
+    """Test that backoff never sleeps past the fill deadline"""
+    clock = FakeClock()
+    policy = RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=10.0, jitter=0, deadline=5.0)
+    session = policy.start(sleep=clock.sleep, clock=clock)
+    
+    with pytest.raises(FillAbortedError):
+        session.run(failing(100))
+    assert clock.now == pytest.approx(5.0)
+
+def test_policy_from_config():
+    """Test building a policy from FormFillerConfig and the GUI config dict"""
+    policy = RetryPolicy.from_config(AppConfig.get_default().form_filler)
+    assert policy.max_attempts == 3
+    assert policy.breaker_threshold == 3
+    
+    policy = RetryPolicy.from_config({"retry_attempts": 5, "fill_deadline": 2.0})
+    assert policy.max_attempts == 5
+    assert policy.deadline == 2.0
+    assert policy.base_delay == RetryPolicy().base_delay
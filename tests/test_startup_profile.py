@@ -0,0 +1,61 @@
+import os
+import sys
+import subprocess
+from startup_profile import parse_importtime, profile_imports, format_report, record_cold_start
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _json
+import time:       900 |       1020 | json
+garbage line
+"""
+
+class FakeStateStore:
+    def __init__(self):
+        self.state = {}
+        self.saves = 0
+
+    def get_state_value(self, key, default=None):
+        return self.state.get(key, default)
+
+    def update_state(self, key, value):
+        self.state[key] = value
+
+    def save_state(self, force=False):
+        self.saves += 1
+
+def test_parse_importtime():
+    """Test parsing of the -X importtime report"""
+    timings = parse_importtime(SAMPLE_OUTPUT)
+    assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+        ("_json", 120, 120, 1),
+        ("json", 900, 1020, 0)
+    ]
+    report = format_report(timings)
+    assert report.splitlines()[1].endswith("json")
+
+def test_profile_imports_runs_fresh_interpreter():
+    """Test that profiling reports imports from a cold interpreter"""
+    modules = {timing.module for timing in profile_imports("json")}
+    assert "json" in modules
+
+def test_heavy_modules_are_not_imported_eagerly():
+    """Test that importing the app modules leaves heavy dependencies unloaded"""
+    code = (
+        "import sys, field_classifier, field_mapping, utils.validator\n"
+        "heavy = ('sklearn', 'pandas', 'postal', 'phonenumbers', 'Levenshtein')\n"
+        "print(','.join(m for m in heavy if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_ROOT)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+def test_record_cold_start_keeps_recent_history():
+    """Test that cold start measurements are capped and persisted"""
+    store = FakeStateStore()
+    for i in range(5):
+        history = record_cold_start(store, 0.5 + i, keep=3)
+    assert [entry["seconds"] for entry in history] == [2.5, 3.5, 4.5]
+    assert store.state["cold_start"] == history
+    assert store.saves == 5
@@ -2,6 +2,7 @@ import pytest
 import os
 import json
 import time
+import threading
 from utils.state_manager import StateManager
 from datetime import datetime
 
@@ -179,3 +180,241 @@ def test_error_handling(state_manager, temp_dir):
     finally:
         # Restore permissions for cleanup
         os.chmod(temp_dir, 0o777)
+
+@pytest.fixture
+def write_behind_manager(temp_dir):
+    """StateManager in write-behind mode with a short flush interval"""
+    manager = StateManager(write_behind=True, flush_interval=0.05)
+    manager.state_file = os.path.join(temp_dir, "app_state.json")
+    manager.backup_dir = os.path.join(temp_dir, "backups")
+    yield manager
+    manager.close()
+
+def test_write_behind_coalesces_updates(write_behind_manager):
+    """Test that many updates in write-behind mode result in a single write"""
+    saves = []
+    original_save = write_behind_manager.save_state
+    write_behind_manager.save_state = lambda force=False: saves.append(force) or original_save(force)
+    
+    for i in range(100):
+        assert write_behind_manager.update_state(f"key_{i}", i)
+    assert not os.path.exists(write_behind_manager.state_file)
+    
+    time.sleep(0.3)
+    assert saves == [True]
+    with open(write_behind_manager.state_file) as f:
+        assert json.load(f)["key_99"] == 99
+
+def test_close_flushes_pending_changes(write_behind_manager):
+    """Test that closing the manager writes changes the flusher has not saved yet"""
+    write_behind_manager.flush_interval = 60
+    write_behind_manager.update_state("pending", True)
+    write_behind_manager.close()
+    with open(write_behind_manager.state_file) as f:
+        assert json.load(f)["pending"] is True
+
+def test_save_is_atomic(state_manager):
+    """Test that saves leave no temporary files behind and keep the old file on failure"""
+    os.makedirs(state_manager.backup_dir, exist_ok=True)
+    state_manager.update_state("key", "value")
+    assert state_manager.save_state(force=True)
+    
+    state_manager.update_state("unserializable", object())
+    assert not state_manager.save_state(force=True)
+    with open(state_manager.state_file) as f:
+        assert json.load(f)["key"] == "value"
+    assert not [f for f in os.listdir(os.path.dirname(state_manager.state_file)) if f.endswith(".tmp")]
+
+def test_backup_ring_prunes_without_rescanning(state_manager):
+    """Test that saves keep backup_count backups and never list the directory"""
+    from unittest.mock import patch
+    os.makedirs(state_manager.backup_dir, exist_ok=True)
+    with patch("os.listdir", wraps=os.listdir) as listdir:
+        for i in range(10):
+            state_manager.update_state("counter", i)
+            assert state_manager.save_state(force=True)
+    assert listdir.call_count <= 1
+    backups = os.listdir(state_manager.backup_dir)
+    assert len(backups) == state_manager.backup_count
+    assert len(state_manager.list_backups()) == state_manager.backup_count
+
+def test_history_journal_replay(state_manager):
+    """Test that history is rebuilt from the journal on load"""
+    for i in range(5):
+        state_manager.add_to_history({"action": f"command_{i}"})
+    state_manager.undo_last_command()
+    
+    state_manager.command_history.clear()
+    state_manager.load_state()
+    assert [c["action"] for c in state_manager.command_history] == [f"command_{i}" for i in range(4)]
+
+def test_history_does_not_rewrite_state(state_manager):
+    """Test that history operations only append to the journal"""
+    from unittest.mock import patch
+    with patch.object(state_manager, "save_state") as save_state:
+        state_manager.add_to_history({"action": "edit"})
+        state_manager.undo_last_command()
+    save_state.assert_not_called()
+    with open(state_manager.history_journal) as f:
+        assert len(f.readlines()) == 2
+
+def test_history_journal_compaction(state_manager):
+    """Test that the journal is compacted into a snapshot and still replays"""
+    state_manager.journal_compact_every = 10
+    for i in range(25):
+        state_manager.add_to_history({"action": f"command_{i}"})
+    with open(state_manager.history_journal) as f:
+        assert len(f.readlines()) <= 10
+    
+    state_manager.load_state()
+    assert [c["action"] for c in state_manager.command_history] == [f"command_{i}" for i in range(25)]
+
+def test_history_journal_torn_line(state_manager):
+    """Test that a partially written last entry is skipped on replay"""
+    state_manager.add_to_history({"action": "kept"})
+    with open(state_manager.history_journal, 'a') as f:
+        f.write('{"op":"push","comm')
+    state_manager.load_state()
+    assert list(state_manager.command_history) == [{"action": "kept"}]
+
+def test_unchanged_state_is_not_backed_up_again(state_manager):
+    """Test that saving an unchanged state adds no backup point"""
+    state_manager.update_state("key", "value")
+    for _ in range(5):
+        assert state_manager.save_state(force=True)
+    assert len(state_manager.list_backups()) == 1
+    assert len(os.listdir(state_manager.backup_dir)) == 1
+
+def test_identical_states_share_backup_file(state_manager):
+    """Test that points with the same contents reuse one compressed file"""
+    for value in ("a", "b", "a"):
+        state_manager.update_state("key", value)
+        state_manager.save_state(force=True)
+    points = state_manager.list_backups()
+    assert len(points) == 3
+    assert points[0]["file"] == points[2]["file"]
+    assert len(os.listdir(state_manager.backup_dir)) == 2
+
+def test_restore_any_retained_point(state_manager):
+    """Test restoring the latest and an older backup point"""
+    for i in range(3):
+        state_manager.update_state("counter", i)
+        state_manager.save_state(force=True)
+    points = list(state_manager.list_backups())
+    assert state_manager.restore_from_backup()["counter"] == 2
+    assert state_manager.restore_from_backup(points[0]["timestamp"])["counter"] == 0
+    
+    # The manifest is all a fresh manager needs
+    other = StateManager()
+    other.state_file = state_manager.state_file
+    other.backup_dir = state_manager.backup_dir
+    assert other.restore_from_backup(points[1]["timestamp"])["counter"] == 1
+
+def test_backup_pruning_keeps_shared_files(state_manager):
+    """Test that pruning a point keeps files still used by retained points"""
+    state_manager.backup_count = 2
+    for value in ("a", "b", "a", "c"):
+        state_manager.update_state("key", value)
+        state_manager.save_state(force=True)
+    assert [state_manager._read_backup(p)["key"] for p in state_manager.list_backups()] == ["a", "c"]
+    assert len(os.listdir(state_manager.backup_dir)) == 2
+
+def test_snapshots_are_immutable(state_manager):
+    """Test that a snapshot keeps its version after later writes"""
+    state_manager.update_state("theme", "light")
+    snapshot = state_manager.snapshot()
+    state_manager.update_state("theme", "dark")
+    assert snapshot["theme"] == "light"
+    assert state_manager.get_state_value("theme") == "dark"
+    with pytest.raises(TypeError):
+        state_manager.state["theme"] = "blue"
+
+def test_writers_do_not_wait_for_disk(state_manager):
+    """Test that updates proceed while a save is writing to disk"""
+    import threading
+    os.makedirs(state_manager.backup_dir, exist_ok=True)
+    writing = threading.Event()
+    release = threading.Event()
+    original_write = state_manager._write_atomic
+    
+    def slow_write(path, data, binary=False):
+        writing.set()
+        release.wait(5)
+        original_write(path, data, binary)
+    
+    state_manager._write_atomic = slow_write
+    saver = threading.Thread(target=state_manager.save_state, kwargs={"force": True})
+    saver.start()
+    assert writing.wait(5)
+    
+    state_manager.auto_save_interval = 3600
+    updater = threading.Thread(target=state_manager.update_state, args=("during_save", 1))
+    updater.start()
+    updater.join(1)
+    assert not updater.is_alive()
+    assert state_manager.get_state_value("during_save") == 1
+    release.set()
+    saver.join()
+
+def test_close_saves_changes_made_during_a_flush(temp_dir):
+    """Test that a change made while the flusher is saving is written at close"""
+    manager = StateManager(write_behind=True, flush_interval=0.0)
+    manager.state_file = os.path.join(temp_dir, "app_state.json")
+    manager.backup_dir = os.path.join(temp_dir, "backups")
+    saving = threading.Event()
+    release = threading.Event()
+    original = manager.save_state
+
+    def slow_save(force=False):
+        # The next change lands after this save took its snapshot
+        saved = original(force=force)
+        saving.set()
+        release.wait(5)
+        return saved
+
+    manager.save_state = slow_save
+    manager.update_state("theme", "dark")
+    assert saving.wait(5)
+    manager.update_state("theme", "light")
+    closer = threading.Thread(target=manager.close)
+    closer.start()
+    time.sleep(0.05)
+    release.set()
+    closer.join(5)
+    with open(manager.state_file) as f:
+        assert json.load(f)["theme"] == "light"
+
+@pytest.mark.slow
+def test_concurrent_stress(temp_dir, record_property):
+    """Stress benchmark: many threads reading and writing in write-behind mode"""
+    import threading
+    manager = StateManager(write_behind=True, flush_interval=0.01)
+    manager.state_file = os.path.join(temp_dir, "app_state.json")
+    manager.backup_dir = os.path.join(temp_dir, "backups")
+    threads, per_thread = 16, 2000
+    errors = []
+    
+    def worker(n):
+        try:
+            for i in range(per_thread):
+                manager.update_state(f"thread_{n}", i)
+                assert manager.get_state_value(f"thread_{n}") == i
+                manager.get_state_value("theme")
+        except Exception as e:
+            errors.append(e)
+    
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    manager.close()
+    
+    assert errors == []
+    with open(manager.state_file) as f:
+        saved = json.load(f)
+    assert all(saved[f"thread_{n}"] == per_thread - 1 for n in range(threads))
+    record_property("state_operations_per_second", round(threads * per_thread * 3 / elapsed))
+    record_property("threads", threads)
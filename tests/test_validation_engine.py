@@ -0,0 +1,55 @@
+import time
+import pytest
+from utils.validation_engine import ValidationEngine, validation_engine
+from exceptions import ValidationError
+
+def test_validate_profile_collects_all_errors(sample_profile):
+    """Test that one pass reports every invalid field with its section"""
+    profile = dict(sample_profile, personal=dict(sample_profile["personal"],
+                                                 email="not-an-email", dob="01.09.1991"))
+    errors = validation_engine.validate_profile(profile)
+    assert all(isinstance(error, ValidationError) for error in errors)
+    assert sorted(error.field for error in errors) == ["personal.dob", "personal.email"]
+    assert validation_engine.validate_profile(sample_profile) == []
+
+def test_formatting_characters_are_normalized():
+    """Test that phone and card numbers may be typed with separators"""
+    assert validation_engine.is_valid("phone", "210-274-2163")
+    assert validation_engine.is_valid("card_number", "4111 1111 1111 1111")
+    assert validation_engine.standardize("phone", "(210) 274-2163") == "+1 210-274-2163"
+
+def test_aliases_and_unknown_fields():
+    """Test that aliased fields share a rule and unknown or empty fields pass"""
+    assert not validation_engine.is_valid("billing_zip", "7821")
+    assert not validation_engine.is_valid("first_name", "J0hn")
+    assert validation_engine.is_valid("favourite_colour", "#$%")
+    assert validation_engine.is_valid("email", "")
+    assert validation_engine.is_valid("newsletter", True)
+
+def test_names_in_any_script():
+    """Test that names with non-ASCII letters are accepted and digits or symbols are not"""
+    for name in ("José", "Zoë", "Mary Jane O'Connor", "Jean-Luc", "Łukasz", "李小龍"):
+        assert validation_engine.is_valid("first_name", name)
+    for name in ("J0hn", "J@hn", "_John", "-John"):
+        assert not validation_engine.is_valid("first_name", name)
+
+def test_custom_rules():
+    """Test that an engine can be built from its own rule table"""
+    engine = ValidationEngine(rules={"zip": validation_engine.rules["zip"]}, aliases={})
+    assert engine.validate_field("zip", "abc") == (False, "Invalid ZIP code, expected XXXXX or XXXXX-XXXX")
+    assert engine.is_valid("billing_zip", "abc")
+
+@pytest.mark.slow
+def test_validation_throughput(sample_profile, record_property):
+    """Benchmark field validations per second"""
+    fields = [(field, value) for values in sample_profile.values() if isinstance(values, dict)
+              for field, value in values.items()]
+    fields += [("phone", "(210) 274-2163"), ("url", "https://example.com/a"), ("dob", "09/01/1991")]
+    count = 200_000
+    check = validation_engine.check
+    start = time.perf_counter()
+    for i in range(count):
+        check(*fields[i % len(fields)])
+    rate = count / (time.perf_counter() - start)
+    record_property("validations_per_second", round(rate))
+    assert rate > 100_000
@@ -0,0 +1,54 @@
+import pytest
+import tkinter as tk
+from virtual_list import VirtualFieldList
+
+@pytest.fixture
+def root():
+    """Tk root window; skipped where no display is available"""
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"Tk unavailable: {e}")
+    root.geometry("400x300")
+    yield root
+    root.destroy()
+
+@pytest.fixture
+def view(root):
+    edits = []
+    view = VirtualFieldList(root, on_edit=lambda field, value: edits.append((field, value)))
+    view.edits = edits
+    view.pack(fill='both', expand=True)
+    root.update()
+    return view
+
+def test_only_visible_rows_get_widgets(view):
+    """Test that a large section creates a viewport's worth of rows"""
+    view.set_source({f"field_{i}": str(i) for i in range(5000)})
+    view.update()
+    assert 0 < len(view.rows) < 50
+    assert view.visible_fields[0] == "field_0"
+
+def test_scrolling_rebinds_rows(view):
+    """Test that scrolling reuses the row pool for later fields"""
+    view.set_source({f"field_{i}": str(i) for i in range(5000)})
+    view.update()
+    pool_size = len(view.rows)
+    view.yview("moveto", 0.5)
+    assert len(view.rows) == pool_size
+    assert view.visible_fields[0] == "field_2500"
+    assert view.rows[0].text_var.get() == "2500"
+
+def test_edits_are_reported_not_rebinds(view):
+    """Test that user edits reach on_edit but rebinding does not"""
+    view.set_source({"first_name": "John", "newsletter": True})
+    assert view.edits == []
+    view.rows[0].text_var.set("Jane")
+    view.rows[1].bool_var.set(False)
+    assert view.edits == [("first_name", "Jane"), ("newsletter", False)]
+
+def test_value_override(view):
+    """Test that the value callback decides what rows display"""
+    source = {"city": "Austin"}
+    view.set_source(source, lambda field: "Dallas")
+    assert view.rows[0].text_var.get() == "Dallas"
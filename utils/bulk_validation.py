@@ -0,0 +1,192 @@
+import importlib.util
+import os
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator, Optional, Tuple
+from lazy_import import lazy_import
+from utils.validation_engine import ValidationEngine, FieldRule, validation_engine, MIN_AGE_YEARS
+from utils.validator import DataValidator, ADDRESS_FIELDS
+
+pd = lazy_import("pandas")
+pq = lazy_import("pyarrow.parquet")
+pa = lazy_import("pyarrow")
+
+# Input formats accepted for dates, tried in order; output is always MM/DD/YYYY
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%d.%m.%Y")
+
+ERROR_COLUMNS = ["row", "field", "value", "reason"]
+
+def _require_pyarrow():
+    """Fail with the fix spelled out when a Parquet file is used without pyarrow"""
+    if not pa.loaded and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Parquet files need pyarrow; install it with 'pip install pyarrow'")
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    invalid_rows: int = 0
+    errors: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def valid_rows(self) -> int:
+        return self.rows - self.invalid_rows
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+class ProfileImportPipeline:
+    """Validates and normalizes spreadsheet exports of profiles, one chunk at a time.
+
+    Each column is checked with the ValidationEngine rule for its field
+    (a "personal.phone" header uses the phone rule), with whole-column
+    pandas string operations instead of a Python loop per value. Phone
+    numbers and addresses are then parsed through the validator's memo
+    caches, once per distinct value. Valid values are rewritten in their
+    canonical form: phone numbers in international format (+1 XXX-XXX-XXXX)
+    and dates as MM/DD/YYYY. Invalid values are left as they were and listed
+    in the error report, one line per bad field. Only one chunk of chunksize
+    rows is in memory at a time.
+    """
+    def __init__(self, engine: Optional[ValidationEngine] = None, chunksize: int = 10_000,
+                 validator: Optional[DataValidator] = None):
+        self.engine = engine or validation_engine
+        self.chunksize = chunksize
+        self.validator = validator or DataValidator(self.engine)
+
+    def read_chunks(self, path: str) -> Iterator['pd.DataFrame']:
+        """DataFrames of at most chunksize rows, every column read as text"""
+        if path.endswith(".parquet"):
+            _require_pyarrow()
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize):
+                yield batch.to_pandas().astype("object").fillna("").astype(str)
+        else:
+            yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=self.chunksize)
+
+    def process_chunk(self, frame: 'pd.DataFrame', offset: int = 0) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+        """Normalized copy of the chunk and its errors; rows are numbered from offset"""
+        normalized = frame.copy()
+        errors = []
+        for column in frame.columns:
+            field = str(column).rsplit(".", 1)[-1]
+            name = self.engine.rule_name(field)
+            if name is not None:
+                rule = self.engine.rules[name]
+                values, invalid = self._validate_column(name, rule, frame[column])
+                normalized[column] = values
+                reason = f"{rule.message}, expected {rule.format}" if rule.format else rule.message
+            elif field in ADDRESS_FIELDS:
+                invalid, reason = self._validate_addresses(frame[column]), "Unrecognized address"
+            else:
+                continue
+            if invalid.any():
+                errors.append(pd.DataFrame({
+                    "row": invalid.index[invalid.to_numpy()] - frame.index[0] + offset,
+                    "field": column,
+                    "value": frame[column][invalid].to_numpy(),
+                    "reason": reason,
+                }))
+        if not errors:
+            return normalized, pd.DataFrame(columns=ERROR_COLUMNS)
+        report = pd.concat(errors, ignore_index=True).sort_values("row", kind="stable", ignore_index=True)
+        return normalized, report
+
+    def _validate_column(self, name: str, rule: FieldRule, values: 'pd.Series') -> Tuple['pd.Series', 'pd.Series']:
+        text = values.fillna("").astype(str).str.strip()
+        present = text != ""
+        if rule.strip_chars:
+            text = text.str.translate(str.maketrans("", "", rule.strip_chars))
+
+        if name == "dob":
+            parsed = self._parse_dates(text)
+            cutoff = pd.Timestamp(date.today()) - pd.DateOffset(years=MIN_AGE_YEARS)
+            valid = parsed.notna() & (parsed.dt.year >= 1900) & (parsed <= cutoff)
+            text = text.where(parsed.isna(), parsed.dt.strftime("%m/%d/%Y"))
+        else:
+            valid = text.str.fullmatch(rule.pattern.pattern).fillna(False).astype(bool)
+            if rule.check is not None and valid.any():
+                valid[valid] = text[valid].map(rule.check).astype(bool)
+
+        if name == "phone" and valid.any():
+            # One memoized parse per distinct number, shared with saves and later chunks
+            parsed = {value: self.validator.parse_phone(value) for value in text[valid].unique()}
+            canonical = {value: number["international"] for value, number in parsed.items()
+                         if number is not None and number["possible"]}
+            valid[valid] = text[valid].isin(canonical.keys())
+            text = text.copy()
+            text[valid] = text[valid].map(canonical)
+        elif name == "email":
+            text = text.str.lower()
+        elif name == "name":
+            text = text.str.title()
+
+        invalid = present & ~valid
+        return text.where(present & valid, values), invalid
+
+    def _validate_addresses(self, values: 'pd.Series') -> 'pd.Series':
+        """Mask of addresses libpostal finds nothing in; all False when libpostal is not installed"""
+        text = values.fillna("").astype(str).str.strip()
+        present = text != ""
+        reasons = {value: self.validator.address_error(value) for value in text[present].unique()}
+        return present & text.map(reasons).notna()
+
+    @staticmethod
+    def _parse_dates(text: 'pd.Series') -> 'pd.Series':
+        parsed = pd.to_datetime(text, format=DATE_FORMATS[0], errors="coerce")
+        for date_format in DATE_FORMATS[1:]:
+            missing = parsed.isna()
+            if not missing.any():
+                break
+            parsed[missing] = pd.to_datetime(text[missing], format=date_format, errors="coerce")
+        return parsed
+
+    def run(self, source: str, output: Optional[str] = None, error_report: Optional[str] = None,
+            keep_invalid: bool = False) -> ImportReport:
+        """Stream source through the pipeline, writing normalized rows and the error report.
+
+        Rows with any invalid field are left out of output unless keep_invalid is set.
+        """
+        report = ImportReport()
+        start = time.perf_counter()
+        writer = None
+        for path in (output, error_report):
+            if path and os.path.exists(path):
+                os.remove(path)
+        try:
+            for chunk in self.read_chunks(source):
+                normalized, errors = self.process_chunk(chunk, offset=report.rows)
+                bad_rows = errors["row"].unique()
+                report.chunks += 1
+                report.errors += len(errors)
+                report.invalid_rows += len(bad_rows)
+                if output:
+                    if not keep_invalid and len(bad_rows):
+                        keep = ~pd.Series(range(report.rows, report.rows + len(chunk)),
+                                          index=normalized.index).isin(bad_rows)
+                        normalized = normalized[keep]
+                    writer = self._write(normalized, output, writer)
+                if error_report and len(errors):
+                    errors.to_csv(error_report, mode="a", index=False,
+                                  header=not os.path.exists(error_report))
+                report.rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _write(frame: 'pd.DataFrame', path: str, writer=None):
+        """Append a chunk to a CSV or Parquet file; returns the open Parquet writer, if any"""
+        if not path.endswith(".parquet"):
+            frame.to_csv(path, mode="a", index=False, header=not os.path.exists(path))
+            return None
+        _require_pyarrow()
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+        return writer
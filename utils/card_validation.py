@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class CardNetwork:
+    name: str
+    lengths: FrozenSet[int]
+
+@dataclass(frozen=True)
+class CardCheck:
+    valid: bool
+    network: Optional[str] = None
+    reason: Optional[str] = None
+
+# IIN prefixes per network; (low, high) tuples are inclusive ranges of equal-length prefixes
+CARD_NETWORKS: Tuple[Tuple[str, Tuple[int, ...], Tuple[object, ...]], ...] = (
+    ("visa", (13, 16, 19), ("4",)),
+    ("mastercard", (16,), (("51", "55"), ("2221", "2720"))),
+    ("amex", (15,), ("34", "37")),
+    ("discover", (16, 17, 18, 19), ("6011", ("644", "649"), "65", ("622126", "622925"))),
+    ("diners", (14, 15, 16, 17, 18, 19), (("300", "305"), "3095", "36", ("38", "39"))),
+    ("jcb", (16, 17, 18, 19), (("3528", "3589"),)),
+    ("unionpay", (16, 17, 18, 19), ("62", "81")),
+    ("maestro", (12, 13, 14, 15, 16, 17, 18, 19), ("50", ("56", "58"), "6304", "6759", "676770", "676774")),
+)
+
+# Luhn doubling of each digit, with the digits of the result already summed
+_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_DIGITS = {str(d): d for d in range(10)}
+_SEPARATORS = str.maketrans("", "", " -")
+
+class _Node:
+    __slots__ = ("children", "network")
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.network: Optional[CardNetwork] = None
+
+class BinTrie:
+    """Digit trie of IIN prefixes; the longest matching prefix decides the network.
+
+    Ranges are expanded into their prefixes when the trie is built, so a
+    lookup walks at most one node per digit of the longest prefix and
+    allocates nothing.
+    """
+    def __init__(self, networks=CARD_NETWORKS):
+        self.root = _Node()
+        for name, lengths, prefixes in networks:
+            network = CardNetwork(name, frozenset(lengths))
+            for prefix in prefixes:
+                if isinstance(prefix, tuple):
+                    low, high = prefix
+                    for value in range(int(low), int(high) + 1):
+                        self.add(str(value).zfill(len(low)), network)
+                else:
+                    self.add(prefix, network)
+
+    def add(self, prefix: str, network: CardNetwork):
+        node = self.root
+        for digit in prefix:
+            node = node.children.setdefault(digit, _Node())
+        node.network = network
+
+    def lookup(self, number: str) -> Optional[CardNetwork]:
+        node = self.root
+        found = None
+        for digit in number:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.network is not None:
+                found = node.network
+        return found
+
+BIN_TRIE = BinTrie()
+
+def luhn_valid(number: str) -> bool:
+    """Luhn checksum of a string of digits; False for anything else"""
+    if not number:
+        return False
+    total = 0
+    double = False
+    digits = _DIGITS
+    doubled = _DOUBLED
+    for char in reversed(number):
+        digit = digits.get(char)
+        if digit is None:
+            return False
+        if double:
+            total += doubled[digit]
+        else:
+            total += digit
+        double = not double
+    return total % 10 == 0
+
+def expiry_valid(expiry: str, today: Optional[date] = None) -> bool:
+    """True for an MM/YY or MM/YYYY expiry that has not passed; cards work through their expiry month"""
+    month, _, year = expiry.strip().partition("/")
+    if not (month.isdigit() and year.isdigit() and len(year) in (2, 4)):
+        return False
+    month_number, year_number = int(month), int(year)
+    if not 1 <= month_number <= 12:
+        return False
+    if len(year) == 2:
+        year_number += 2000
+    today = today or date.today()
+    return (year_number, month_number) >= (today.year, today.month)
+
+def card_number_valid(number: str) -> bool:
+    """Luhn-valid and, when the network is known, of one of its lengths; number must be digits only"""
+    if not luhn_valid(number):
+        return False
+    network = BIN_TRIE.lookup(number)
+    return network is None or len(number) in network.lengths
+
+def validate_card(number: str, expiry: Optional[str] = None, today: Optional[date] = None) -> CardCheck:
+    """Check a card number, which may contain spaces and dashes, and optionally its expiry"""
+    number = number.translate(_SEPARATORS) if number else ""
+    if not number.isdigit() or not 12 <= len(number) <= 19:
+        return CardCheck(False, reason="Card number must be 12 to 19 digits")
+    network = BIN_TRIE.lookup(number)
+    name = network.name if network is not None else None
+    if network is not None and len(number) not in network.lengths:
+        return CardCheck(False, name, f"Invalid length for {name}")
+    if not luhn_valid(number):
+        return CardCheck(False, name, "Card number failed the checksum")
+    if expiry is not None and not expiry_valid(expiry, today):
+        return CardCheck(False, name, "Card has expired")
+    return CardCheck(True, name)
+
+def validate_cards(numbers: Iterable[str], expiries: Optional[Iterable[Optional[str]]] = None,
+                   today: Optional[date] = None) -> List[CardCheck]:
+    """validate_card over a column of numbers (e.g. a pandas Series), with an optional column of expiries"""
+    today = today or date.today()
+    if expiries is None:
+        return [validate_card(number, None, today) for number in numbers]
+    return [validate_card(number, expiry, today) for number, expiry in zip(numbers, expiries)]
@@ -0,0 +1,101 @@
+import copy
+import json
+import os
+import tempfile
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+_MISSING = object()
+
+class ParseCache:
+    """Bounded, thread-safe LRU memo for expensive parsers.
+
+    Keys are the caller's normalized input and values must be JSON
+    serializable, so that when a path is given the cache can be loaded at
+    start-up and written back by save(). Callers get copies, so mutating a
+    result cannot change the cache. The parser runs outside the lock:
+    two threads missing on the same key may both parse it, but a slow parse
+    never blocks lookups of other keys.
+    """
+    def __init__(self, maxsize: int = 4096, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = Lock()
+        self._dirty = False
+        if path:
+            self.load()
+
+    def get_or_parse(self, key: str, parser: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            self.misses += 1
+        value = parser()
+        with self._lock:
+            self._store(key, value)
+        return copy.deepcopy(value)
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._dirty = True
+
+    def load(self) -> int:
+        """Add the entries persisted at path; returns how many were loaded"""
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load parse cache: {str(e)}")
+            return 0
+        with self._lock:
+            for key, value in list(entries.items())[-self.maxsize:]:
+                self._entries[key] = value
+            self._dirty = False
+        return len(entries)
+
+    def save(self) -> bool:
+        """Write the entries to path if they changed since the last load or save"""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".parse-cache-", suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            self._dirty = True
+            logging.error(f"Failed to save parse cache: {str(e)}")
+            return False
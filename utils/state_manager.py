@@ -1,21 +1,47 @@
 import json
 import os
 import time
-from typing import Dict, Any, Optional, List
+import zlib
+import hashlib
+import atexit
+import tempfile
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Deque, Mapping
 from datetime import datetime
-import shutil
 import logging
-from threading import Lock
+from threading import Lock, RLock, Event, Thread
+
+# Bookkeeping that changes on every save and is not part of a backup's identity
+BACKUP_IGNORED_KEYS = ("last_saved", "last_backup")
 
 class StateManager:
-    def __init__(self, auto_save_interval: int = 300):  # 5 minutes default
+    def __init__(self, auto_save_interval: int = 300,  # 5 minutes default
+                 write_behind: bool = False, flush_interval: float = 1.0, backup_count: int = 5):
         self.state_file = "data/app_state.json"
         self.backup_dir = "data/backups"
         self.auto_save_interval = auto_save_interval
         self.last_save_time = time.time()
-        self.state_lock = Lock()
-        self.command_history: List[Dict[str, Any]] = []
+        # Copy-on-write: _state is never modified once published. Writers
+        # serialize on state_lock, copy it, change the copy and swap the
+        # reference; readers just take the current reference without locking.
+        # Values stored in the state must be replaced, not mutated in place.
+        self.state_lock = RLock()
+        # Orders disk writes; held without state_lock so writers never wait on I/O
+        self._io_lock = Lock()
+        # Keeps command_history and its journal in step
+        self._history_lock = RLock()
+        self._state: Dict[str, Any] = {}
         self.max_history = 50
+        # Bounded history; every push and undo is also appended to a JSON-lines
+        # journal, which is compacted into a single snapshot line now and then
+        self.command_history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        self.journal_compact_every = self.max_history * 4
+        self._journal_entries = 0
+        self.backup_count = backup_count
+        # Retained backup points, oldest first; read from the manifest once per backup_dir
+        self._backup_points: Optional[Deque[Dict[str, Any]]] = None
+        self._backup_points_dir: Optional[str] = None
         
         # Create necessary directories
         os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
@@ -23,9 +49,44 @@ class StateManager:
         
         # Initialize state
         self.state = self.load_state()
+        
+        # Write-behind: changes only mark the state dirty and a background
+        # flusher saves once per flush_interval, however many changes came in
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self._dirty = Event()
+        self._closed = Event()
+        self._flusher: Optional[Thread] = None
+        if write_behind:
+            self._flusher = Thread(target=self._flush_loop, name="state-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+    
+    @property
+    def state(self) -> Mapping[str, Any]:
+        """Read-only view of the current state snapshot"""
+        return MappingProxyType(self._state)
+    
+    @state.setter
+    def state(self, value: Dict[str, Any]):
+        with self.state_lock:
+            self._state = dict(value)
+    
+    def snapshot(self) -> Mapping[str, Any]:
+        """The current state version; later writes never change it"""
+        return MappingProxyType(self._state)
+    
+    @property
+    def history_journal(self) -> str:
+        return os.path.splitext(self.state_file)[0] + "_history.jsonl"
     
     def load_state(self) -> Dict[str, Any]:
-        """Load application state from file or return default state"""
+        """Load application state from file or return default state, and replay the history journal"""
+        state = self._read_state()
+        self._replay_history(state.get("command_history") or [])
+        return state
+    
+    def _read_state(self) -> Dict[str, Any]:
         try:
             if os.path.exists(self.state_file):
                 with open(self.state_file, 'r') as f:
@@ -59,18 +120,22 @@ class StateManager:
         if not force and (current_time - self.last_save_time) < self.auto_save_interval:
             return False
             
-        with self.state_lock:
+        with self._io_lock:
             try:
-                # Create backup before saving
-                if os.path.exists(self.state_file):
-                    self.create_backup()
-                
-                # Update last save time
-                self.state["last_saved"] = datetime.now().isoformat()
+                # Take the newest version once we hold the I/O lock, so a slow
+                # save can never overwrite a newer one
+                document = dict(self._state)
+                with self._history_lock:
+                    # The journal is authoritative; this copy keeps the document self-describing
+                    document["command_history"] = list(self.command_history)
                 
-                # Save state
-                with open(self.state_file, 'w') as f:
-                    json.dump(self.state, f, indent=4)
+                # Back up the new contents, then swap them in atomically
+                try:
+                    document["last_backup"] = self._backup(document)
+                except Exception as e:
+                    logging.error(f"Error creating backup: {str(e)}")
+                document["last_saved"] = datetime.now().isoformat()
+                self._write_atomic(self.state_file, json.dumps(document, separators=(',', ':')))
                 
                 self.last_save_time = current_time
                 return True
@@ -78,76 +143,244 @@ class StateManager:
                 logging.error(f"Error saving state: {str(e)}")
                 return False
     
-    def create_backup(self) -> bool:
-        """Create a backup of the current state file"""
+    def mark_dirty(self) -> bool:
+        """Record that the state changed; in write-behind mode the flusher saves it later"""
+        if self.write_behind:
+            self._dirty.set()
+            return True
+        return self.save_state()
+    
+    def flush(self) -> bool:
+        """Save now if there are unsaved changes"""
+        if not self._dirty.is_set():
+            return False
+        self._dirty.clear()
+        return self.save_state(force=True)
+    
+    def close(self):
+        """Stop the flusher and save anything still pending"""
+        if self._flusher is None or self._closed.is_set():
+            return
+        self._closed.set()
+        self._dirty.set()  # Wake the flusher so it can exit
+        self._flusher.join()
+        # Changes made while the flusher's last save was running
+        self.flush()
+    
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            self._dirty.wait()
+            # Let more changes pile up before writing them all at once
+            self._closed.wait(self.flush_interval)
+            self.flush()
+    
+    @staticmethod
+    def _write_atomic(path: str, data, binary: bool = False):
+        """Write through a temporary file and os.replace so the file is never half-written"""
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".state-", suffix=".tmp")
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = os.path.join(self.backup_dir, f"state_backup_{timestamp}.json")
-            shutil.copy2(self.state_file, backup_file)
-            
-            # Update last backup time
-            self.state["last_backup"] = timestamp
-            
-            # Clean old backups (keep last 5)
-            self._clean_old_backups()
+            with os.fdopen(fd, 'wb' if binary else 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    @property
+    def backup_manifest(self) -> str:
+        return os.path.splitext(self.state_file)[0] + "_backups.json"
+    
+    def create_backup(self, serialized: Optional[str] = None) -> bool:
+        """Back up the current state file, or the given serialized state"""
+        try:
+            if serialized is None:
+                with open(self.state_file, 'r') as f:
+                    serialized = f.read()
+            with self._io_lock:
+                self._backup(json.loads(serialized))
             return True
         except Exception as e:
             logging.error(f"Error creating backup: {str(e)}")
             return False
     
-    def restore_from_backup(self) -> Dict[str, Any]:
-        """Restore state from most recent backup"""
+    def _backup(self, state: Dict[str, Any]) -> Optional[str]:
+        """Record a backup point for `state` and return its timestamp; needs _io_lock.
+        
+        Backups are zlib-compressed snapshots named by the hash of their
+        contents (minus BACKUP_IGNORED_KEYS). A backup identical to the latest
+        one is skipped, and points with the same contents share one file. The
+        manifest lists the retained points so any of them can be restored by
+        reading a single file.
+        """
+        # Save timestamps change every time; leave them out so unchanged states dedupe
+        content = {key: value for key, value in state.items() if key not in BACKUP_IGNORED_KEYS}
+        data = json.dumps(content, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        os.makedirs(self.backup_dir, exist_ok=True)
+        points = self.list_backups()
+        if points and points[-1]["hash"] == digest:
+            return points[-1]["timestamp"]
+        
+        backup_file = f"state_backup_{digest[:32]}.json.z"
+        if not any(point["file"] == backup_file for point in points):
+            self._write_atomic(os.path.join(self.backup_dir, backup_file),
+                               zlib.compress(data, 6), binary=True)
+        # Microseconds keep several saves within one second apart
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        points.append({"timestamp": timestamp, "hash": digest, "file": backup_file})
+        
+        # Clean old backups
+        self._clean_old_backups(self.backup_count)
+        self._write_atomic(self.backup_manifest, json.dumps(list(points), separators=(',', ':')))
+        return timestamp
+    
+    def list_backups(self) -> Deque[Dict[str, Any]]:
+        """Retained backup points, oldest first, each with timestamp, hash and file"""
+        if self._backup_points is None or self._backup_points_dir != self.backup_dir:
+            self._backup_points = self._load_manifest()
+            self._backup_points_dir = self.backup_dir
+        return self._backup_points
+    
+    def _load_manifest(self) -> Deque[Dict[str, Any]]:
         try:
-            backups = sorted([f for f in os.listdir(self.backup_dir) if f.startswith("state_backup_")])
-            if backups:
-                latest_backup = os.path.join(self.backup_dir, backups[-1])
-                with open(latest_backup, 'r') as f:
-                    return json.load(f)
+            with open(self.backup_manifest, 'r') as f:
+                return deque(json.load(f))
+        except FileNotFoundError:
+            pass
+        # No manifest yet: adopt plain state_backup_<timestamp>.json files from older versions
+        points: Deque[Dict[str, Any]] = deque()
+        if os.path.isdir(self.backup_dir):
+            for name in sorted(os.listdir(self.backup_dir)):
+                if name.startswith("state_backup_") and name.endswith(".json"):
+                    points.append({"timestamp": name[len("state_backup_"):-len(".json")], "hash": None, "file": name})
+        return points
+    
+    def restore_from_backup(self, timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Restore state from the most recent backup, or the retained point at `timestamp`"""
+        try:
+            with self._io_lock:
+                points = list(self.list_backups())
+            if timestamp is not None:
+                points = [point for point in points if point["timestamp"] == timestamp]
+            if points:
+                return self._read_backup(points[-1])
         except Exception as e:
             logging.error(f"Error restoring from backup: {str(e)}")
         
         return self.get_default_state()
     
+    def _read_backup(self, point: Dict[str, Any]) -> Dict[str, Any]:
+        with open(os.path.join(self.backup_dir, point["file"]), 'rb') as f:
+            data = f.read()
+        if point["file"].endswith(".z"):
+            data = zlib.decompress(data)
+        return json.loads(data)
+    
     def _clean_old_backups(self, keep_count: int = 5):
-        """Remove old backups keeping only the most recent ones"""
+        """Drop the oldest points beyond keep_count and delete files no point still uses"""
         try:
-            backups = sorted([f for f in os.listdir(self.backup_dir) if f.startswith("state_backup_")])
-            if len(backups) > keep_count:
-                for old_backup in backups[:-keep_count]:
-                    os.remove(os.path.join(self.backup_dir, old_backup))
+            points = self.list_backups()
+            dropped = []
+            while len(points) > keep_count:
+                dropped.append(points.popleft()["file"])
+            in_use = {point["file"] for point in points}
+            for name in set(dropped) - in_use:
+                try:
+                    os.remove(os.path.join(self.backup_dir, name))
+                except FileNotFoundError:
+                    pass
         except Exception as e:
             logging.error(f"Error cleaning old backups: {str(e)}")
     
     def update_state(self, key: str, value: Any) -> bool:
         """Update a specific state value"""
-        with self.state_lock:
-            try:
-                self.state[key] = value
-                return self.save_state()
-            except Exception as e:
-                logging.error(f"Error updating state: {str(e)}")
-                return False
+        try:
+            with self.state_lock:
+                state = dict(self._state)
+                state[key] = value
+                self._state = state
+            # Saving (if due) happens after the new version is published
+            return self.mark_dirty()
+        except Exception as e:
+            logging.error(f"Error updating state: {str(e)}")
+            return False
     
     def add_to_history(self, command: Dict[str, Any]):
         """Add command to history with undo/redo support"""
-        self.command_history.append(command)
-        if len(self.command_history) > self.max_history:
-            self.command_history.pop(0)
-        self.update_state("command_history", self.command_history)
+        with self._history_lock:
+            self.command_history.append(command)
+            self._journal({"op": "push", "command": command})
     
     def undo_last_command(self) -> Optional[Dict[str, Any]]:
         """Retrieve the last command for undo operation"""
-        if self.command_history:
-            command = self.command_history.pop()
-            self.update_state("command_history", self.command_history)
-            return command
+        with self._history_lock:
+            if self.command_history:
+                command = self.command_history.pop()
+                self._journal({"op": "pop"})
+                return command
         return None
     
+    def _journal(self, entry: Dict[str, Any]):
+        try:
+            with open(self.history_journal, 'a') as f:
+                f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self._journal_entries += 1
+            if self._journal_entries > self.journal_compact_every:
+                self.compact_history()
+        except Exception as e:
+            logging.error(f"Error writing history journal: {str(e)}")
+    
+    def compact_history(self):
+        """Replace the journal with a single snapshot of the current history"""
+        with self._history_lock:
+            snapshot = {"op": "snapshot", "commands": list(self.command_history)}
+            self._write_atomic(self.history_journal, json.dumps(snapshot, separators=(',', ':')) + "\n")
+            self._journal_entries = 1
+    
+    def _replay_history(self, fallback: List[Dict[str, Any]]):
+        """Rebuild command_history from the journal, or from the state document if there is none"""
+        history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        entries = 0
+        try:
+            with open(self.history_journal, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        logging.warning("Skipping unreadable history journal entry")
+                        continue
+                    entries += 1
+                    if entry["op"] == "snapshot":
+                        history = deque(entry["commands"], maxlen=self.max_history)
+                    elif entry["op"] == "push":
+                        history.append(entry["command"])
+                    elif entry["op"] == "pop" and history:
+                        history.pop()
+        except FileNotFoundError:
+            history.extend(fallback)
+        except Exception as e:
+            logging.error(f"Error replaying history journal: {str(e)}")
+            history.extend(fallback)
+        self.command_history = history
+        self._journal_entries = entries
+    
     def get_state_value(self, key: str, default: Any = None) -> Any:
         """Get a specific state value"""
-        return self.state.get(key, default)
+        # Lock-free: published versions are never modified
+        return self._state.get(key, default)
     
     def reset_state(self) -> bool:
         """Reset state to default values"""
         self.state = self.get_default_state()
+        with self._history_lock:
+            self.command_history.clear()
+            try:
+                self.compact_history()
+            except Exception as e:
+                logging.error(f"Error clearing history journal: {str(e)}")
         return self.save_state(force=True)
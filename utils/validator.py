@@ -1,33 +1,122 @@
 import re
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, List, Mapping
 from datetime import datetime
-import phonenumbers
-from postal.parser import parse_address
+import os
 import logging
+from lazy_import import lazy_import
+from utils.validation_engine import ValidationEngine, validation_engine
+from utils.parse_cache import ParseCache
+from exceptions import ValidationError
+
+# libpostal loads a model of several hundred MB; import it only when an address is parsed
+phonenumbers = lazy_import("phonenumbers")
+postal_parser = lazy_import("postal.parser")
+
+PHONE_SEPARATORS = str.maketrans("", "", " ()-.")
+
+# Free-text address fields checked by parsing them with libpostal
+ADDRESS_FIELDS = ("address", "billing_address")
 
 class DataValidator:
-    def __init__(self):
-        self.validation_patterns = {
-            'email': r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$',
-            'phone': r'^\+?1?\d{9,15}$',
-            'zip': r'^\d{5}(-\d{4})?$',
-            'ssn': r'^\d{3}-\d{2}-\d{4}$',
-            'card_number': r'^\d{13,19}$',
-            'cvv': r'^\d{3,4}$',
-            'expiry_date': r'^(0[1-9]|1[0-2])/([0-9]{2})$',
-            'url': r'^https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
-        }
-        
-        self.field_formats = {
-            'phone': '(XXX) XXX-XXXX or +X XXX XXX XXXX',
-            'ssn': 'XXX-XX-XXXX',
-            'zip': 'XXXXX or XXXXX-XXXX',
-            'card_number': 'XXXX XXXX XXXX XXXX',
-            'expiry_date': 'MM/YY',
-            'dob': 'MM/DD/YYYY'
+    def __init__(self, engine: Optional[ValidationEngine] = None, cache_size: int = 4096,
+                 cache_dir: Optional[str] = None):
+        self.engine = engine or validation_engine
+        self.validation_patterns = {name: rule.pattern.pattern for name, rule in self.engine.rules.items()}
+        self.field_formats = {name: rule.format for name, rule in self.engine.rules.items() if rule.format}
+        # Parsed phone numbers and addresses, persisted in cache_dir if given
+        self.phone_cache = ParseCache(cache_size, cache_dir and os.path.join(cache_dir, "phone_cache.json"))
+        self.address_cache = ParseCache(cache_size, cache_dir and os.path.join(cache_dir, "address_cache.json"))
+        self._postal_available = True
+
+    def parse_phone(self, value: str, region: str = "US") -> Optional[Dict[str, Any]]:
+        """Parsed phone number, or None if it cannot be parsed; memoized on the digits"""
+        if not value:
+            return None
+        key = f"{region}:{value.strip().translate(PHONE_SEPARATORS)}"
+        return self.phone_cache.get_or_parse(key, lambda: self._parse_phone(value, region))
+
+    @staticmethod
+    def _parse_phone(value: str, region: str) -> Optional[Dict[str, Any]]:
+        try:
+            number = phonenumbers.parse(value, region)
+        except phonenumbers.NumberParseException:
+            return None
+        return {
+            "e164": phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164),
+            "international": phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
+            "region": phonenumbers.region_code_for_number(number),
+            "possible": phonenumbers.is_possible_number(number),
+            "valid": phonenumbers.is_valid_number(number),
         }
-    
-    # Existing validation methods...
+
+    def parse_address(self, value: str) -> Dict[str, str]:
+        """libpostal's components of an address, by label; memoized on the normalized text"""
+        if not value:
+            return {}
+        key = " ".join(value.lower().split())
+        return self.address_cache.get_or_parse(
+            key, lambda: {label: component for component, label in postal_parser.parse_address(value)})
+
+    def phone_error(self, value: str) -> Optional[str]:
+        """Why a phone number that passed the pattern check still cannot be dialled, if it cannot"""
+        parsed = self.parse_phone(value)
+        if parsed is None or not parsed["possible"]:
+            return "Invalid phone number"
+        return None
+
+    def address_error(self, value: str) -> Optional[str]:
+        """Why libpostal finds no address in value, if it does not; None when libpostal is not installed"""
+        if not self._postal_available:
+            return None
+        try:
+            components = self.parse_address(value)
+        except ImportError:
+            logging.info("libpostal is not installed, addresses are not checked")
+            self._postal_available = False
+            return None
+        return None if components else "Unrecognized address"
+
+    def validate_profile(self, profile: Mapping[str, Any]) -> List[ValidationError]:
+        """The engine's errors plus phone numbers and addresses that do not parse; parses are memoized"""
+        errors = self.engine.validate_profile(profile)
+        flagged = {error.field for error in errors}
+        for section, values in profile.items():
+            if not isinstance(values, Mapping):
+                continue
+            for field, value in values.items():
+                if not value or not isinstance(value, str) or f"{section}.{field}" in flagged:
+                    continue
+                if self.engine.rule_name(field) == 'phone':
+                    reason = self.phone_error(value)
+                elif field in ADDRESS_FIELDS:
+                    reason = self.address_error(value)
+                else:
+                    continue
+                if reason is not None:
+                    errors.append(ValidationError(f"{section}.{field}", value, reason))
+        return errors
+
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {"phone": self.phone_cache.stats, "address": self.address_cache.stats}
+
+    def save_caches(self):
+        """Persist parsed values so the next session does not parse them again"""
+        self.phone_cache.save()
+        self.address_cache.save()
+
+    def validate_field(self, field_type: str, value: str) -> Tuple[bool, Optional[str]]:
+        """Validate a value for a field type, returning (is_valid, reason)"""
+        return self.engine.validate_field(field_type, value)
+
+    def standardize_value(self, field_type: str, value: str) -> str:
+        """Bring a valid value into the field type's canonical form"""
+        return self.engine.standardize(field_type, value)
+
+    def _validate_email(self, email: str) -> Tuple[bool, Optional[str]]:
+        if not email:
+            return False, "Email is required"
+        return self.engine.validate_field('email', email)
 
     def validate_user_registration(self, username: str, email: str, password: str) -> Tuple[bool, Optional[str]]:
         """Validate user registration inputs"""
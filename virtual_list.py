@@ -0,0 +1,132 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional
+
+class FieldRow:
+    """A pooled label/value row, rebound to whichever field scrolls into its slot"""
+    def __init__(self, parent, on_edit: Callable[[str, Any], None]):
+        self.frame = ttk.Frame(parent)
+        self.label = ttk.Label(self.frame, width=24, anchor=tk.W)
+        self.label.pack(side='left', padx=5)
+        self.text_var = tk.StringVar()
+        self.bool_var = tk.BooleanVar()
+        self.entry = ttk.Entry(self.frame, width=40, textvariable=self.text_var)
+        self.check = ttk.Checkbutton(self.frame, variable=self.bool_var)
+        self.field: Optional[str] = None
+        self.is_bool: Optional[bool] = None
+        self._on_edit = on_edit
+        self._binding = False
+        self.text_var.trace_add('write', lambda *_: self._changed(self.text_var))
+        self.bool_var.trace_add('write', lambda *_: self._changed(self.bool_var))
+
+    def bind_field(self, field: str, value: Any):
+        """Show `field` with `value` without reporting it as an edit"""
+        self._binding = True
+        try:
+            self.field = field
+            self.label.configure(text=field.replace("_", " ").title())
+            is_bool = isinstance(value, bool)
+            if is_bool != self.is_bool:
+                # Only repack when the value kind changes
+                (self.entry if is_bool else self.check).pack_forget()
+                (self.check if is_bool else self.entry).pack(side='left', padx=5)
+                self.is_bool = is_bool
+            (self.bool_var if is_bool else self.text_var).set(value)
+        finally:
+            self._binding = False
+
+    def widgets(self):
+        return (self.frame, self.label, self.entry, self.check)
+
+    def _changed(self, var):
+        if not self._binding and self.field is not None:
+            self._on_edit(self.field, var.get())
+
+class VirtualFieldList(ttk.Frame):
+    """Scrollable field editor that only creates widgets for the visible rows.
+
+    Rows come from a pool sized to the viewport and are rebound to fields
+    as the list scrolls, so the number of widgets stays the same however
+    many fields a section has. Edits are reported through on_edit(field, value).
+    """
+    def __init__(self, parent, on_edit: Callable[[str, Any], None], row_height: int = 28):
+        super().__init__(parent)
+        self.on_edit = on_edit
+        self.row_height = row_height
+        self.top = 0  # Scroll offset in pixels
+        self.rows: List[FieldRow] = []
+        self._source: Dict[str, Any] = {}
+        self._value: Callable[[str], Any] = self._source.__getitem__
+        self._fields: Optional[List[str]] = []
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = ttk.Frame(self)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.bind("<Configure>", lambda e: self.render())
+        self._bind_wheel(self.body)
+
+    @property
+    def fields(self) -> List[str]:
+        if self._fields is None:
+            self._fields = list(self._source)
+        return self._fields
+
+    @property
+    def visible_fields(self) -> List[str]:
+        return [row.field for row in self.rows if row.frame.winfo_manager()]
+
+    def set_source(self, source: Dict[str, Any], value: Optional[Callable[[str], Any]] = None):
+        """Show the fields of `source`; value(field), if given, supplies what each row displays"""
+        self._source = source
+        self._value = value or source.__getitem__
+        self._fields = None
+        self.render(rebind=True)
+
+    def render(self, rebind: bool = False):
+        """Place pooled rows over the fields in view; only rows whose field changed are rebound"""
+        fields = self.fields
+        height = max(self.body.winfo_height(), 1)
+        total = len(fields) * self.row_height
+        self.top = max(0, min(self.top, total - height))
+        first = self.top // self.row_height
+        count = max(0, min(len(fields) - first, height // self.row_height + 2))
+
+        while len(self.rows) < count:
+            row = FieldRow(self.body, self.on_edit)
+            for widget in row.widgets():
+                self._bind_wheel(widget)
+            self.rows.append(row)
+
+        for i, row in enumerate(self.rows):
+            if i >= count:
+                row.frame.place_forget()
+                continue
+            field = fields[first + i]
+            if rebind or row.field != field:
+                row.bind_field(field, self._value(field))
+            row.frame.place(x=0, y=(first + i) * self.row_height - self.top,
+                            relwidth=1, height=self.row_height)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + height) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        """Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.fields) * self.row_height)
+        elif args[0] == "scroll":
+            step = self.body.winfo_height() if args[2] == "pages" else self.row_height
+            self.top += int(args[1]) * step
+        self.render()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.yview("scroll", -1 if up else 1, "units")